@@ -0,0 +1,70 @@
+"""
+Compare two benchmark result files written by run.py.
+
+Cases are matched by name and row count. For each one the ratio of the
+candidate's best time and traced memory peak to the baseline's is printed;
+ratios above --threshold are flagged as regressions and make the exit code 1.
+
+Usage:
+    python benchmarks/compare.py results/0.1.7.json results/candidate.json --threshold 1.15
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+Key = Tuple[str, int]
+
+
+def _load(path: str) -> Dict[Key, Dict[str, Any]]:
+    with open(path) as f:
+        report = json.load(f)
+    return {(result["case"], result["rows"]): result for result in report["results"]}
+
+
+def _ratio(old: Optional[float], new: Optional[float]) -> Optional[float]:
+    if not old or new is None:
+        return None
+    return new / old
+
+
+def _format(ratio: Optional[float]) -> str:
+    return "     -" if ratio is None else f"{ratio:6.2f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="Flag cases this many times slower or larger (default: 1.10)")
+    args = parser.parse_args()
+
+    baseline = _load(args.baseline)
+    candidate = _load(args.candidate)
+    regressions = 0
+    print(f"{'case':<40} {'rows':>11} {'time':>6} {'memory':>6}")
+    for key in sorted(baseline.keys() & candidate.keys(), key=lambda k: (k[1], k[0])):
+        old, new = baseline[key], candidate[key]
+        if not (old["ok"] and new["ok"]):
+            note = "now failing" if old["ok"] else ("fixed" if new["ok"] else "failing")
+            print(f"{key[0]:<40} {key[1]:>11,} {note}")
+            regressions += old["ok"] and not new["ok"]
+            continue
+        time_ratio = _ratio(old.get("best_seconds"), new.get("best_seconds"))
+        memory_ratio = _ratio(old.get("peak_traced_mb"), new.get("peak_traced_mb"))
+        flagged = [ratio for ratio in (time_ratio, memory_ratio)
+                   if ratio is not None and ratio > args.threshold]
+        regressions += bool(flagged)
+        print(f"{key[0]:<40} {key[1]:>11,} {_format(time_ratio)} {_format(memory_ratio)}"
+              f"{'  REGRESSION' if flagged else ''}")
+    for key in sorted(baseline.keys() - candidate.keys()):
+        print(f"{key[0]:<40} {key[1]:>11,} missing from candidate")
+
+    print(f"\n{regressions} regression(s) above {args.threshold:g}x")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
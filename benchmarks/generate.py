@@ -0,0 +1,124 @@
+"""
+Synthetic job-postings data for the benchmarks, modeled on examples/ai_job_dataset.csv.
+
+Every generated row starts from a random row of the example, which keeps the
+joint distribution of title, experience level, salary, years of experience,
+location and company, and is then varied:
+
+- job_id is unique (AI00000001, AI00000002, ...)
+- salary_usd is jittered by up to 15% and kept within the example's range
+- required_skills draws 3-5 distinct skills, weighted by how often the
+  example uses them
+- posting_date is redrawn in the example's date range and the application
+  deadline follows 14-74 days later
+- job_description_length and benefits_score are redrawn in their ranges
+
+Rows are generated and written in blocks, so 10M rows need little memory.
+
+Usage:
+    python benchmarks/generate.py --rows 1m jobs_1m.csv
+"""
+
+import argparse
+import os
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(ROOT, "examples", "ai_job_dataset.csv")
+
+BLOCK_ROWS = 250_000
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def parse_size(text: str) -> int:
+    """A row count such as 10000, 10k, 1m or 10M."""
+    text = text.strip().lower()
+    if text in SIZES:
+        return SIZES[text]
+    for suffix, factor in (("k", 1_000), ("m", 1_000_000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+def _skill_weights(source: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    counts = source["required_skills"].str.split(", ").explode().value_counts()
+    return counts.index.to_numpy(dtype=object), (counts / counts.sum()).to_numpy()
+
+
+def _skills(rng: np.random.Generator, vocabulary: np.ndarray, weights: np.ndarray, count: int) -> list:
+    # Weighted sampling without replacement: the top-k of log(weight) + Gumbel noise
+    keys = np.log(weights) + rng.gumbel(size=(count, len(vocabulary)))
+    ranked = np.argsort(-keys, axis=1)
+    sizes = rng.integers(3, 6, count)
+    return [", ".join(vocabulary[ranked[i, :sizes[i]]]) for i in range(count)]
+
+
+def generate_block(source: pd.DataFrame, rng: np.random.Generator, first_id: int, count: int) -> pd.DataFrame:
+    """Generate `count` rows with job ids starting at first_id."""
+    vocabulary, weights = _skill_weights(source)
+    block = source.iloc[rng.integers(0, len(source), count)].reset_index(drop=True)
+
+    block["job_id"] = [f"AI{n:08d}" for n in range(first_id, first_id + count)]
+    salary = block["salary_usd"] * rng.uniform(0.85, 1.15, count)
+    salary = salary.clip(source["salary_usd"].min(), source["salary_usd"].max())
+    block["salary_usd"] = salary.round().astype('int64')
+    block["required_skills"] = _skills(rng, vocabulary, weights, count)
+
+    first = pd.Timestamp(source["posting_date"].min())
+    days = (pd.Timestamp(source["posting_date"].max()) - first).days
+    posted = first + pd.to_timedelta(rng.integers(0, days + 1, count), unit="D")
+    block["posting_date"] = posted.strftime("%Y-%m-%d")
+    deadline = posted + pd.to_timedelta(rng.integers(14, 75, count), unit="D")
+    block["application_deadline"] = deadline.strftime("%Y-%m-%d")
+    block["job_description_length"] = rng.integers(source["job_description_length"].min(),
+                                                   source["job_description_length"].max() + 1, count)
+    block["benefits_score"] = rng.uniform(source["benefits_score"].min(),
+                                          source["benefits_score"].max(), count).round(1)
+    return block[source.columns]
+
+
+def generate(path: str, rows: int, seed: int = 0) -> str:
+    """Write `rows` synthetic job postings to a CSV file and return its path."""
+    source = pd.read_csv(SOURCE)
+    rng = np.random.default_rng(seed)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    written = 0
+    while True:
+        count = min(BLOCK_ROWS, rows - written)
+        generate_block(source, rng, written + 1, count).to_csv(tmp, mode="a" if written else "w",
+                                                               header=written == 0, index=False)
+        written += count
+        if written >= rows:
+            break
+    os.replace(tmp, path)
+    return path
+
+
+def generate_companies(path: str, seed: int = 0) -> str:
+    """Write a small company metadata table keyed by company_name, for join benchmarks."""
+    names = sorted(pd.read_csv(SOURCE, usecols=["company_name"])["company_name"].unique())
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "company_name": names,
+        "founded": rng.integers(1990, 2022, len(names)),
+        "employees": rng.integers(20, 50_000, len(names)),
+        "public": rng.random(len(names)) < 0.3,
+    }).to_csv(path, index=False)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic job postings")
+    parser.add_argument("output", help="CSV file to write")
+    parser.add_argument("--rows", default="10k", help="Row count: 10k, 1m, 10m or a number")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.output, parse_size(args.rows), args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark multi-core CSV parsing against a single pandas pass.
+
+Generates a CSV modeled on examples/ai_job_dataset.csv (see generate.py; its quoted,
+comma-separated skills column exercises the quote-aware splitting), then times:
+
+- pd.read_csv of the whole file on one core
+- the row index scan that finds the record boundaries (once, then cached)
+- read_csv_parallel for each worker count
+
+Usage:
+    python benchmarks/parallel_csv.py --rows 2m --workers 1,2,4,8 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from generate import generate, parse_size  # noqa: E402
+from visidata_mcp.parallel_csv import read_csv_parallel  # noqa: E402
+from visidata_mcp.partitions import shutdown_pool  # noqa: E402
+from visidata_mcp.row_index import get_row_index  # noqa: E402
+
+
+def timed(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=parse_size, default="1m", help="Row count: 10k, 1m, 10m or a number")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    parser.add_argument("--file", help="Benchmark an existing CSV instead of generating one")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="visidata_mcp_bench_") as workdir:
+        os.environ["VISIDATA_MCP_CACHE_DIR"] = os.path.join(workdir, "cache")
+        path = args.file or os.path.join(workdir, "jobs.csv")
+        if not args.file:
+            generate(path, args.rows)
+
+        started = time.perf_counter()
+        index = get_row_index(path)
+        index_seconds = time.perf_counter() - started
+
+        baseline = timed(lambda: pd.read_csv(path, low_memory=False), args.repeat)
+        results = {
+            "file_bytes": os.path.getsize(path),
+            "rows": index.total_rows,
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "index_scan_seconds": round(index_seconds, 4),
+            "single_pass_seconds": round(baseline, 4),
+            "parallel": [],
+        }
+        for workers in (int(w) for w in args.workers.split(",")):
+            # Start the pool outside the timing, as a running server would have it warm
+            read_csv_parallel(path, columns=index.columns[:1], workers=workers)
+            seconds = timed(lambda: read_csv_parallel(path, workers=workers), args.repeat)
+            results["parallel"].append({
+                "workers": workers,
+                "seconds": round(seconds, 4),
+                "speedup": round(baseline / seconds, 2),
+                "mb_per_second": round(results["file_bytes"] / seconds / 1e6, 1),
+            })
+        shutdown_pool()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
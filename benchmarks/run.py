@@ -0,0 +1,265 @@
+"""
+Time and memory-profile every MCP tool on synthetic data of 10k to 10M rows.
+
+Each tool call runs in a fresh Python process with its own empty cache
+directory, so the first call is a true cold start and every measurement has
+its own memory high-water mark. For every tool and data size the results hold:
+
+- first_seconds: the cold call (row indexes and caches still to be built)
+- best_seconds, median_seconds: over --repeat warm calls
+- peak_traced_mb: peak Python/NumPy allocation during one call (tracemalloc)
+- max_rss_mb: peak resident memory of the process
+- ok / error: whether the tool returned an "Error: ..." response
+
+The chart cache is disabled so chart tools render on every call. Generated
+data is kept in --data-dir and reused by later runs. Results are written as
+JSON; compare two runs with compare.py.
+
+Usage:
+    python benchmarks/run.py --sizes 10k,1m --output results/0.1.7.json
+    python benchmarks/run.py --sizes 10k --tools filter_data,sort_data
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from generate import generate, generate_companies, parse_size  # noqa: E402
+
+DEFAULT_DATA_DIR = os.path.join(BENCH_DIR, "data")
+
+
+def cases(data: str, companies: str, rows: int, out: str) -> Dict[str, Callable[[], str]]:
+    """The benchmarked calls, keyed by case name (the tool name, plus a variant for some tools)."""
+    from visidata_mcp import server
+
+    def path(name: str) -> str:
+        return os.path.join(out, name)
+
+    salary = [{"column": "salary_usd", "function": "mean"}, {"function": "count"}]
+    return {
+        "load_data": lambda: server.load_data(data),
+        "get_data_sample": lambda: server.get_data_sample(data, 10),
+        "get_data_sample:deep_page": lambda: server.get_data_sample(data, 10, offset=max(0, rows - 100)),
+        "analyze_data": lambda: server.analyze_data(data),
+        "get_column_stats": lambda: server.get_column_stats(data, "salary_usd"),
+        "convert_data": lambda: server.convert_data(data, path("converted.jsonl")),
+        "filter_data": lambda: server.filter_data(data, "salary_usd", "greater_than", "150000",
+                                                  path("filtered.csv")),
+        "sort_data": lambda: server.sort_data(data, "salary_usd", True, path("sorted.csv")),
+        "group_by": lambda: server.group_by(data, ["company_location"], salary),
+        "run_pipeline": lambda: server.run_pipeline(data, [
+            {"op": "filter", "column": "experience_level", "condition": "equals", "value": "SE"},
+            {"op": "group_by", "keys": ["industry"], "aggregations": salary},
+            {"op": "sort", "column": "salary_usd_mean", "descending": True},
+        ]),
+        "join_data": lambda: server.join_data(data, companies, ["company_name"],
+                                              output_path=path("joined.csv")),
+        "query_data": lambda: server.query_data(
+            "SELECT company_location, avg(salary_usd) AS avg_salary FROM jobs GROUP BY 1 ORDER BY 2 DESC",
+            tables={"jobs": data}),
+        "create_graph": lambda: server.create_graph(data, "years_experience", "salary_usd",
+                                                    path("graph.png")),
+        "create_graph:grouped": lambda: server.create_graph(data, "years_experience", "salary_usd",
+                                                            path("grouped.png"),
+                                                            category_column="experience_level"),
+        "create_graph:line": lambda: server.create_graph(data, "years_experience", "salary_usd",
+                                                         path("line.png"), graph_type="line"),
+        "create_correlation_heatmap": lambda: server.create_correlation_heatmap(data, path("corr.png")),
+        "get_correlation_matrix": lambda: server.get_correlation_matrix(data),
+        "create_distribution_plots": lambda: server.create_distribution_plots(data, path("dist.png")),
+        "create_charts_batch": lambda: server.create_charts_batch(data, [
+            {"chart": "graph", "x_column": "years_experience", "y_column": "salary_usd",
+             "output_path": path("batch_graph.png")},
+            {"chart": "distribution", "output_path": path("batch_dist.png"), "columns": ["salary_usd"]},
+        ]),
+        "parse_skills_column": lambda: server.parse_skills_column(data, "required_skills",
+                                                                  path("skills.csv")),
+        "analyze_skills_by_location": lambda: server.analyze_skills_by_location(
+            data, "required_skills", "company_location"),
+        "create_skills_location_heatmap": lambda: server.create_skills_location_heatmap(
+            data, "required_skills", "company_location", path("skills_heatmap.png")),
+        "analyze_salary_by_location_and_skills": lambda: server.analyze_salary_by_location_and_skills(
+            data, "salary_usd", "company_location", "required_skills"),
+        "get_supported_formats": lambda: server.get_supported_formats(),
+    }
+
+
+def run_case(name: str, data: str, companies: str, rows: int, repeat: int) -> Dict[str, Any]:
+    """Measure one case in this process (the --case mode of the child processes)."""
+    with tempfile.TemporaryDirectory(prefix="visidata_mcp_bench_out_") as out:
+        call = cases(data, companies, rows, out)[name]
+
+        started = time.perf_counter()
+        response = call()
+        first = time.perf_counter() - started
+        result: Dict[str, Any] = {"first_seconds": first}
+        if response.startswith("Error"):
+            result.update(ok=False, error=response.splitlines()[0])
+            return result
+
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    result.update(
+        ok=True,
+        best_seconds=min(times) if times else first,
+        median_seconds=statistics.median(times) if times else first,
+        peak_traced_mb=peak / 1e6,
+        response_bytes=len(response.encode()),
+    )
+    return result
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3
+
+
+def _child(args: argparse.Namespace) -> None:
+    result = run_case(args.case, args.data, args.companies, args.rows, args.repeat)
+    result["max_rss_mb"] = _max_rss_mb()
+    print(json.dumps(result))
+
+
+def _isolated(name: str, data: str, companies: str, rows: int, repeat: int, timeout: float) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="visidata_mcp_bench_cache_") as cache:
+        env = dict(os.environ, VISIDATA_MCP_CACHE_DIR=cache, VISIDATA_MCP_CHART_CACHE_MB="0")
+        command = [sys.executable, os.path.abspath(__file__), "--case", name, "--data", data,
+                   "--companies", companies, "--rows", str(rows), "--repeat", str(repeat)]
+        try:
+            child = subprocess.run(command, capture_output=True, text=True, timeout=timeout, env=env)
+        except subprocess.TimeoutExpired:
+            return {"ok": False, "error": f"timed out after {timeout:g}s"}
+    lines = child.stdout.strip().splitlines()
+    if child.returncode != 0 or not lines:
+        error = (child.stderr.strip().splitlines() or [f"exit code {child.returncode}"])[-1]
+        return {"ok": False, "error": error}
+    return json.loads(lines[-1])
+
+
+def dataset(data_dir: str, rows: int) -> str:
+    """The generated data file for a row count, generating it on first use."""
+    path = os.path.join(data_dir, f"jobs_{rows}.csv")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"generating {rows:,} rows -> {path}", file=sys.stderr)
+        generate(path, rows)
+    return path
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    import numpy
+    import pandas
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        package_version = version("visidata-mcp")
+    except PackageNotFoundError:
+        package_version = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "package_version": package_version,
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _round(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in result.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark every visidata-mcp tool")
+    parser.add_argument("--sizes", default="10k,1m", help="Comma-separated row counts: 10k, 1m, 10m, ...")
+    parser.add_argument("--tools", help="Comma-separated case names to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Warm calls per case (default: 3)")
+    parser.add_argument("--timeout", type=float, default=3600, help="Seconds allowed per case")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Where generated data is kept")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    parser.add_argument("--list", action="store_true", help="List the case names and exit")
+    # Internal: measure a single case in this process
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    parser.add_argument("--companies", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        _child(args)
+        return
+    names = list(cases("", "", 0, ""))
+    if args.list:
+        print("\n".join(names))
+        return
+    if args.tools:
+        wanted = args.tools.split(",")
+        unknown = [name for name in wanted if name not in names]
+        if unknown:
+            parser.error(f"unknown cases {unknown}; see --list")
+        names = [name for name in names if name in wanted]
+
+    companies = os.path.join(args.data_dir, "companies.csv")
+    os.makedirs(args.data_dir, exist_ok=True)
+    generate_companies(companies)
+
+    results: List[Dict[str, Any]] = []
+    for size in args.sizes.split(","):
+        rows = parse_size(size)
+        data = dataset(args.data_dir, rows)
+        for name in names:
+            result = _isolated(name, data, companies, rows, args.repeat, args.timeout)
+            result = _round({"case": name, "tool": name.split(":")[0], "rows": rows,
+                             "file_bytes": os.path.getsize(data), **result})
+            results.append(result)
+            status = f"{result.get('best_seconds', result.get('first_seconds', 0)):.3f}s" if result["ok"] \
+                else f"FAILED: {result['error']}"
+            print(f"{rows:>11,} {name:<40} {status}", file=sys.stderr)
+
+    report = {"environment": environment(), "repeat": args.repeat, "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
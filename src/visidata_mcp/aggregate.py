@@ -0,0 +1,478 @@
+"""
+Streaming hash aggregation for the group_by tool and run_pipeline.
+
+Chunks are folded into mergeable per-group state with vectorized pandas
+group-bys, so a file is aggregated in one pass without being loaded whole:
+
+- count/sum/mean/std keep (non-null count, sum, M2) and are merged with Chan's
+  parallel variance formula
+- min/max keep the running extremes
+- approx_distinct keeps a HyperLogLog sketch per group
+- approx_quantile keeps a DDSketch-style log-bucket histogram per group
+  (about 1% relative error)
+
+When the aggregation state grows past the memory budget it is hash-partitioned
+on the group keys and spilled to temporary files; each partition is then merged
+and finalized on its own, so only one partition needs to be in memory at a time.
+
+Because the state is mergeable, the files of a partitioned dataset are
+aggregated in separate worker processes (aggregate_partition) and their
+states folded into one aggregator.
+"""
+
+import math
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .loaders import iter_partition_chunks
+from .partitions import Partition
+
+AGGREGATE_FUNCTIONS = (
+    "count", "sum", "mean", "min", "max", "std", "approx_distinct", "approx_quantile",
+)
+
+# HyperLogLog precision: 2**12 registers, ~1.6% standard error
+HLL_PRECISION = 12
+# DDSketch relative accuracy
+QUANTILE_ACCURACY = 0.01
+# Merge buffered chunk partials after this many chunks
+COMPACT_EVERY = 16
+DEFAULT_SPILL_PARTITIONS = 32
+
+_HLL_REGISTERS = 1 << HLL_PRECISION
+_HLL_RANK_BITS = 64 - HLL_PRECISION
+_HLL_ALPHA = 0.7213 / (1 + 1.079 / _HLL_REGISTERS)
+_DD_GAMMA = (1 + QUANTILE_ACCURACY) / (1 - QUANTILE_ACCURACY)
+_DD_LOG_GAMMA = math.log(_DD_GAMMA)
+# Shifts bucket indexes (negative for |x| < 1) so the sign can encode the value's sign
+_DD_OFFSET = 1 << 20
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+
+def normalize_aggregations(aggregations: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Validate aggregation specs and fill in output names.
+
+    Each spec is {"column": ..., "function": ..., "as": optional output name};
+    approx_quantile also takes "quantile" (default 0.5). A bare count needs no column.
+
+    Args:
+        aggregations: Aggregation specs, or None for a row count
+
+    Returns:
+        Normalized list of aggregation specs
+
+    Raises:
+        ValueError: If a spec is invalid
+    """
+    normalized = []
+    for agg in aggregations or [{"function": "count"}]:
+        if not isinstance(agg, dict):
+            raise ValueError("Each aggregation must be an object with 'function' and 'column'")
+        function = str(agg.get("function", "count")).lower()
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Unsupported aggregate '{function}'. Use: {', '.join(AGGREGATE_FUNCTIONS)}")
+        column = agg.get("column")
+        if function != "count" and not column:
+            raise ValueError(f"Aggregate '{function}' needs a 'column'")
+
+        spec = {"column": column, "function": function}
+        if function == "approx_quantile":
+            quantile = float(agg.get("quantile", 0.5))
+            if not 0 <= quantile <= 1:
+                raise ValueError("'quantile' must be between 0 and 1")
+            spec["quantile"] = quantile
+            default_name = f"{column}_p{round(quantile * 100, 2):g}"
+        else:
+            default_name = f"{column}_{function}" if column else "count"
+        spec["as"] = agg.get("as") or default_name
+        normalized.append(spec)
+    return normalized
+
+
+def stable_hash(values: pd.Series) -> np.ndarray:
+    """
+    Hash values so equal keys hash alike across chunks.
+
+    Chunked readers can infer int64 for one chunk and float64 for another, so
+    numeric values are hashed as float64 and everything else as text.
+    """
+    missing = values.isna().to_numpy()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        values = values.astype('float64')
+    else:
+        values = values.astype(str)
+    hashed = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype='uint64', copy=True)
+    hashed[missing] = _NULL_HASH
+    return hashed
+
+
+def key_hash(frame: pd.DataFrame, keys: List[str]) -> np.ndarray:
+    """Combine stable_hash over several key columns into one uint64 per row."""
+    combined = np.zeros(len(frame), dtype='uint64')
+    for key in keys:
+        combined = combined * np.uint64(1_000_003) ^ stable_hash(frame[key])
+    return combined
+
+
+class HashAggregator:
+    """
+    Group-by aggregation over a stream of DataFrame chunks.
+
+    Args:
+        keys: Group key columns
+        aggregations: Specs as accepted by normalize_aggregations
+        memory_budget_bytes: Spill aggregation state to disk beyond this size
+        spill_partitions: Number of hash partitions used when spilling
+        spill_dir: Directory for spill files (defaults to the system temp dir)
+    """
+
+    def __init__(self, keys: List[str], aggregations: Optional[List[Dict[str, Any]]] = None,
+                 memory_budget_bytes: int = 256 * 1024 * 1024,
+                 spill_partitions: int = DEFAULT_SPILL_PARTITIONS,
+                 spill_dir: Optional[str] = None):
+        self.keys = list(keys)
+        self.aggregations = normalize_aggregations(aggregations)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_partitions = spill_partitions
+        self.spill_dir = spill_dir
+
+        by_function: Dict[str, set] = {}
+        for agg in self.aggregations:
+            by_function.setdefault(agg["function"], set()).add(agg["column"])
+        self.count_columns = sorted(c for c in by_function.get("count", ()) if c)
+        self.moment_columns = sorted(by_function.get("sum", set()) | by_function.get("mean", set())
+                                     | by_function.get("std", set()))
+        self.min_columns = sorted(by_function.get("min", ()))
+        self.max_columns = sorted(by_function.get("max", ()))
+        self.distinct_columns = sorted(by_function.get("approx_distinct", ()))
+        self.quantile_columns = sorted(by_function.get("approx_quantile", ()))
+
+        self._pending: List[Dict[str, pd.DataFrame]] = []
+        self._state: Optional[Dict[str, pd.DataFrame]] = None
+        self._spill_root: Optional[str] = None
+        self._spill_files = 0
+        self._spilled_bytes = 0
+        self._peak_state_bytes = 0
+        self.rows_in = 0
+        self.chunks_in = 0
+
+    @property
+    def columns(self) -> List[str]:
+        """Input columns the aggregation reads."""
+        needed = list(self.keys)
+        for agg in self.aggregations:
+            if agg["column"] and agg["column"] not in needed:
+                needed.append(agg["column"])
+        return needed
+
+    @property
+    def spilled(self) -> bool:
+        return self._spill_root is not None
+
+    # -- per-chunk partial state ---------------------------------------------
+
+    def _scalar_partial(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        work = chunk[self.keys].copy()
+        work["__rows"] = 1
+        for col in self.count_columns:
+            work[f"{col}|n"] = chunk[col].notna().astype('int64')
+        for col in self.moment_columns:
+            work[f"{col}|x"] = pd.to_numeric(chunk[col], errors='coerce')
+        for col in self.min_columns:
+            work[f"{col}|min"] = chunk[col]
+        for col in self.max_columns:
+            work[f"{col}|max"] = chunk[col]
+
+        grouped = work.groupby(self.keys, dropna=False, sort=False)
+        parts = [grouped[["__rows"] + [f"{c}|n" for c in self.count_columns]].sum()]
+        if self.moment_columns:
+            xs = [f"{c}|x" for c in self.moment_columns]
+            counts = grouped[xs].count()
+            variance = grouped[xs].var(ddof=0).fillna(0.0)
+            parts.append(counts.rename(columns=lambda c: c.replace("|x", "|nn")))
+            parts.append(grouped[xs].sum().rename(columns=lambda c: c.replace("|x", "|sum")))
+            parts.append((variance * counts).rename(columns=lambda c: c.replace("|x", "|m2")))
+        if self.min_columns:
+            parts.append(grouped[[f"{c}|min" for c in self.min_columns]].min())
+        if self.max_columns:
+            parts.append(grouped[[f"{c}|max" for c in self.max_columns]].max())
+        return pd.concat(parts, axis=1).reset_index()
+
+    def _hll_partial(self, chunk: pd.DataFrame, col: str) -> pd.DataFrame:
+        present = chunk[col].notna()
+        hashed = stable_hash(chunk.loc[present, col])
+        registers = (hashed >> np.uint64(_HLL_RANK_BITS)).astype('int64')
+        rest = hashed & np.uint64((1 << _HLL_RANK_BITS) - 1)
+        # Rank = position of the lowest set bit; isolating it keeps log2 exact
+        lowest = rest & (~rest + np.uint64(1))
+        with np.errstate(divide='ignore'):
+            ranks = np.where(rest == 0, _HLL_RANK_BITS + 1, np.log2(lowest.astype('float64')) + 1)
+        work = chunk.loc[present, self.keys].copy()
+        work["__reg"] = registers
+        work["__rank"] = ranks.astype('int8')
+        return (work.groupby(self.keys + ["__reg"], dropna=False, sort=False)["__rank"]
+                .max().reset_index())
+
+    def _quantile_partial(self, chunk: pd.DataFrame, col: str) -> pd.DataFrame:
+        values = pd.to_numeric(chunk[col], errors='coerce')
+        present = values.notna()
+        x = values[present].to_numpy(dtype='float64')
+        magnitude = np.abs(x)
+        with np.errstate(divide='ignore'):
+            index = np.ceil(np.log(np.where(magnitude > 0, magnitude, 1.0)) / _DD_LOG_GAMMA)
+        buckets = np.where(magnitude > 0, np.sign(x) * (index + _DD_OFFSET), 0).astype('int64')
+        work = chunk.loc[present, self.keys].copy()
+        work["__bucket"] = buckets
+        return (work.groupby(self.keys + ["__bucket"], dropna=False, sort=False)
+                .size().rename("__count").reset_index())
+
+    def _partial(self, chunk: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        state = {"scalar": self._scalar_partial(chunk)}
+        for col in self.distinct_columns:
+            state[f"hll:{col}"] = self._hll_partial(chunk, col)
+        for col in self.quantile_columns:
+            state[f"dd:{col}"] = self._quantile_partial(chunk, col)
+        return state
+
+    # -- merging ---------------------------------------------------------------
+
+    def _merge_scalar(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        df = pd.concat(frames, ignore_index=True)
+        if self.moment_columns:
+            grouped = df.groupby(self.keys, dropna=False, sort=False)
+            for col in self.moment_columns:
+                n, total = df[f"{col}|nn"], df[f"{col}|sum"]
+                group_n = grouped[f"{col}|nn"].transform('sum')
+                group_mean = grouped[f"{col}|sum"].transform('sum') / group_n.where(group_n > 0)
+                part_mean = total / n.where(n > 0)
+                # Chan et al.: M2 = sum(M2_i) + sum(n_i * (mean_i - mean)^2)
+                df[f"{col}|m2"] = df[f"{col}|m2"] + (n * (part_mean - group_mean) ** 2).fillna(0.0)
+
+        spec = {c: "sum" for c in df.columns if c == "__rows" or c.endswith(("|n", "|nn", "|sum", "|m2"))}
+        spec.update({c: "min" for c in df.columns if c.endswith("|min")})
+        spec.update({c: "max" for c in df.columns if c.endswith("|max")})
+        return df.groupby(self.keys, dropna=False, sort=False).agg(spec).reset_index()
+
+    def _merge(self, pieces: Dict[str, List[pd.DataFrame]]) -> Dict[str, pd.DataFrame]:
+        """Merge partial states, given as lists of frames per state kind."""
+        merged = {"scalar": self._merge_scalar(pieces["scalar"])}
+        for col in self.distinct_columns:
+            frames = pieces.get(f"hll:{col}")
+            if frames:
+                df = pd.concat(frames, ignore_index=True)
+                merged[f"hll:{col}"] = (df.groupby(self.keys + ["__reg"], dropna=False, sort=False)["__rank"]
+                                        .max().reset_index())
+        for col in self.quantile_columns:
+            frames = pieces.get(f"dd:{col}")
+            if frames:
+                df = pd.concat(frames, ignore_index=True)
+                merged[f"dd:{col}"] = (df.groupby(self.keys + ["__bucket"], dropna=False, sort=False)["__count"]
+                                       .sum().reset_index())
+        return merged
+
+    @staticmethod
+    def _state_bytes(state: Dict[str, pd.DataFrame]) -> int:
+        return int(sum(frame.memory_usage(deep=True).sum() for frame in state.values()))
+
+    # -- spilling --------------------------------------------------------------
+
+    def _spill(self, state: Dict[str, pd.DataFrame]) -> None:
+        """Hash-partition a state on the group keys and append it to the spill files."""
+        if self._spill_root is None:
+            self._spill_root = tempfile.mkdtemp(prefix="visidata_mcp_groupby_", dir=self.spill_dir)
+        for kind, frame in state.items():
+            partitions = key_hash(frame, self.keys) % np.uint64(self.spill_partitions)
+            for partition, part in frame.groupby(partitions, sort=False):
+                directory = os.path.join(self._spill_root, f"p{int(partition):03d}")
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"{self._spill_files:06d}.pkl")
+                pd.to_pickle({kind: part.reset_index(drop=True)}, path)
+                self._spill_files += 1
+                self._spilled_bytes += os.path.getsize(path)
+
+    def _compact(self) -> None:
+        states = ([self._state] if self._state is not None else []) + self._pending
+        self._pending = []
+        if not states:
+            return
+        if len(states) > 1:
+            pieces: Dict[str, List[pd.DataFrame]] = {}
+            for state in states:
+                for kind, frame in state.items():
+                    pieces.setdefault(kind, []).append(frame)
+            merged = self._merge(pieces)
+        else:
+            merged = states[0]
+        size = self._state_bytes(merged)
+        self._peak_state_bytes = max(self._peak_state_bytes, size)
+        if self.spilled or size > self.memory_budget_bytes:
+            self._spill(merged)
+            self._state = None
+        else:
+            self._state = merged
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Fold one chunk into the aggregation state."""
+        if len(chunk) == 0:
+            return
+        self.rows_in += len(chunk)
+        self.chunks_in += 1
+        self._pending.append(self._partial(chunk))
+        if len(self._pending) >= COMPACT_EVERY:
+            self._compact()
+
+    def export_state(self) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        The merged in-memory state, to be folded into another aggregator with add_state.
+
+        Returns:
+            The state, or None if nothing was added or the state was spilled to disk
+        """
+        self._compact()
+        return None if self.spilled else self._state
+
+    def add_state(self, state: Dict[str, pd.DataFrame], rows: int = 0, chunks: int = 0) -> None:
+        """Fold in a state exported by an aggregator with the same keys and aggregations."""
+        self.rows_in += rows
+        self.chunks_in += chunks
+        self._pending.append(state)
+        if len(self._pending) >= COMPACT_EVERY:
+            self._compact()
+
+    # -- results ---------------------------------------------------------------
+
+    def _finalize(self, state: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        scalar = state["scalar"]
+        out = scalar[self.keys].copy()
+        for agg in self.aggregations:
+            col, function, name = agg["column"], agg["function"], agg["as"]
+            if function == "count":
+                out[name] = scalar[f"{col}|n"] if col else scalar["__rows"]
+            elif function == "sum":
+                out[name] = scalar[f"{col}|sum"]
+            elif function == "mean":
+                out[name] = scalar[f"{col}|sum"] / scalar[f"{col}|nn"].where(scalar[f"{col}|nn"] > 0)
+            elif function == "std":
+                n = scalar[f"{col}|nn"]
+                out[name] = np.sqrt(scalar[f"{col}|m2"] / (n - 1).where(n > 1))
+            elif function in ("min", "max"):
+                out[name] = scalar[f"{col}|{function}"]
+            elif function == "approx_distinct":
+                hll = state.get(f"hll:{col}")
+                if hll is None:
+                    out[name] = 0
+                    continue
+                out = out.merge(self._distinct_estimate(hll, name), on=self.keys, how="left")
+                out[name] = out[name].fillna(0).astype('int64')
+            else:
+                sketch = state.get(f"dd:{col}")
+                if sketch is None:
+                    out[name] = np.nan
+                    continue
+                out = out.merge(self._quantile_estimate(sketch, agg["quantile"], name), on=self.keys, how="left")
+        return out
+
+    def _distinct_estimate(self, hll: pd.DataFrame, name: str) -> pd.DataFrame:
+        work = hll.assign(__inv=np.power(2.0, -hll["__rank"].astype('float64')))
+        grouped = work.groupby(self.keys, dropna=False, sort=False)
+        present = grouped["__reg"].count()
+        zeros = _HLL_REGISTERS - present
+        raw = _HLL_ALPHA * _HLL_REGISTERS ** 2 / (grouped["__inv"].sum() + zeros)
+        # Small-range correction (linear counting) while registers are still empty
+        small = (raw <= 2.5 * _HLL_REGISTERS) & (zeros > 0)
+        linear = _HLL_REGISTERS * np.log(_HLL_REGISTERS / zeros.where(zeros > 0, 1))
+        estimate = raw.where(~small, linear).round().astype('int64')
+        return estimate.rename(name).reset_index()
+
+    def _quantile_estimate(self, sketch: pd.DataFrame, quantile: float, name: str) -> pd.DataFrame:
+        buckets = sketch["__bucket"].to_numpy()
+        magnitude = np.power(_DD_GAMMA, np.abs(buckets) - _DD_OFFSET) * 2 / (_DD_GAMMA + 1)
+        work = sketch.assign(__value=np.where(buckets == 0, 0.0, np.sign(buckets) * magnitude))
+        work = work.sort_values(self.keys + ["__value"], kind='mergesort')
+        grouped = work.groupby(self.keys, dropna=False, sort=False)["__count"]
+        cumulative = grouped.cumsum()
+        target = quantile * (grouped.transform('sum') - 1)
+        hits = work[cumulative > target]
+        return (hits.groupby(self.keys, dropna=False, sort=False)["__value"].first()
+                .rename(name).reset_index())
+
+    def _empty_result(self) -> pd.DataFrame:
+        return pd.DataFrame(columns=self.keys + [a["as"] for a in self.aggregations])
+
+    def iter_results(self) -> Iterator[pd.DataFrame]:
+        """
+        Yield finalized groups.
+
+        In memory this is a single frame sorted by the keys; after a spill it is
+        one frame per hash partition, each sorted by the keys.
+        """
+        self._compact()
+        if not self.spilled:
+            if self._state is None:
+                yield self._empty_result()
+                return
+            yield self._finalize(self._state).sort_values(self.keys, kind='mergesort').reset_index(drop=True)
+            return
+
+        for directory in sorted(os.listdir(self._spill_root)):
+            path = os.path.join(self._spill_root, directory)
+            pieces: Dict[str, List[pd.DataFrame]] = {}
+            for name in sorted(os.listdir(path)):
+                for kind, frame in pd.read_pickle(os.path.join(path, name)).items():
+                    pieces.setdefault(kind, []).append(frame)
+            result = self._finalize(self._merge(pieces))
+            yield result.sort_values(self.keys, kind='mergesort').reset_index(drop=True)
+
+    def result(self) -> pd.DataFrame:
+        """All groups as one DataFrame sorted by the keys."""
+        frames = list(self.iter_results())
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True).sort_values(self.keys, kind='mergesort').reset_index(drop=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Describe how the aggregation ran."""
+        return {
+            "strategy": "spilled_hash_partitions" if self.spilled else "in_memory_hash",
+            "rows_aggregated": self.rows_in,
+            "chunks": self.chunks_in,
+            "peak_state_bytes": self._peak_state_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "spill_partitions": self.spill_partitions if self.spilled else 0,
+            "spilled_bytes": self._spilled_bytes,
+        }
+
+    def close(self) -> None:
+        """Remove any spill files."""
+        if self._spill_root is not None:
+            shutil.rmtree(self._spill_root, ignore_errors=True)
+            self._spill_root = None
+
+    def __enter__(self) -> "HashAggregator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def aggregate_partition(partition: Partition, keys: List[str], aggregations: List[Dict[str, Any]],
+                        memory_budget_bytes: int, sheet: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Worker task: aggregate one partition of a partitioned dataset.
+
+    Returns:
+        {"state", "spilled", "rows", "chunks"}; state is None when the partition
+        was empty or outgrew the memory budget (the caller then aggregates it itself)
+    """
+    with HashAggregator(keys, aggregations, memory_budget_bytes=memory_budget_bytes) as aggregator:
+        for chunk in iter_partition_chunks(partition, columns=aggregator.columns, sheet=sheet):
+            aggregator.add(chunk)
+        state = aggregator.export_state()
+        return {"state": state, "spilled": aggregator.spilled, "rows": aggregator.rows_in,
+                "chunks": aggregator.chunks_in}
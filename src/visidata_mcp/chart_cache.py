@@ -0,0 +1,149 @@
+"""
+Content-addressed cache for rendered charts.
+
+A chart is identified by a hash of the input file's fingerprint, the tool that
+drew it and its parameters. When the same chart is requested again the cached
+image is copied to the new output path instead of reloading and re-rendering
+the data. The cache is bounded in size; the least recently used entries are
+evicted first.
+
+Configuration (environment variables):
+    VISIDATA_MCP_CACHE_DIR: cache root (default: ~/.cache/visidata-mcp)
+    VISIDATA_MCP_CHART_CACHE_MB: size limit in MB, 0 disables the cache (default: 512)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .loaders import cache_root, file_fingerprint
+from .metrics import record_cache
+
+DEFAULT_CACHE_MB = 512
+# Bumped when a cached chart or its result would be drawn differently
+CACHE_VERSION = 2
+
+
+class ChartCache:
+    """
+    Size-bounded store of rendered chart images and their tool results.
+
+    Args:
+        directory: Where cached images are kept
+        max_bytes: Total size limit; 0 disables caching
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def key(self, file_path: str, tool: str, params: Dict[str, Any]) -> str:
+        """Hash the file fingerprint, tool name and chart parameters."""
+        payload = {"file": file_fingerprint(file_path), "tool": tool, "params": params, "version": CACHE_VERSION}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _paths(self, key: str, suffix: str):
+        base = os.path.join(self.directory, key[:2], key)
+        return base + suffix, base + ".json"
+
+    def fetch(self, key: str, output_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Copy a cached chart to output_path.
+
+        Returns:
+            The original tool result updated for the new output path, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        image_path, meta_path = self._paths(key, Path(output_path).suffix.lower())
+        try:
+            with open(meta_path) as f:
+                result = json.load(f)
+            shutil.copyfile(image_path, output_path)
+            # Touch the entry so eviction sees it as recently used
+            now = time.time()
+            os.utime(image_path, (now, now))
+        except (OSError, ValueError):
+            record_cache("chart", False)
+            return None
+        record_cache("chart", True)
+        result["output_file"] = output_path
+        result["file_size"] = Path(output_path).stat().st_size
+        result["cache_hit"] = True
+        return result
+
+    def store(self, key: str, output_path: str, result: Dict[str, Any]) -> None:
+        """Save a freshly rendered chart and its tool result, then enforce the size limit."""
+        if not self.enabled or not Path(output_path).exists():
+            return
+        image_path, meta_path = self._paths(key, Path(output_path).suffix.lower())
+        try:
+            os.makedirs(os.path.dirname(image_path), exist_ok=True)
+            # Write to temp files first so concurrent readers never see partial entries
+            for target, writer in ((image_path, lambda tmp: shutil.copyfile(output_path, tmp)),
+                                   (meta_path, lambda tmp: Path(tmp).write_text(json.dumps(result)))):
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target))
+                os.close(fd)
+                writer(tmp)
+                os.replace(tmp, target)
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self) -> int:
+        """
+        Delete least recently used entries until the cache fits its size limit.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".json"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                for victim in (path, os.path.splitext(path)[0] + ".json"):
+                    try:
+                        os.remove(victim)
+                    except OSError:
+                        pass
+                total -= size
+                removed += 1
+            return removed
+
+
+_default_cache: Optional[ChartCache] = None
+
+
+def get_chart_cache() -> ChartCache:
+    """The process-wide chart cache, configured from the environment."""
+    global _default_cache
+    if _default_cache is None:
+        megabytes = float(os.environ.get("VISIDATA_MCP_CHART_CACHE_MB", DEFAULT_CACHE_MB))
+        _default_cache = ChartCache(os.path.join(cache_root(), "charts"), int(megabytes * 1024 * 1024))
+    return _default_cache
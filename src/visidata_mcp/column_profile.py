@@ -0,0 +1,398 @@
+"""
+Streaming column profiles behind analyze_data and get_column_stats.
+
+When a file is too large to load (see memory_guard.py), its columns are
+profiled chunk by chunk. Every accumulator can also be merged with another
+one, so profiles of separate parts of a file combine into the profile of the
+whole:
+
+- counts of values and missing values, and the first values seen
+- min, max, mean and variance (Chan et al.'s pairwise update, which stays
+  accurate where the textbook sum-of-squares formula cancels)
+- value counts for distinct and most common values; beyond
+  MAX_TRACKED_VALUES distinct values only the most frequent are kept, so
+  the counts of rarer values become approximate
+- a K-minimum-values sketch of the hashed values, which estimates the
+  distinct count once the value counts are truncated (about 1.5% error)
+- a DDSketch of the numbers: logarithmic buckets that answer any quantile
+  within QUANTILE_ACCURACY relative error, whatever the number of rows
+
+Profiles can be saved as JSON-ready state (to_state / from_state), which is
+how incremental.py carries them from one analysis of a growing file to the next.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .loaders import iter_chunks, read_columns
+from .serialization import column_values
+
+MAX_TRACKED_VALUES = 100_000
+SAMPLE_VALUES = 10
+KMV_SIZE = 4096
+QUANTILE_ACCURACY = 0.01
+# Numbers smaller than this in magnitude count as zero in the quantile sketch
+MIN_QUANTILE_MAGNITUDE = 1e-12
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch (DDSketch) of a stream of numbers."""
+
+    def __init__(self, relative_accuracy: float = QUANTILE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _add_buckets(self, buckets: Dict[int, int], magnitudes: np.ndarray) -> None:
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype('int64'),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            buckets[key] = buckets.get(key, 0) + count
+
+    def add(self, values: np.ndarray) -> None:
+        """Add finite numbers."""
+        positive = values > MIN_QUANTILE_MAGNITUDE
+        negative = values < -MIN_QUANTILE_MAGNITUDE
+        self._add_buckets(self.positive, values[positive])
+        self._add_buckets(self.negative, -values[negative])
+        self.zeros += int(len(values) - positive.sum() - negative.sum())
+        self.count += len(values)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for buckets, others in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in others.items():
+                buckets[key] = buckets.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-ready state, restored by from_state."""
+        return {"gamma": self.gamma, "positive": sorted(self.positive.items()),
+                "negative": sorted(self.negative.items()), "zeros": self.zeros, "count": self.count}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls()
+        sketch.gamma = state["gamma"]
+        sketch._log_gamma = math.log(sketch.gamma)
+        sketch.positive = {int(key): int(count) for key, count in state["positive"]}
+        sketch.negative = {int(key): int(count) for key, count in state["negative"]}
+        sketch.zeros = state["zeros"]
+        sketch.count = state["count"]
+        return sketch
+
+    def _value(self, key: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(key-1), gamma^key]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def buckets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Representative value and count of every non-empty bucket, in ascending order."""
+        negative = sorted(self.negative, reverse=True)
+        positive = sorted(self.positive)
+        zeros = [0.0] if self.zeros else []
+        values = [-self._value(key) for key in negative] + zeros + [self._value(key) for key in positive]
+        counts = ([self.negative[key] for key in negative] + ([self.zeros] if self.zeros else [])
+                  + [self.positive[key] for key in positive])
+        return np.array(values, dtype='float64'), np.array(counts, dtype='int64')
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The q-quantile (0 <= q <= 1), or None if no numbers were added."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive))
+
+
+class ColumnProfile:
+    """Mergeable summary of one column, built from chunks of its values."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.dtypes: List[str] = []
+        self.numeric = True
+        # Numbers: count, min, max, mean and sum of squared deviations (M2)
+        self.numbers = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.quantiles = QuantileSketch()
+        self.samples: Optional[pd.Series] = None
+        self.truncated = False
+        self._counts: Optional[pd.Series] = None
+        self._pending: List[pd.Series] = []
+        self._pending_size = 0
+        self._hashes = np.empty(0, dtype='uint64')
+
+    # -- accumulation ------------------------------------------------------------
+
+    def add(self, values: pd.Series) -> None:
+        """Accumulate a chunk of the column."""
+        present = values.dropna()
+        self.count += len(values)
+        self.nulls += len(values) - len(present)
+        if present.empty:
+            # An all-missing chunk is parsed as float64 whatever the column holds
+            return
+        dtype = str(values.dtype)
+        if dtype not in self.dtypes:
+            self.dtypes.append(dtype)
+        if self.numeric and pd.api.types.is_numeric_dtype(values):
+            numbers = present.to_numpy(dtype='float64')
+            self._add_moments(len(numbers), float(numbers.min()), float(numbers.max()),
+                              float(numbers.mean()), float(((numbers - numbers.mean()) ** 2).sum()))
+            finite = numbers[np.isfinite(numbers)]
+            self.quantiles.add(finite)
+        else:
+            self.numeric = False
+        if self.samples is None or len(self.samples) < SAMPLE_VALUES:
+            head = present.head(SAMPLE_VALUES)
+            self.samples = head if self.samples is None else pd.concat([self.samples, head]).head(SAMPLE_VALUES)
+        self._add_counts(present.value_counts(sort=False))
+        self._add_hashes(pd.util.hash_pandas_object(present, index=False).to_numpy())
+
+    def _add_moments(self, n: int, low: float, high: float, mean: float, m2: float) -> None:
+        total = self.numbers + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.numbers * n / total
+        self.numbers = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    def _add_counts(self, counts: pd.Series) -> None:
+        self._pending.append(counts)
+        self._pending_size += len(counts)
+        # Merge once the pending counts outgrow the merged ones, so merging stays linear overall
+        if self._pending_size > max(len(self._counts) if self._counts is not None else 0, MAX_TRACKED_VALUES):
+            self._merge_counts()
+
+    def _merge_counts(self) -> None:
+        if not self._pending:
+            return
+        parts = ([self._counts] if self._counts is not None else []) + self._pending
+        merged = pd.concat(parts).groupby(level=0, sort=False).sum()
+        if len(merged) > MAX_TRACKED_VALUES:
+            merged = merged.sort_values(ascending=False, kind='stable').head(MAX_TRACKED_VALUES)
+            self.truncated = True
+        self._counts = merged
+        self._pending = []
+        self._pending_size = 0
+
+    def _add_hashes(self, hashes: np.ndarray) -> None:
+        if len(self._hashes) == KMV_SIZE:
+            hashes = hashes[hashes < self._hashes[-1]]
+        self._hashes = np.unique(np.concatenate([self._hashes, hashes]))[:KMV_SIZE]
+
+    def merge(self, other: "ColumnProfile") -> None:
+        """Fold in the profile of the same column over other rows (which come after these)."""
+        self.count += other.count
+        self.nulls += other.nulls
+        self.dtypes += [dtype for dtype in other.dtypes if dtype not in self.dtypes]
+        self.numeric = self.numeric and other.numeric
+        if other.numbers:
+            self._add_moments(other.numbers, other.min, other.max, other.mean, other.m2)
+        self.quantiles.merge(other.quantiles)
+        if other.samples is not None:
+            self.samples = other.samples if self.samples is None else \
+                pd.concat([self.samples, other.samples]).head(SAMPLE_VALUES)
+        other._merge_counts()
+        if other._counts is not None:
+            self._add_counts(other._counts)
+        self.truncated = self.truncated or other.truncated
+        self._add_hashes(other._hashes)
+
+    # -- persistence -------------------------------------------------------------
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-ready state, restored by from_state."""
+        self._merge_counts()
+        counts = self._counts if self._counts is not None else pd.Series(dtype='int64')
+        return {
+            "name": self.name,
+            "count": self.count,
+            "nulls": self.nulls,
+            "dtypes": self.dtypes,
+            "numeric": self.numeric,
+            "numbers": self.numbers,
+            "min": self.min if self.numbers else None,
+            "max": self.max if self.numbers else None,
+            "mean": self.mean,
+            "m2": self.m2,
+            "quantiles": self.quantiles.to_state(),
+            "samples": _series_state(self.samples) if self.samples is not None else None,
+            "values": _series_state(counts.index.to_series()),
+            "counts": counts.tolist(),
+            "truncated": self.truncated,
+            "hashes": self._hashes.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ColumnProfile":
+        profile = cls(state["name"])
+        for name in ("count", "nulls", "dtypes", "numeric", "numbers", "mean", "m2", "truncated"):
+            setattr(profile, name, state[name])
+        if state["numbers"]:
+            profile.min, profile.max = state["min"], state["max"]
+        profile.quantiles = QuantileSketch.from_state(state["quantiles"])
+        if state["samples"] is not None:
+            profile.samples = _restore_series(state["samples"])
+        if state["counts"]:
+            profile._counts = pd.Series(state["counts"], index=pd.Index(_restore_series(state["values"])),
+                                        dtype='int64')
+        profile._hashes = np.array(state["hashes"], dtype='uint64')
+        return profile
+
+    # -- results -----------------------------------------------------------------
+
+    @property
+    def value_counts(self) -> pd.Series:
+        """Counts of the non-missing values, most common first."""
+        self._merge_counts()
+        if self._counts is None:
+            return pd.Series(dtype='int64')
+        return self._counts.sort_values(ascending=False, kind='stable')
+
+    @property
+    def dtype(self) -> str:
+        """The type the column would have if the file were loaded at once."""
+        if not self.dtypes:
+            return 'float64'
+        if len(self.dtypes) == 1:
+            return self.dtypes[0]
+        if self.numeric:
+            try:
+                return str(np.result_type(*self.dtypes))
+            except TypeError:
+                pass
+        return 'object'
+
+    @property
+    def distinct(self) -> int:
+        if not self.truncated:
+            self._merge_counts()
+            return len(self._counts) if self._counts is not None else 0
+        # K minimum values: the k-th smallest of n uniform hashes is about k / n of the hash range
+        if len(self._hashes) < KMV_SIZE:
+            return len(self._hashes)
+        return int((KMV_SIZE - 1) * 2.0 ** 64 / float(self._hashes[-1]))
+
+    def _numeric_stats(self) -> Dict[str, Optional[float]]:
+        if not self.numbers:
+            return {"min": None, "max": None, "mean": None}
+        return {"min": self.min, "max": self.max, "mean": self.mean}
+
+    def analysis(self) -> Dict[str, Any]:
+        """The column's entry of analyze_data."""
+        info: Dict[str, Any] = {
+            "name": self.name,
+            "type": self.dtype,
+            "null_count": self.nulls,
+            "non_null_count": self.count - self.nulls,
+            "sample_values": column_values(self.samples.head(5)) if self.samples is not None else [],
+        }
+        if self.numeric and self.dtypes:
+            info.update(self._numeric_stats())
+            info["unique_count"] = self.distinct
+        else:
+            info["unique_count"] = self.distinct
+            info["most_common"] = list(self.value_counts.head(3).index)
+        if self.truncated:
+            info["approximate"] = ["unique_count"] if self.numeric else ["unique_count", "most_common"]
+        return info
+
+    def stats(self) -> Dict[str, Any]:
+        """The response of get_column_stats; median and quartiles come from the quantile sketch."""
+        stats: Dict[str, Any] = {
+            "column": self.name,
+            "type": self.dtype,
+            "total_values": self.count,
+            "non_null_values": self.count - self.nulls,
+            "null_count": self.nulls,
+            "unique_values": self.distinct,
+        }
+        samples = self.samples if self.samples is not None else pd.Series(dtype=object)
+        stats["sample_values"] = [value.item() if hasattr(value, 'item') else str(value) for value in samples]
+        approximate = ["unique_values"] if self.truncated else []
+        if self.numeric and self.dtypes:
+            if self.numbers:
+                stats.update(self._numeric_stats())
+                stats["median"] = self._quantile(0.5)
+                stats["std"] = math.sqrt(self.m2 / (self.numbers - 1)) if self.numbers > 1 else None
+                stats["quartiles"] = {"25%": self._quantile(0.25), "50%": stats["median"],
+                                      "75%": self._quantile(0.75)}
+                approximate += ["median", "quartiles"]
+        else:
+            stats["most_common"] = [
+                {"value": str(value), "count": int(count), "percentage": round(count / self.count * 100, 2)}
+                for value, count in self.value_counts.head(10).items()
+            ]
+            if self.truncated:
+                approximate.append("most_common")
+        if approximate:
+            stats["approximate"] = approximate
+        return stats
+
+    def _quantile(self, q: float) -> Optional[float]:
+        value = self.quantiles.quantile(q)
+        # The sketch answers within its relative accuracy; keep answers inside the observed range
+        return None if value is None else min(max(value, self.min), self.max)
+
+
+def _series_state(series: pd.Series) -> Dict[str, Any]:
+    return {"dtype": str(series.dtype), "values": column_values(series)}
+
+
+def _restore_series(state: Dict[str, Any]) -> pd.Series:
+    try:
+        return pd.Series(state["values"], dtype=state["dtype"])
+    except (TypeError, ValueError):
+        return pd.Series(state["values"], dtype=object)
+
+
+def profile_chunks(chunks: Any, columns: Optional[List[str]] = None) -> Tuple[int, List[ColumnProfile]]:
+    """Profile the columns of a sequence of DataFrame chunks; returns the row count and the profiles."""
+    rows = 0
+    profiles = [ColumnProfile(name) for name in columns] if columns is not None else None
+    for chunk in chunks:
+        if profiles is None:
+            profiles = [ColumnProfile(name) for name in chunk.columns]
+        for profile in profiles:
+            profile.add(chunk[profile.name])
+        rows += len(chunk)
+    return rows, profiles or []
+
+
+def profile_file(file_path: str, columns: Optional[List[str]] = None) -> Tuple[int, List[ColumnProfile]]:
+    """
+    Profile columns of a file, streaming it once.
+
+    Args:
+        file_path: Path to the data file
+        columns: Columns to profile (default: all)
+
+    Returns:
+        The row count and one profile per column, in file order
+    """
+    names = columns if columns is not None else read_columns(file_path)
+    return profile_chunks(iter_chunks(file_path, columns=columns), names)
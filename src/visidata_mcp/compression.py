@@ -0,0 +1,207 @@
+"""
+Transparent compression for data files.
+
+Compressed inputs are recognised by a compression suffix after the format
+suffix (``jobs.csv.gz``, ``events.jsonl.bz2``) or, failing that, by their
+magic bytes, and are decompressed while they are read, so the chunked readers
+stream them like plain files. Decompression runs in a background thread that
+stays a few blocks ahead of the parser; zlib, bz2, lzma and zstandard release
+the GIL while they work, so decompressing and parsing run on separate cores.
+
+Outputs are compressed when their path ends in a compression suffix. zstd
+output is compressed with one worker thread per core.
+
+gzip, bz2 and xz use the standard library; zstd needs the zstandard package
+(``pip install visidata-mcp[fast]``).
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional, Union
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+SUFFIXES = {'.gz': 'gzip', '.gzip': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd', '.zstd': 'zstd'}
+MAGIC_BYTES = [(b'\x1f\x8b', 'gzip'), (b'BZh', 'bz2'), (b'\xfd7zXZ\x00', 'xz'), (b'\x28\xb5\x2f\xfd', 'zstd')]
+
+# Size of the decompressed blocks handed from the background thread, and how many may wait
+READ_SIZE = 1024 * 1024
+READ_AHEAD_BLOCKS = 8
+
+
+def compression_from_suffix(file_path: str) -> Optional[str]:
+    """Codec named by the path's last suffix, if any."""
+    return SUFFIXES.get(Path(file_path).suffix.lower())
+
+
+def strip_compression(file_path: str) -> str:
+    """The path without its compression suffix: ``jobs.csv.gz`` -> ``jobs.csv``."""
+    if compression_from_suffix(file_path) is None:
+        return file_path
+    return str(Path(file_path).with_suffix(''))
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    Work out how a file is compressed.
+
+    Returns:
+        "gzip", "bz2", "xz", "zstd", or None for an uncompressed file
+    """
+    codec = compression_from_suffix(file_path)
+    if codec is not None:
+        return codec
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(6)
+    except OSError:
+        return None
+    for magic, codec in MAGIC_BYTES:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def _require_zstd() -> None:
+    if not ZSTD_AVAILABLE:
+        raise ValueError("zstd files need the zstandard package: pip install visidata-mcp[fast]")
+
+
+def _open_decompressed(file_path: str, codec: str) -> IO[bytes]:
+    if codec == 'gzip':
+        return gzip.open(file_path, 'rb')
+    if codec == 'bz2':
+        return bz2.open(file_path, 'rb')
+    if codec == 'xz':
+        return lzma.open(file_path, 'rb')
+    _require_zstd()
+    return zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), read_size=READ_SIZE,
+                                                      closefd=True)
+
+
+class ReadAheadStream(io.RawIOBase):
+    """
+    Read a stream in a background thread, a bounded number of blocks ahead.
+
+    Args:
+        source: Binary stream to read, e.g. a decompressing file object
+    """
+
+    def __init__(self, source: IO[bytes]):
+        super().__init__()
+        self._source = source
+        self._blocks: "queue.Queue[Union[bytes, BaseException]]" = queue.Queue(READ_AHEAD_BLOCKS)
+        self._stop = threading.Event()
+        self._block = memoryview(b"")
+        self._finished = False
+        self._thread = threading.Thread(target=self._fill, name="visidata-mcp-decompress", daemon=True)
+        self._thread.start()
+
+    def _put(self, item: Union[bytes, BaseException]) -> None:
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _fill(self) -> None:
+        try:
+            while not self._stop.is_set():
+                block = self._source.read(READ_SIZE)
+                self._put(block)
+                if not block:
+                    return
+        except BaseException as e:  # handed to the reading thread
+            self._put(e)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._block and not self._finished:
+            item = self._blocks.get()
+            if isinstance(item, BaseException):
+                raise item
+            self._finished = not item
+            self._block = memoryview(item)
+        count = min(len(buffer), len(self._block))
+        buffer[:count] = self._block[:count]
+        self._block = self._block[count:]
+        return count
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._source.close()
+        super().close()
+
+
+def open_input(file_path: str, codec: Optional[str] = None) -> IO[bytes]:
+    """
+    Open a data file for binary reading, decompressing it if needed.
+
+    Args:
+        file_path: Path to the data file
+        codec: Compression codec (default: detected)
+    """
+    codec = codec or detect_compression(file_path)
+    if codec is None:
+        return open(file_path, 'rb')
+    return io.BufferedReader(ReadAheadStream(_open_decompressed(file_path, codec)), READ_SIZE)
+
+
+def open_input_text(file_path: str) -> IO[str]:
+    """Open a data file for UTF-8 text reading, decompressing it if needed."""
+    if detect_compression(file_path) is None:
+        return open(file_path, encoding='utf-8')
+    return io.TextIOWrapper(open_input(file_path), encoding='utf-8')
+
+
+@contextmanager
+def input_source(file_path: str) -> Iterator[Union[str, IO[bytes]]]:
+    """
+    What to hand to a pandas reader: the path itself for plain files, or a
+    decompressing stream that is closed when the block exits.
+    """
+    codec = detect_compression(file_path)
+    if codec is None:
+        yield file_path
+        return
+    with open_input(file_path, codec) as stream:
+        yield stream
+
+
+def open_output(output_path: str) -> IO[bytes]:
+    """Open an output file for binary writing, compressing it if its suffix says so."""
+    codec = compression_from_suffix(output_path)
+    if codec == 'gzip':
+        return gzip.open(output_path, 'wb', compresslevel=6)
+    if codec == 'bz2':
+        return bz2.open(output_path, 'wb')
+    if codec == 'xz':
+        return lzma.open(output_path, 'wb')
+    if codec == 'zstd':
+        _require_zstd()
+        # threads=-1 uses one compression worker per core
+        compressor = zstandard.ZstdCompressor(level=3, threads=-1)
+        return compressor.stream_writer(open(output_path, 'wb'), closefd=True)
+    return open(output_path, 'wb')
+
+
+def open_output_text(output_path: str) -> IO[str]:
+    """Open an output file for UTF-8 text writing, compressing it if its suffix says so."""
+    if compression_from_suffix(output_path) is None:
+        return open(output_path, 'w', encoding='utf-8', newline='')
+    return io.TextIOWrapper(open_output(output_path), encoding='utf-8', newline='')
@@ -0,0 +1,133 @@
+"""
+Streaming Pearson correlation matrices.
+
+The file is read in chunks and, for every pair of columns, the accumulator
+keeps the count, sums, sums of squares and cross-products over the rows where
+both values are present (pairwise-complete, like ``DataFrame.corr()``). Each
+chunk costs a handful of matrix products, and the state is a few k x k
+arrays, so memory depends on the number of columns rather than rows.
+
+Values are shifted by an estimate of each column's mean before accumulating,
+which keeps the sums small and avoids the cancellation that makes the naive
+one-pass formula inaccurate.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .loaders import iter_chunks, numeric_columns
+
+PRECISIONS = {"float64": np.float64, "float32": np.float32}
+MIN_CHUNK_ROWS = 1_000
+MAX_CHUNK_ROWS = 1_000_000
+
+
+class CorrelationAccumulator:
+    """
+    Pairwise-complete co-moment sums for a fixed list of columns.
+
+    Args:
+        columns: Columns to correlate
+        precision: "float64" or "float32"; float32 halves the per-chunk working set.
+            Totals across chunks are always kept in float64.
+    """
+
+    def __init__(self, columns: List[str], precision: str = "float64"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}'. Use: {', '.join(PRECISIONS)}")
+        self.columns = list(columns)
+        self.dtype = PRECISIONS[precision]
+        k = len(self.columns)
+        self.rows = 0
+        self.shift: Optional[np.ndarray] = None
+        # For pair (i, j): n = rows where both present, sx/sxx = sums of column i over those rows
+        self.n = np.zeros((k, k))
+        self.sx = np.zeros((k, k))
+        self.sxx = np.zeros((k, k))
+        self.sxy = np.zeros((k, k))
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Accumulate a chunk; values that are not numeric count as missing."""
+        if chunk.empty:
+            return
+        values = chunk[self.columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=self.dtype)
+        present = ~np.isnan(values)
+        if self.shift is None:
+            with np.errstate(invalid='ignore'):
+                shift = np.nanmean(values, axis=0) if present.any() else np.zeros(values.shape[1])
+            self.shift = np.nan_to_num(shift).astype(self.dtype)
+
+        centered = np.where(present, values - self.shift, 0).astype(self.dtype, copy=False)
+        squared = centered * centered
+        self.rows += len(values)
+        self.sxy += centered.T @ centered
+        if present.all():
+            # No missing values: every pair sees every row
+            self.n += len(values)
+            self.sx += centered.sum(axis=0, dtype=np.float64)[:, None]
+            self.sxx += squared.sum(axis=0, dtype=np.float64)[:, None]
+        else:
+            mask = present.astype(self.dtype)
+            self.n += mask.T @ mask
+            self.sx += centered.T @ mask
+            self.sxx += squared.T @ mask
+
+    def matrix(self) -> pd.DataFrame:
+        """The correlation matrix; pairs with no variance or fewer than 2 rows are NaN."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            n = np.where(self.n > 0, self.n, np.nan)
+            cov = self.sxy - self.sx * self.sx.T / n
+            var_x = self.sxx - self.sx ** 2 / n
+            var_y = var_x.T
+            corr = cov / np.sqrt(var_x * var_y)
+        corr[(self.n < 2) | ~(var_x > 0) | ~(var_y > 0)] = np.nan
+        corr = np.clip(corr, -1.0, 1.0)
+        diagonal = np.diag_indices_from(corr)
+        corr[diagonal] = np.where(np.isnan(corr[diagonal]), np.nan, 1.0)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def pair_counts(self) -> pd.DataFrame:
+        """Number of rows used for each pair."""
+        return pd.DataFrame(self.n.astype('int64'), index=self.columns, columns=self.columns)
+
+
+def chunk_rows_for(column_count: int, memory_budget_bytes: int) -> int:
+    """Rows per chunk so the parsed chunk and its working copies fit the budget."""
+    # Parsed float64 values, the cast values, centered and squared copies and the mask
+    per_row = max(column_count, 1) * 40
+    return max(MIN_CHUNK_ROWS, min(MAX_CHUNK_ROWS, memory_budget_bytes // per_row))
+
+
+def stream_correlation(file_path: str, columns: Optional[List[str]] = None,
+                       precision: str = "float64",
+                       memory_budget_bytes: int = 256 * 1024 * 1024) -> CorrelationAccumulator:
+    """
+    Compute a correlation matrix in one streaming pass over a file.
+
+    Args:
+        file_path: Path to the data file
+        columns: Optional columns to correlate (non-numeric ones are skipped)
+        precision: "float64" or "float32"
+        memory_budget_bytes: Approximate working memory for each chunk
+
+    Returns:
+        The filled accumulator
+    """
+    selected = numeric_columns(file_path, columns)
+    accumulator = CorrelationAccumulator(selected, precision)
+    if not selected:
+        return accumulator
+    chunksize = chunk_rows_for(len(selected), memory_budget_bytes)
+    for chunk in iter_chunks(file_path, columns=selected, chunksize=chunksize):
+        accumulator.add(chunk)
+    return accumulator
+
+
+def matrix_to_records(matrix: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Nested {column: {column: value}} mapping with NaN as None."""
+    return {
+        row: {col: (None if pd.isna(value) else round(float(value), 6)) for col, value in values.items()}
+        for row, values in matrix.to_dict(orient='index').items()
+    }
@@ -0,0 +1,189 @@
+"""
+Registry of loaded datasets, served page by page as MCP resources.
+
+load_data registers a file and returns its dataset id; clients then read the
+schema and bounded row pages through resource URIs instead of receiving one
+large JSON response:
+
+    visidata://dataset/{id}/schema
+    visidata://dataset/{id}/rows/{start}-{end}     (end is exclusive)
+
+Ids are derived from the file's absolute path, so loading the same file again
+returns the same id. When the file changes the entry is refreshed on the next
+read. Uncompressed CSV, TSV and JSON Lines pages are read through the file's
+row index and SQLite pages with LIMIT/OFFSET; other files are loaded once and
+kept in a small in-memory cache, unless they exceed the memory budget (see
+memory_guard.py), in which case pages are streamed from the file.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .loaders import SCHEMA_SAMPLE_ROWS, detect_format, file_fingerprint, iter_chunks, read_frame, sample_frame
+from .memory_guard import estimate_load
+from .metrics import record_cache
+from .row_index import get_row_index, is_indexable
+from .sqlite_source import SqliteQuery
+
+MAX_PAGE_ROWS = 10_000
+FRAME_CACHE_ENTRIES = 4
+
+
+class Dataset:
+    """A registered file and its schema."""
+
+    def __init__(self, dataset_id: str, file_path: str, file_type: Optional[str] = None):
+        self.dataset_id = dataset_id
+        self.file_path = os.path.abspath(file_path)
+        self.format = detect_format(file_path, file_type)
+        self.fingerprint: Optional[Dict[str, Any]] = None
+        self.columns: List[str] = []
+        self.column_types: List[str] = []
+        self.total_rows = 0
+        self.streamed = False
+        self.refresh()
+
+    @property
+    def indexed(self) -> bool:
+        return is_indexable(self.file_path, self.format)
+
+    def refresh(self) -> None:
+        """Re-read the schema and row count if the file changed since the last look."""
+        fingerprint = file_fingerprint(self.file_path)
+        if fingerprint == self.fingerprint:
+            return
+        self.fingerprint = fingerprint
+        self.streamed = False
+        if self.indexed:
+            sample = sample_frame(self.file_path, SCHEMA_SAMPLE_ROWS, file_type=self.format)
+            self.total_rows = get_row_index(self.file_path, file_type=self.format).total_rows
+        elif self.format == 'sqlite':
+            sample = sample_frame(self.file_path, SCHEMA_SAMPLE_ROWS, file_type=self.format)
+            self.total_rows = SqliteQuery(self.file_path).count()
+        elif not estimate_load(self.file_path, file_type=self.format).fits:
+            # Too big to keep in memory: count the rows reading one column, stream the pages
+            self.streamed = True
+            sample = sample_frame(self.file_path, SCHEMA_SAMPLE_ROWS, file_type=self.format)
+            chunks = iter_chunks(self.file_path, columns=list(sample.columns[:1]), file_type=self.format)
+            self.total_rows = sum(len(chunk) for chunk in chunks)
+        else:
+            sample = _cached_frame(self.file_path, self.format, fingerprint)
+            self.total_rows = len(sample)
+        self.columns = [str(col) for col in sample.columns]
+        self.column_types = [str(dtype) for dtype in sample.dtypes]
+
+    def read_rows(self, start: int, end: int) -> pd.DataFrame:
+        """Rows [start, end) of the current file."""
+        self.refresh()
+        if self.indexed:
+            return get_row_index(self.file_path, file_type=self.format).read_rows(start, end - start)
+        if self.format == 'sqlite':
+            return SqliteQuery(self.file_path).limit(end - start, start).frame()
+        if self.streamed:
+            return _stream_rows(self.file_path, self.format, start, end, self.columns)
+        return _cached_frame(self.file_path, self.format, self.fingerprint).iloc[start:end]
+
+    def uris(self) -> Dict[str, str]:
+        base = f"visidata://dataset/{self.dataset_id}"
+        return {"schema": f"{base}/schema", "rows": base + "/rows/{start}-{end}"}
+
+    def schema(self) -> Dict[str, Any]:
+        self.refresh()
+        return {
+            "dataset_id": self.dataset_id,
+            "file_path": self.file_path,
+            "format": self.format,
+            "fingerprint": self.fingerprint,
+            "total_rows": self.total_rows,
+            "columns": [{"name": name, "type": dtype} for name, dtype in zip(self.columns, self.column_types)],
+            "max_page_rows": MAX_PAGE_ROWS,
+            "uris": self.uris(),
+        }
+
+
+_datasets: Dict[str, Dataset] = {}
+_frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cached_frame(file_path: str, fmt: str, fingerprint: Dict[str, Any]) -> pd.DataFrame:
+    key = f"{fingerprint['path']}:{fingerprint['size']}:{fingerprint['mtime_ns']}"
+    with _lock:
+        if key in _frames:
+            _frames.move_to_end(key)
+            record_cache("dataset_frame", True)
+            return _frames[key]
+    record_cache("dataset_frame", False)
+    df = read_frame(file_path, file_type=fmt)
+    with _lock:
+        _frames[key] = df
+        while len(_frames) > FRAME_CACHE_ENTRIES:
+            _frames.popitem(last=False)
+    return df
+
+
+def _stream_rows(file_path: str, fmt: str, start: int, end: int, columns: List[str]) -> pd.DataFrame:
+    pages = []
+    seen = 0
+    for chunk in iter_chunks(file_path, file_type=fmt):
+        if start - seen < len(chunk):
+            pages.append(chunk.iloc[max(start - seen, 0):end - seen])
+        seen += len(chunk)
+        if seen >= end:
+            break
+    return pd.concat(pages) if pages else pd.DataFrame(columns=columns)
+
+
+def register_dataset(file_path: str, file_type: Optional[str] = None) -> Dataset:
+    """Register a file (or refresh its entry) and return the dataset."""
+    dataset_id = hashlib.sha256(os.path.abspath(file_path).encode()).hexdigest()[:12]
+    with _lock:
+        dataset = _datasets.get(dataset_id)
+    if dataset is None or (file_type and detect_format(file_path, file_type) != dataset.format):
+        dataset = Dataset(dataset_id, file_path, file_type)
+        with _lock:
+            _datasets[dataset_id] = dataset
+    else:
+        dataset.refresh()
+    return dataset
+
+
+def get_dataset(dataset_id: str) -> Dataset:
+    """
+    Look up a registered dataset.
+
+    Raises:
+        ValueError: If no dataset has this id
+    """
+    with _lock:
+        if dataset_id not in _datasets:
+            raise ValueError(f"Unknown dataset '{dataset_id}'. Load the file with load_data first.")
+        return _datasets[dataset_id]
+
+
+def list_datasets() -> List[Dataset]:
+    with _lock:
+        return list(_datasets.values())
+
+
+def parse_page(start: str, end: str) -> range:
+    """
+    Validate a rows/{start}-{end} page request.
+
+    Raises:
+        ValueError: If the bounds are not integers, are reversed or span too many rows
+    """
+    try:
+        first, last = int(start), int(end)
+    except ValueError:
+        raise ValueError(f"Row range must be two integers, got '{start}-{end}'")
+    if first < 0 or last < first:
+        raise ValueError(f"Invalid row range {first}-{last}")
+    if last - first > MAX_PAGE_ROWS:
+        raise ValueError(f"Pages are limited to {MAX_PAGE_ROWS} rows, requested {last - first}")
+    return range(first, last)
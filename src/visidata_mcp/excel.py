@@ -0,0 +1,254 @@
+"""
+Streaming Excel reading and writing.
+
+Reading iterates over a sheet's rows lazily, with python-calamine when it is
+installed (``pip install visidata-mcp[fast]``) and openpyxl in read-only mode
+otherwise, and turns every batch of rows into a DataFrame with the same parser
+pandas.read_excel uses, so types and missing values come out the same. Only
+one chunk of rows is held in memory at a time, and reading stops as soon as a
+row limit is reached.
+
+Writing uses an openpyxl write-only workbook, which streams rows to disk
+instead of building cell objects for the whole sheet. Sheets longer than
+Excel's row limit continue on additional sheets.
+"""
+
+import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+try:
+    from python_calamine import CalamineWorkbook
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+EXCEL_MAX_ROWS = 1_048_576
+DEFAULT_CHUNKSIZE = 100_000
+
+SheetRef = Optional[Union[str, int]]
+
+
+# -- reading ---------------------------------------------------------------------
+
+def _convert_cell(value: Any) -> Any:
+    # Same conversions as pandas' Excel readers: empty cells become "", whole floats ints
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return pd.Timestamp(value)
+    return value
+
+
+def _resolve_sheet(names: Sequence[str], sheet: SheetRef) -> str:
+    if sheet is None:
+        return names[0]
+    if isinstance(sheet, int) or (isinstance(sheet, str) and sheet.isdigit() and sheet not in names):
+        index = int(sheet)
+        if not 0 <= index < len(names):
+            raise ValueError(f"Sheet index {index} out of range; workbook has {len(names)} sheets")
+        return names[index]
+    if sheet not in names:
+        raise ValueError(f"Sheet '{sheet}' not found. Available sheets: {list(names)}")
+    return sheet
+
+
+def sheet_names(file_path: str) -> List[str]:
+    """Names of the sheets in a workbook."""
+    if CALAMINE_AVAILABLE:
+        return list(CalamineWorkbook.from_path(file_path).sheet_names)
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def iter_rows(file_path: str, sheet: SheetRef = None) -> Iterator[List[Any]]:
+    """
+    Yield the cell values of a sheet row by row, trailing empty cells removed.
+    """
+    if CALAMINE_AVAILABLE:
+        workbook = CalamineWorkbook.from_path(file_path)
+        name = _resolve_sheet(workbook.sheet_names, sheet)
+        rows = workbook.get_sheet_by_name(name).iter_rows()
+        workbook_close = getattr(workbook, "close", None)
+    else:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+        name = _resolve_sheet(workbook.sheetnames, sheet)
+        rows = workbook[name].iter_rows(values_only=True)
+        workbook_close = workbook.close
+
+    try:
+        for row in rows:
+            values = [_convert_cell(value) for value in row]
+            while values and values[-1] == "":
+                values.pop()
+            yield values
+    finally:
+        if workbook_close is not None:
+            workbook_close()
+
+
+def iter_excel_chunks(file_path: str, sheet: SheetRef = None, columns: Optional[List[str]] = None,
+                      chunksize: int = DEFAULT_CHUNKSIZE, nrows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Read a sheet in DataFrame chunks.
+
+    Args:
+        file_path: Path to the workbook
+        sheet: Sheet name or 0-based index (default: the first sheet)
+        columns: Optional subset of columns to keep
+        chunksize: Maximum number of rows per chunk
+        nrows: Stop after this many data rows
+
+    Yields:
+        DataFrame chunks; the first row of the sheet is the header
+    """
+    header: Optional[List[Any]] = None
+    batch: List[List[Any]] = []
+    blank_run: List[List[Any]] = []
+    remaining = nrows
+    yielded = False
+
+    def parse(rows: List[List[Any]]) -> pd.DataFrame:
+        width = max(len(header), max((len(r) for r in rows), default=0))
+        if not width:
+            return pd.DataFrame(columns=columns or [])
+        padded = [r + [""] * (width - len(r)) for r in [header] + (rows or [[]])]
+        df = TextParser(padded, header=0, usecols=columns).read()
+        # The parser needs a data row to name the columns; drop the placeholder again
+        return df if rows else df.iloc[:0]
+
+    for values in iter_rows(file_path, sheet):
+        if header is None:
+            header = values
+            continue
+        if not values:
+            # Only keep blank rows that are followed by data, like pandas trims trailing ones
+            blank_run.append(values)
+            continue
+        if remaining is not None and remaining <= 0:
+            break
+        batch.extend(blank_run)
+        blank_run = []
+        batch.append(values)
+        if remaining is not None:
+            remaining -= 1
+        if len(batch) >= chunksize:
+            yield parse(batch)
+            yielded = True
+            batch = []
+
+    if header is None:
+        yield pd.DataFrame(columns=columns or [])
+    elif batch or not yielded:
+        # Always produce at least one (possibly empty) frame so callers see the columns
+        yield parse(batch)
+
+
+def read_excel_frame(file_path: str, sheet: SheetRef = None, columns: Optional[List[str]] = None,
+                     nrows: Optional[int] = None) -> pd.DataFrame:
+    """Read a whole sheet (or its first nrows rows) into one DataFrame."""
+    if CALAMINE_AVAILABLE:
+        name = _resolve_sheet(sheet_names(file_path), sheet)
+        return pd.read_excel(file_path, sheet_name=name, usecols=columns, nrows=nrows, engine='calamine')
+    chunks = list(iter_excel_chunks(file_path, sheet=sheet, columns=columns, nrows=nrows))
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def read_excel_columns(file_path: str, sheet: SheetRef = None) -> List[str]:
+    """Column names of a sheet, read from its header row only."""
+    return list(next(iter_excel_chunks(file_path, sheet=sheet, nrows=0)).columns)
+
+
+# -- writing ---------------------------------------------------------------------
+
+def _cell_value(value: Any) -> Any:
+    # Cells hold scalars; containers are written as text, like DataFrame.to_excel
+    if isinstance(value, (list, tuple, dict, set)):
+        return str(value)
+    return value
+
+
+def _cell_rows(chunk: pd.DataFrame) -> Iterator[tuple]:
+    values = chunk.astype(object).where(chunk.notna(), None)
+    for i, dtype in enumerate(chunk.dtypes):
+        if dtype == object:
+            values.isetitem(i, values.iloc[:, i].map(_cell_value))
+    return values.itertuples(index=False, name=None)
+
+
+class ExcelStreamWriter:
+    """
+    Write DataFrame chunks to an .xlsx file with constant memory.
+
+    Args:
+        output_path: Path of the workbook to create
+    """
+
+    def __init__(self, output_path: str):
+        from openpyxl import Workbook
+
+        self.output_path = output_path
+        self.rows_written = 0
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._sheet_name = ""
+        self._sheet_rows = 0
+        self._sheet_parts = 0
+        self._columns: List[str] = []
+
+    def add_sheet(self, name: str, columns: Sequence[Any]) -> None:
+        """Start a new sheet and write its header row."""
+        self._sheet_name = name
+        self._sheet_parts = 1
+        self._columns = [str(col) for col in columns]
+        self._start_sheet(name)
+
+    def _start_sheet(self, title: str) -> None:
+        self._sheet = self._workbook.create_sheet(title=title[:31])
+        self._sheet.append(self._columns)
+        self._sheet_rows = 1
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        """Append rows to the current sheet, starting a new sheet if one was not added."""
+        if self._sheet is None:
+            self.add_sheet("Sheet1", chunk.columns)
+        for row in _cell_rows(chunk):
+            if self._sheet_rows >= EXCEL_MAX_ROWS:
+                # Continue on "<name> (2)", "<name> (3)", ... past Excel's row limit
+                self._sheet_parts += 1
+                suffix = f" ({self._sheet_parts})"
+                self._start_sheet(self._sheet_name[:31 - len(suffix)] + suffix)
+            self._sheet.append(row)
+            self._sheet_rows += 1
+            self.rows_written += 1
+
+    def close(self, columns: Optional[Sequence[Any]] = None) -> None:
+        """
+        Finish the workbook.
+
+        Args:
+            columns: Header to write if no sheet was started
+        """
+        if self._sheet is None:
+            self.add_sheet("Sheet1", columns or [])
+        self._workbook.save(self.output_path)
+
+
+def write_excel_sheets(output_path: str, sheets: Dict[str, pd.DataFrame]) -> None:
+    """Write several DataFrames as named sheets of one workbook."""
+    writer = ExcelStreamWriter(output_path)
+    for name, df in sheets.items():
+        writer.add_sheet(name, df.columns)
+        writer.write(df)
+    writer.close()
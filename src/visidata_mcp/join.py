@@ -0,0 +1,226 @@
+"""
+Two-file joins for the join_data tool.
+
+The right-hand file is the build side. It is read in chunks; while it fits in
+the memory budget the join is an in-memory hash join and the left file is
+streamed through it chunk by chunk. If the build side outgrows the budget the
+join switches to a partitioned (grace) hash join: both inputs are
+hash-partitioned on the join keys into temporary files and each pair of
+partitions is then joined in memory.
+
+As in SQL, null keys never match.
+"""
+
+import math
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import key_hash
+from .loaders import DEFAULT_CHUNKSIZE, file_fingerprint, iter_chunks, read_columns
+
+JOIN_TYPES = ("inner", "left", "anti")
+RIGHT_SUFFIX = "_right"
+MIN_PARTITIONS = 2
+MAX_PARTITIONS = 512
+
+
+def _keys_index(frame: pd.DataFrame, keys: List[str]) -> pd.Index:
+    if len(keys) == 1:
+        return pd.Index(frame[keys[0]])
+    return pd.MultiIndex.from_frame(frame[keys])
+
+
+class _BuildTable:
+    """Hash table over the build side, probed one chunk at a time."""
+
+    def __init__(self, build: pd.DataFrame, left_on: List[str], right_on: List[str], how: str):
+        self.left_on = left_on
+        self.right_on = right_on
+        self.how = how
+        self.build = build.reset_index(drop=True)
+        self.index = _keys_index(self.build, right_on)
+        # Unique build keys allow a single hash lookup per probe row instead of a merge
+        self.unique = bool(self.index.is_unique)
+        shared_keys = [r for l, r in zip(left_on, right_on) if l == r]
+        self.payload = self.build.drop(columns=shared_keys)
+
+    def probe(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        if self.how == "anti":
+            return chunk[~_keys_index(chunk, self.left_on).isin(self.index)]
+
+        if not self.unique:
+            return chunk.merge(self.build, how=self.how, left_on=self.left_on,
+                               right_on=self.right_on, suffixes=("", RIGHT_SUFFIX))
+
+        positions = self.index.get_indexer(_keys_index(chunk, self.left_on))
+        if self.how == "inner":
+            matched = positions >= 0
+            chunk = chunk[matched]
+            positions = positions[matched]
+        # Reindexing on -1 yields an all-null row, which is exactly a left-join miss
+        payload = self.payload.reindex(positions)
+        payload.index = chunk.index
+        overlap = [c for c in payload.columns if c in chunk.columns]
+        payload = payload.rename(columns={c: f"{c}{RIGHT_SUFFIX}" for c in overlap})
+        return pd.concat([chunk, payload], axis=1).reset_index(drop=True)
+
+
+class FileJoin:
+    """
+    Join two files on key columns.
+
+    Args:
+        left_path: Path to the left (probe) file
+        right_path: Path to the right (build) file
+        left_on: Key columns in the left file
+        right_on: Key columns in the right file
+        how: Join type (inner, left, anti)
+        memory_budget_bytes: Largest build side joined in memory
+        chunksize: Rows per chunk when streaming either file
+        spill_dir: Directory for partition files (defaults to the system temp dir)
+    """
+
+    def __init__(self, left_path: str, right_path: str, left_on: List[str], right_on: List[str],
+                 how: str = "inner", memory_budget_bytes: int = 256 * 1024 * 1024,
+                 chunksize: int = DEFAULT_CHUNKSIZE, spill_dir: Optional[str] = None):
+        if how not in JOIN_TYPES:
+            raise ValueError(f"Unknown join type '{how}'. Use: {', '.join(JOIN_TYPES)}")
+        if len(left_on) != len(right_on):
+            raise ValueError("Left and right key lists must have the same length")
+        self.left_path = left_path
+        self.right_path = right_path
+        self.left_on = list(left_on)
+        self.right_on = list(right_on)
+        self.how = how
+        self.memory_budget_bytes = memory_budget_bytes
+        self.chunksize = chunksize
+        self.spill_dir = spill_dir
+
+        self.strategy: Optional[str] = None
+        self.partitions = 0
+        self.build_rows = 0
+        self.build_bytes = 0
+        self.probe_rows = 0
+        self.unique_build_keys: Optional[bool] = None
+        self._spill_root: Optional[str] = None
+        self._spill_files = 0
+        self._spilled_bytes = 0
+
+    # -- partitioning ------------------------------------------------------------
+
+    def _spill(self, side: str, frame: pd.DataFrame, keys: List[str]) -> None:
+        ids = key_hash(frame, keys) % np.uint64(self.partitions)
+        for partition, part in frame.groupby(ids, sort=False):
+            directory = os.path.join(self._spill_root, f"p{int(partition):04d}", side)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{self._spill_files:06d}.pkl")
+            part.to_pickle(path)
+            self._spill_files += 1
+            self._spilled_bytes += os.path.getsize(path)
+
+    def _partition_count(self, bytes_so_far: int) -> int:
+        # Assume the in-memory size is a few times the on-disk size
+        expected = max(bytes_so_far, file_fingerprint(self.right_path)["size"] * 3)
+        wanted = math.ceil(expected / max(self.memory_budget_bytes // 2, 1))
+        return max(MIN_PARTITIONS, min(MAX_PARTITIONS, wanted))
+
+    @staticmethod
+    def _read_pieces(directory: str) -> Iterator[pd.DataFrame]:
+        if not os.path.isdir(directory):
+            return
+        for name in sorted(os.listdir(directory)):
+            yield pd.read_pickle(os.path.join(directory, name))
+
+    # -- execution ---------------------------------------------------------------
+
+    def _non_null_keys(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        return chunk[chunk[self.right_on].notna().all(axis=1)]
+
+    def iter_results(self) -> Iterator[pd.DataFrame]:
+        """
+        Run the join and yield result chunks.
+
+        In-memory joins keep the left file's row order; partitioned joins
+        produce rows partition by partition.
+        """
+        frames: List[pd.DataFrame] = []
+        right_reader = iter_chunks(self.right_path, chunksize=self.chunksize)
+        for chunk in right_reader:
+            chunk = self._non_null_keys(chunk)
+            frames.append(chunk)
+            self.build_rows += len(chunk)
+            self.build_bytes += int(chunk.memory_usage(deep=True).sum())
+            if self.build_bytes > self.memory_budget_bytes:
+                break
+        else:
+            self.strategy = "in_memory_hash"
+            build = pd.concat(frames, ignore_index=True) if frames else None
+            if build is None:
+                build = pd.DataFrame(columns=self._right_columns())
+            table = _BuildTable(build, self.left_on, self.right_on, self.how)
+            self.unique_build_keys = table.unique
+            for chunk in iter_chunks(self.left_path, chunksize=self.chunksize):
+                self.probe_rows += len(chunk)
+                yield table.probe(chunk)
+            return
+
+        # Build side does not fit: partition both inputs to disk
+        self.strategy = "partitioned_hash"
+        self.partitions = self._partition_count(self.build_bytes)
+        self._spill_root = tempfile.mkdtemp(prefix="visidata_mcp_join_", dir=self.spill_dir)
+        for frame in frames:
+            self._spill("right", frame, self.right_on)
+        frames = []
+        for chunk in right_reader:
+            chunk = self._non_null_keys(chunk)
+            self.build_rows += len(chunk)
+            self.build_bytes += int(chunk.memory_usage(deep=True).sum())
+            self._spill("right", chunk, self.right_on)
+        for chunk in iter_chunks(self.left_path, chunksize=self.chunksize):
+            self.probe_rows += len(chunk)
+            self._spill("left", chunk, self.left_on)
+
+        empty_build = pd.DataFrame(columns=self._right_columns())
+        self.unique_build_keys = True
+        for partition in sorted(os.listdir(self._spill_root)):
+            directory = os.path.join(self._spill_root, partition)
+            pieces = list(self._read_pieces(os.path.join(directory, "right")))
+            build = pd.concat(pieces, ignore_index=True) if pieces else empty_build
+            table = _BuildTable(build, self.left_on, self.right_on, self.how)
+            self.unique_build_keys = self.unique_build_keys and table.unique
+            for chunk in self._read_pieces(os.path.join(directory, "left")):
+                yield table.probe(chunk)
+
+    def _right_columns(self) -> List[str]:
+        return read_columns(self.right_path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Describe which strategy ran and how much data it touched."""
+        return {
+            "strategy": self.strategy,
+            "build_side": self.right_path,
+            "build_rows": self.build_rows,
+            "build_bytes": self.build_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "unique_build_keys": self.unique_build_keys,
+            "probe_rows": self.probe_rows,
+            "partitions": self.partitions,
+            "spilled_bytes": self._spilled_bytes,
+        }
+
+    def close(self) -> None:
+        """Remove any partition files."""
+        if self._spill_root is not None:
+            shutil.rmtree(self._spill_root, ignore_errors=True)
+            self._spill_root = None
+
+    def __enter__(self) -> "FileJoin":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,244 @@
+"""
+Streaming JSON reading and writing.
+
+Two layouts are read incrementally, so multi-GB exports never have to fit in
+memory at once:
+
+* JSON Lines (.jsonl / .ndjson, or a .json file with one object per line):
+  read in chunks with pandas' line-delimited reader.
+* A top-level array of records: the file is scanned block by block and split
+  into its elements, and every batch of elements is parsed with
+  pandas.read_json, so chunks get the same types as a whole-file read.
+
+Any other JSON document (e.g. a dict of columns) only makes sense as a whole
+and is loaded with pandas.read_json.
+
+Writing streams too: JSON arrays are opened, extended chunk by chunk and closed
+on finish, and JSON Lines are appended.
+"""
+
+import io
+import json
+from typing import IO, Iterator, List, Optional
+
+import pandas as pd
+
+from .compression import input_source, open_input_text, open_output_text
+
+BLOCK_SIZE = 4 * 1024 * 1024
+DEFAULT_CHUNKSIZE = 100_000
+
+LAYOUT_ARRAY = "array"
+LAYOUT_LINES = "lines"
+LAYOUT_DOCUMENT = "document"
+
+_WHITESPACE = " \t\n\r\ufeff"
+
+
+def _first_lines(file_path: str, count: int) -> List[str]:
+    lines: List[str] = []
+    with open_input_text(file_path) as f:
+        for line in f:
+            line = line.lstrip('\ufeff').strip()
+            if line:
+                lines.append(line)
+                if len(lines) == count:
+                    break
+    return lines
+
+
+def json_layout(file_path: str) -> str:
+    """
+    Sniff how a JSON file is laid out.
+
+    Returns:
+        "array" for a top-level array, "lines" for one object per line and
+        "document" for anything else
+    """
+    lines = _first_lines(file_path, 2)
+    if not lines:
+        return LAYOUT_DOCUMENT
+    if lines[0].startswith('['):
+        return LAYOUT_ARRAY
+    if len(lines) == 2 and lines[1].startswith('{'):
+        try:
+            # A complete object on the first line means one record per line
+            if isinstance(json.loads(lines[0]), dict):
+                return LAYOUT_LINES
+        except ValueError:
+            pass
+    return LAYOUT_DOCUMENT
+
+
+def iter_array_elements(file_path: str, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+    """
+    Yield the source text of each element of a top-level JSON array.
+
+    Only the current block (and an element spanning blocks) is held in memory.
+
+    Raises:
+        ValueError: If the file is not a well-formed JSON array
+    """
+    decoder = json.JSONDecoder()
+    with open_input_text(file_path) as f:
+        buffer = f.read(block_size)
+        eof = not buffer
+        pos = 0
+        expect_element = True
+        opened = False
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                if eof:
+                    raise ValueError("Unexpected end of file inside the JSON array")
+                more = f.read(block_size)
+                eof = not more
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+
+            char = buffer[pos]
+            if not opened:
+                if char != '[':
+                    raise ValueError("Expected a JSON array of records")
+                opened = True
+                pos += 1
+                continue
+            if char == ']':
+                return
+            if char == ',' and not expect_element:
+                expect_element = True
+                pos += 1
+                continue
+
+            try:
+                _, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                end = None
+            if end is None or (end == len(buffer) and not eof):
+                # The element (or a number) may continue in the next block
+                if eof:
+                    raise ValueError(f"Invalid JSON array element near character {pos}")
+                more = f.read(max(block_size, len(buffer)))
+                eof = not more
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            yield buffer[pos:end]
+            expect_element = False
+            pos = end
+
+
+def _project(chunk: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    # Records may omit keys, so missing columns are filled rather than rejected
+    return chunk.reindex(columns=columns) if columns is not None else chunk
+
+
+def iter_json_chunks(file_path: str, columns: Optional[List[str]] = None,
+                     chunksize: int = DEFAULT_CHUNKSIZE, nrows: Optional[int] = None,
+                     lines: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Read a JSON or JSON Lines file in DataFrame chunks.
+
+    Args:
+        file_path: Path to the data file
+        columns: Optional subset of columns to keep
+        chunksize: Maximum number of rows per chunk
+        nrows: Stop after this many records
+        lines: Read as JSON Lines regardless of the file's layout
+
+    Yields:
+        DataFrame chunks in file order; at least one, possibly empty
+    """
+    layout = LAYOUT_LINES if lines else json_layout(file_path)
+    yielded = False
+
+    if layout == LAYOUT_LINES:
+        if nrows != 0:
+            with input_source(file_path) as source:
+                with pd.read_json(source, lines=True, chunksize=chunksize, nrows=nrows) as reader:
+                    for chunk in reader:
+                        yield _project(chunk, columns)
+                        yielded = True
+    elif layout == LAYOUT_ARRAY:
+        batch: List[str] = []
+        remaining = nrows
+        for element in iter_array_elements(file_path):
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                remaining -= 1
+            batch.append(element)
+            if len(batch) >= chunksize:
+                yield _project(_parse_elements(batch), columns)
+                yielded = True
+                batch = []
+        if batch:
+            yield _project(_parse_elements(batch), columns)
+            yielded = True
+    else:
+        df = _project(_read_document(file_path), columns)
+        if nrows is not None:
+            df = df.head(nrows)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+            yielded = True
+
+    if not yielded:
+        yield pd.DataFrame(columns=columns or [])
+
+
+def _read_document(file_path: str) -> pd.DataFrame:
+    with input_source(file_path) as source:
+        return pd.read_json(source)
+
+
+def _parse_elements(elements: List[str]) -> pd.DataFrame:
+    return pd.read_json(io.StringIO("[" + ",".join(elements) + "]"))
+
+
+def read_json_frame(file_path: str, columns: Optional[List[str]] = None, nrows: Optional[int] = None,
+                    lines: bool = False) -> pd.DataFrame:
+    """Read a whole JSON or JSON Lines file (or its first nrows records) into one DataFrame."""
+    if nrows is None and not lines and json_layout(file_path) == LAYOUT_DOCUMENT:
+        return _project(_read_document(file_path), columns)
+    chunks = list(iter_json_chunks(file_path, columns=columns, nrows=nrows, lines=lines))
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+# -- writing ---------------------------------------------------------------------
+
+class JsonStreamWriter:
+    """
+    Write DataFrame chunks as a JSON array of records or as JSON Lines.
+
+    Args:
+        output_path: Path of the file to create
+        lines: Write one record per line instead of an indented array
+    """
+
+    def __init__(self, output_path: str, lines: bool = False):
+        self.output_path = output_path
+        self.lines = lines
+        self.rows_written = 0
+        self._file: IO[str] = open_output_text(output_path)
+        if not lines:
+            self._file.write("[")
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if chunk.empty:
+            return
+        if self.lines:
+            text = chunk.to_json(orient='records', lines=True)
+            self._file.write(text if text.endswith("\n") else text + "\n")
+        else:
+            # Strip the brackets of the chunk's own array and splice its records in
+            text = chunk.to_json(orient='records', indent=2).strip()[1:-1].strip("\n")
+            self._file.write(",\n" if self.rows_written else "\n")
+            self._file.write(text)
+        self.rows_written += len(chunk)
+
+    def close(self) -> None:
+        if not self.lines:
+            self._file.write("\n]" if self.rows_written else "]")
+        self._file.close()
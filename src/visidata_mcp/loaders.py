@@ -0,0 +1,445 @@
+"""
+File loading helpers shared by the VisiData MCP tools.
+
+Every tool dispatches on the file extension in the same way; this module keeps
+that dispatch in one place and adds chunked reading so that streaming tools can
+process files without materializing them in memory. Excel workbooks and JSON
+files are read and written through the streaming helpers in excel.py and
+json_stream.py; the ``sheet`` argument selects a worksheet and is ignored for
+other formats. Compressed files (``jobs.csv.gz``, ``events.jsonl.zst``, ...)
+are decompressed on the fly by compression.py, and the format is taken from
+the suffix before the compression suffix. SQLite databases are queried
+through sqlite_source.py, and the other formats pandas is not used for (HTML,
+YAML, Parquet, archives, ...) are read through VisiData's own loaders in
+visidata_backend.py; for both, ``sheet`` selects a table. A directory or
+glob pattern is read as one partitioned dataset (see partitions.py).
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from .compression import (compression_from_suffix, detect_compression, input_source, open_output_text,
+                          strip_compression)
+from .excel import (ExcelStreamWriter, SheetRef, iter_excel_chunks, read_excel_columns,
+                    read_excel_frame)
+from .json_stream import JsonStreamWriter, iter_json_chunks, read_json_frame
+from .metrics import measured
+from .partitions import (Partition, add_partition_columns, discover_partitions, is_partitioned,
+                         map_partitions, partition_keys)
+from .partitions import fingerprint as partitions_fingerprint
+from .sqlite_source import SqliteQuery, is_sqlite_format
+from .visidata_backend import is_visidata_format, iter_visidata_chunks, read_visidata_frame
+
+# Default number of rows per chunk for streaming readers
+DEFAULT_CHUNKSIZE = 100_000
+
+# Rows read to infer column types without loading the whole file
+SCHEMA_SAMPLE_ROWS = 1_000
+
+
+def cache_root() -> str:
+    """Root directory for the server's on-disk caches (VISIDATA_MCP_CACHE_DIR)."""
+    return os.environ.get("VISIDATA_MCP_CACHE_DIR",
+                          os.path.join(os.path.expanduser("~"), ".cache", "visidata-mcp"))
+
+
+def file_fingerprint(file_path: str) -> Dict[str, Union[str, int]]:
+    """
+    Identify the current contents of a file cheaply.
+
+    The absolute path, size and modification time change whenever the file is
+    rewritten, so they are used as a cache key instead of hashing the contents.
+    A partitioned dataset is identified by its total size and newest file.
+
+    Args:
+        file_path: Path to the data file
+
+    Returns:
+        Dictionary with path, size and mtime_ns
+    """
+    if is_partitioned(file_path):
+        return partitions_fingerprint(file_path)
+    stat = os.stat(file_path)
+    return {"path": os.path.abspath(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def detect_format(file_path: str, file_type: Optional[str] = None) -> str:
+    """
+    Work out the tabular format of a file.
+
+    Args:
+        file_path: Path to the data file
+        file_type: Optional explicit format hint (csv, tsv, json, xlsx, ...)
+
+    Returns:
+        One of "csv", "tsv", "json", "jsonl", "excel", "sqlite" or "visidata"
+    """
+    if file_type is None and is_partitioned(file_path):
+        # Partitions share a format; take it from the first file
+        file_path = discover_partitions(file_path)[0].path
+    fmt = (file_type or Path(strip_compression(file_path)).suffix).lower().lstrip('.')
+    if fmt in ('xlsx', 'xls', 'excel'):
+        return 'excel'
+    if fmt in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if fmt in ('json', 'tsv', 'sqlite', 'visidata'):
+        return fmt
+    if is_sqlite_format(fmt):
+        return 'sqlite'
+    if is_visidata_format(fmt):
+        return 'visidata'
+    # Try CSV as default
+    return 'csv'
+
+
+def _check_uncompressed_excel(file_path: str) -> None:
+    if detect_compression(file_path) is not None:
+        raise ValueError("Compressed Excel workbooks are not supported; decompress the file first")
+
+
+def _sqlite_query(file_path: str, sheet: SheetRef, columns: Optional[List[str]]) -> SqliteQuery:
+    query = SqliteQuery(file_path, sheet)
+    return query.select(columns) if columns is not None else query
+
+
+def _visidata_type(file_type: Optional[str]) -> Optional[str]:
+    # VisiData picks its loader from the suffix unless a concrete type was given
+    if file_type is None or file_type.lower().lstrip('.') == 'visidata':
+        return None
+    return file_type.lower().lstrip('.')
+
+
+@measured("parse", count_rows=True)
+def read_frame(file_path: str, columns: Optional[List[str]] = None,
+               file_type: Optional[str] = None, sheet: SheetRef = None) -> pd.DataFrame:
+    """
+    Load a whole file into a DataFrame.
+
+    Args:
+        file_path: Path to the data file
+        columns: Optional subset of columns to load
+        file_type: Optional explicit format hint
+        sheet: Excel sheet or table name, or 0-based index (default: the first)
+
+    Returns:
+        The loaded DataFrame
+
+    Raises:
+        MemoryBudgetError: If the DataFrame would not fit in the memory budget
+    """
+    from .memory_guard import check_load
+    check_load(file_path, columns=columns, file_type=file_type, sheet=sheet)
+    if is_partitioned(file_path):
+        # Partitions are read in parallel worker processes
+        frames = map_partitions(read_partition, discover_partitions(file_path), columns=columns,
+                                file_type=file_type, sheet=sheet)
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    fmt = detect_format(file_path, file_type)
+    if fmt in ('csv', 'tsv'):
+        from .parallel_csv import read_csv_parallel, use_parallel
+        if use_parallel(file_path, fmt):
+            return read_csv_parallel(file_path, fmt, columns=columns)
+        with input_source(file_path) as source:
+            return pd.read_csv(source, sep='\t' if fmt == 'tsv' else ',', usecols=columns)
+    if fmt == 'excel':
+        _check_uncompressed_excel(file_path)
+        return read_excel_frame(file_path, sheet=sheet, columns=columns)
+    if fmt == 'sqlite':
+        return _sqlite_query(file_path, sheet, columns).frame()
+    if fmt == 'visidata':
+        return read_visidata_frame(file_path, sheet=sheet, columns=columns, file_type=_visidata_type(file_type))
+    return read_json_frame(file_path, columns=columns, lines=fmt == 'jsonl')
+
+
+def read_columns(file_path: str, file_type: Optional[str] = None, sheet: SheetRef = None) -> List[str]:
+    """
+    Get the column names of a file without loading its rows where possible.
+
+    Args:
+        file_path: Path to the data file
+        file_type: Optional explicit format hint
+        sheet: Excel sheet or table name, or 0-based index
+
+    Returns:
+        List of column names
+    """
+    if is_partitioned(file_path):
+        partitions = discover_partitions(file_path)
+        columns = read_columns(partitions[0].path, file_type=file_type, sheet=sheet)
+        return columns + [key for key in partition_keys(partitions) if key not in columns]
+    fmt = detect_format(file_path, file_type)
+    if fmt in ('csv', 'tsv'):
+        with input_source(file_path) as source:
+            return list(pd.read_csv(source, sep='\t' if fmt == 'tsv' else ',', nrows=0).columns)
+    if fmt == 'excel':
+        _check_uncompressed_excel(file_path)
+        return read_excel_columns(file_path, sheet=sheet)
+    if fmt == 'sqlite':
+        return SqliteQuery(file_path, sheet).columns
+    # JSON records and VisiData tables: take the columns from the first rows
+    return list(sample_frame(file_path, SCHEMA_SAMPLE_ROWS, file_type=file_type or fmt, sheet=sheet).columns)
+
+
+@measured("parse", count_rows=True)
+def sample_frame(file_path: str, nrows: int, columns: Optional[List[str]] = None,
+                 file_type: Optional[str] = None, sheet: SheetRef = None) -> pd.DataFrame:
+    """
+    Read the first rows of a file, e.g. to infer column types.
+
+    Args:
+        file_path: Path to the data file
+        nrows: Number of rows to read
+        columns: Optional subset of columns to load
+        file_type: Optional explicit format hint
+        sheet: Excel sheet or table name, or 0-based index
+
+    Returns:
+        DataFrame with at most nrows rows
+    """
+    if is_partitioned(file_path):
+        chunks = list(iter_chunks(file_path, columns=columns, file_type=file_type, sheet=sheet, nrows=nrows))
+        return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    fmt = detect_format(file_path, file_type)
+    if fmt in ('csv', 'tsv'):
+        with input_source(file_path) as source:
+            return pd.read_csv(source, sep='\t' if fmt == 'tsv' else ',', usecols=columns, nrows=nrows)
+    if fmt == 'excel':
+        _check_uncompressed_excel(file_path)
+        return read_excel_frame(file_path, sheet=sheet, columns=columns, nrows=nrows)
+    if fmt == 'sqlite':
+        return _sqlite_query(file_path, sheet, columns).limit(nrows).frame()
+    if fmt == 'visidata':
+        return read_visidata_frame(file_path, sheet=sheet, columns=columns, nrows=nrows,
+                                   file_type=_visidata_type(file_type))
+    return read_json_frame(file_path, columns=columns, nrows=nrows, lines=fmt == 'jsonl')
+
+
+def numeric_columns(file_path: str, columns: Optional[List[str]] = None,
+                    file_type: Optional[str] = None) -> List[str]:
+    """
+    Pick the numeric columns of a file from a sample of its first rows.
+
+    Args:
+        file_path: Path to the data file
+        columns: Optional columns to choose from (default: all columns)
+        file_type: Optional explicit format hint
+
+    Returns:
+        Names of the numeric columns, in file order
+
+    Raises:
+        ValueError: If requested columns do not exist
+    """
+    sample = sample_frame(file_path, SCHEMA_SAMPLE_ROWS, file_type=file_type)
+    if columns:
+        missing = [col for col in columns if col not in sample.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {missing}")
+        sample = sample[columns]
+    return list(sample.select_dtypes(include=['number']).columns)
+
+
+@measured("parse", count_rows=True)
+def iter_chunks(file_path: str, columns: Optional[List[str]] = None,
+                chunksize: int = DEFAULT_CHUNKSIZE,
+                file_type: Optional[str] = None, sheet: SheetRef = None,
+                nrows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Iterate over a file in DataFrame chunks.
+
+    CSV, TSV, Excel, JSON Lines, JSON arrays, SQLite tables and VisiData-loaded
+    formats are read incrementally; other JSON documents are loaded once and sliced so
+    callers can treat every format the same way.
+
+    Args:
+        file_path: Path to the data file
+        columns: Optional subset of columns to read (projection pushdown)
+        chunksize: Maximum number of rows per chunk
+        file_type: Optional explicit format hint
+        sheet: Excel sheet or table name, or 0-based index
+        nrows: Stop after this many rows
+
+    Yields:
+        DataFrame chunks in file order
+    """
+    if is_partitioned(file_path):
+        remaining = nrows
+        for partition in discover_partitions(file_path):
+            if remaining is not None and remaining <= 0:
+                break
+            for chunk in iter_partition_chunks(partition, columns=columns, chunksize=chunksize,
+                                               file_type=file_type, sheet=sheet, nrows=remaining):
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        return
+    fmt = detect_format(file_path, file_type)
+    if fmt in ('csv', 'tsv'):
+        from .parallel_csv import DEFAULT_STRIDE, iter_csv_parallel, use_parallel
+        if nrows is None and chunksize % DEFAULT_STRIDE == 0 and use_parallel(file_path, fmt):
+            yield from iter_csv_parallel(file_path, fmt, columns=columns, chunksize=chunksize)
+            return
+        sep = '\t' if fmt == 'tsv' else ','
+        with input_source(file_path) as source:
+            with pd.read_csv(source, sep=sep, usecols=columns, chunksize=chunksize, nrows=nrows) as reader:
+                for chunk in reader:
+                    yield chunk
+        return
+    if fmt == 'excel':
+        _check_uncompressed_excel(file_path)
+        yield from iter_excel_chunks(file_path, sheet=sheet, columns=columns, chunksize=chunksize, nrows=nrows)
+        return
+    if fmt == 'sqlite':
+        yield from _sqlite_query(file_path, sheet, columns).limit(nrows).iter_chunks(chunksize)
+        return
+    if fmt == 'visidata':
+        yield from iter_visidata_chunks(file_path, sheet=sheet, columns=columns, chunksize=chunksize,
+                                        nrows=nrows, file_type=_visidata_type(file_type))
+        return
+    yield from iter_json_chunks(file_path, columns=columns, chunksize=chunksize, nrows=nrows,
+                                lines=fmt == 'jsonl')
+
+
+def _file_columns(partition: Partition, columns: Optional[List[str]], file_type: Optional[str],
+                  sheet: SheetRef) -> Optional[List[str]]:
+    # Partition columns come from the path, not from the file
+    if columns is None:
+        return None
+    wanted = [col for col in columns if col not in partition.values]
+    # With only partition columns wanted, still read one file column to get the rows
+    return wanted or read_columns(partition.path, file_type=file_type, sheet=sheet)[:1]
+
+
+def read_partition(partition: Partition, columns: Optional[List[str]] = None,
+                   file_type: Optional[str] = None, sheet: SheetRef = None) -> pd.DataFrame:
+    """Read one partition of a partitioned dataset, with its partition columns."""
+    file_columns = _file_columns(partition, columns, file_type, sheet)
+    df = read_frame(partition.path, columns=file_columns, file_type=file_type, sheet=sheet)
+    return add_partition_columns(df, partition, columns)
+
+
+def iter_partition_chunks(partition: Partition, columns: Optional[List[str]] = None,
+                          chunksize: int = DEFAULT_CHUNKSIZE, file_type: Optional[str] = None,
+                          sheet: SheetRef = None, nrows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Iterate over one partition in DataFrame chunks, with its partition columns."""
+    file_columns = _file_columns(partition, columns, file_type, sheet)
+    for chunk in iter_chunks(partition.path, columns=file_columns, chunksize=chunksize,
+                             file_type=file_type, sheet=sheet, nrows=nrows):
+        yield add_partition_columns(chunk, partition, columns)
+
+
+def output_format_for(output_path: str, output_format: Optional[str] = None) -> str:
+    """
+    Resolve the output format for a path, defaulting to CSV.
+
+    Args:
+        output_path: Path for the output file
+        output_format: Optional explicit format (csv, tsv, json, jsonl, xlsx)
+
+    Returns:
+        One of "csv", "tsv", "json", "jsonl" or "xlsx"
+    """
+    fmt = (output_format or Path(strip_compression(output_path)).suffix).lower().lstrip('.')
+    if fmt in ('xlsx', 'xls'):
+        return 'xlsx'
+    if fmt in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if fmt in ('json', 'tsv'):
+        return fmt
+    return 'csv'
+
+
+def write_frame(df: pd.DataFrame, output_path: str, output_format: Optional[str] = None) -> str:
+    """
+    Save a DataFrame, choosing the writer from the output format.
+
+    Paths ending in a compression suffix (.gz, .bz2, .xz, .zst) are compressed.
+
+    Args:
+        df: Data to save
+        output_path: Path for the output file
+        output_format: Optional explicit format (csv, tsv, json, jsonl, xlsx)
+
+    Returns:
+        The format that was written
+    """
+    fmt = output_format_for(output_path, output_format)
+    if compression_from_suffix(output_path) is not None:
+        writer = ChunkWriter(output_path, fmt)
+        writer.write(df)
+        writer.close(list(df.columns))
+    elif fmt == 'json':
+        df.to_json(output_path, orient='records', indent=2)
+    elif fmt == 'jsonl':
+        df.to_json(output_path, orient='records', lines=True)
+    elif fmt == 'xlsx':
+        writer = ExcelStreamWriter(output_path)
+        writer.write(df)
+        writer.close(list(df.columns))
+    elif fmt == 'tsv':
+        df.to_csv(output_path, sep='\t', index=False)
+    else:
+        df.to_csv(output_path, index=False)
+    return fmt
+
+
+class ChunkWriter:
+    """
+    Incrementally write DataFrame chunks to a file.
+
+    Delimited formats and JSON Lines are appended chunk by chunk, JSON arrays
+    are extended record by record and Excel rows are streamed into a
+    write-only workbook, so no format holds the whole output in memory.
+    Text formats are compressed when the path ends in a compression suffix.
+    """
+
+    def __init__(self, output_path: str, output_format: Optional[str] = None):
+        self.output_path = output_path
+        self.format = output_format_for(output_path, output_format)
+        self.compression = compression_from_suffix(output_path)
+        self.rows_written = 0
+        self._columns: Optional[List[str]] = None
+        if self.format == 'xlsx' and self.compression is not None:
+            raise ValueError("Excel output cannot be compressed")
+        self._excel = ExcelStreamWriter(output_path) if self.format == 'xlsx' else None
+        self._json = (JsonStreamWriter(output_path, lines=self.format == 'jsonl')
+                      if self.format in ('json', 'jsonl') else None)
+        self._csv = open_output_text(output_path) if self.format in ('csv', 'tsv') else None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self._excel is not None:
+            self._excel.write(chunk)
+        elif self._json is not None:
+            self._json.write(chunk)
+        else:
+            started = self._columns is not None
+            if started:
+                # Chunks read from JSON records may not share the first chunk's keys
+                if list(chunk.columns) != self._columns:
+                    chunk = chunk.reindex(columns=self._columns)
+            else:
+                self._columns = list(chunk.columns)
+            chunk.to_csv(self._csv, sep='\t' if self.format == 'tsv' else ',', index=False,
+                         header=not started)
+        self.rows_written += len(chunk)
+
+    def close(self, columns: Optional[List[str]] = None) -> None:
+        """
+        Finish the output file.
+
+        Args:
+            columns: Column names to use for the header if no chunk was written
+        """
+        if self._excel is not None:
+            self._excel.close(columns)
+        elif self._json is not None:
+            self._json.close()
+        else:
+            if self._columns is None:
+                self._columns = list(columns or [])
+                pd.DataFrame(columns=self._columns).to_csv(
+                    self._csv, sep='\t' if self.format == 'tsv' else ',', index=False)
+            self._csv.close()
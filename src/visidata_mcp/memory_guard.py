@@ -0,0 +1,234 @@
+"""
+Memory budget for loading whole files.
+
+Before a file is materialized as one DataFrame, its in-memory size is
+estimated, so a file bigger than RAM is streamed in chunks (or refused with an
+explanation) instead of getting the server process killed. The estimate
+scales the file size by the memory per byte on disk of a sample:
+
+- CSV, TSV and JSON Lines: the first SAMPLE_BYTES are parsed and the sample's
+  deep memory size is divided by the bytes it was parsed from; compressed
+  files are assumed to expand ASSUMED_COMPRESSION_RATIO times
+- SQLite tables: the memory per row of a sample times the row count
+- other formats: the file size times their FORMAT_EXPANSION
+
+A load fits when WORKING_SET_FACTOR times the estimate (the frame plus the
+copies pandas makes while computing on it) is within the budget. Files that
+would fit even at MAX_EXPANSION are not sampled at all.
+
+Operations that collect rows as they stream (run_pipeline's sorts) count the
+memory of what they hold with check_collected and stop once it passes the
+budget.
+
+Configuration (environment variables):
+    VISIDATA_MCP_MEMORY_BUDGET_MB  memory one load may use (default: half of
+                                   the physical memory or of the cgroup
+                                   limit, whichever is lower; 0 disables the
+                                   guard)
+"""
+
+import io
+import os
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .compression import detect_compression, open_input
+from .excel import SheetRef
+
+SAMPLE_BYTES = 1024 * 1024
+WORKING_SET_FACTOR = 2.0
+ASSUMED_COMPRESSION_RATIO = 5.0
+# Deep size of a DataFrame per byte of text it is parsed from, at most (one-character strings)
+MAX_EXPANSION = 30.0
+FORMAT_EXPANSION = {"json": 4.0, "excel": 10.0, "sqlite": 3.0, "visidata": 10.0}
+DEFAULT_BUDGET_FRACTION = 0.5
+
+# Tools that never hold a whole file in memory, suggested when a load is refused
+STREAMING_TOOLS = ("filter_data, group_by, query_data, convert_data or run_pipeline (filter, project, "
+                   "derive, group_by and a sort followed by a limit stream; a sort without a limit "
+                   "holds every row)")
+
+
+class MemoryBudgetError(ValueError):
+    """A file would not fit in the memory budget."""
+
+
+def _memory_limit() -> Optional[int]:
+    limits = []
+    try:
+        limits.append(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"))
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            value = f.read().strip()
+        if value != "max":
+            limits.append(int(value))
+    except (OSError, ValueError):
+        pass
+    return min(limits) if limits else None
+
+
+def memory_budget_bytes() -> Optional[int]:
+    """Memory one load may use (VISIDATA_MCP_MEMORY_BUDGET_MB), or None if unlimited."""
+    configured = os.environ.get("VISIDATA_MCP_MEMORY_BUDGET_MB")
+    if configured:
+        megabytes = float(configured)
+        return int(megabytes * 1024 * 1024) if megabytes > 0 else None
+    limit = _memory_limit()
+    return int(limit * DEFAULT_BUDGET_FRACTION) if limit else None
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+class LoadEstimate:
+    """Predicted memory use of loading a file, and whether it fits the budget."""
+
+    def __init__(self, file_path: str, file_bytes: int, estimated_bytes: int,
+                 budget_bytes: Optional[int], method: str):
+        self.file_path = file_path
+        self.file_bytes = file_bytes
+        self.estimated_bytes = estimated_bytes
+        self.budget_bytes = budget_bytes
+        self.method = method
+
+    @property
+    def required_bytes(self) -> int:
+        return int(self.estimated_bytes * WORKING_SET_FACTOR)
+
+    @property
+    def fits(self) -> bool:
+        return self.budget_bytes is None or self.required_bytes <= self.budget_bytes
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "file_bytes": self.file_bytes,
+            "estimated_frame_bytes": self.estimated_bytes,
+            "required_bytes": self.required_bytes,
+            "memory_budget_bytes": self.budget_bytes,
+            "estimate": self.method,
+        }
+
+    def message(self) -> str:
+        return (f"Loading {os.path.basename(self.file_path.rstrip(os.sep))} needs about "
+                f"{format_bytes(self.required_bytes)} of memory (a {format_bytes(self.estimated_bytes)} "
+                f"DataFrame estimated from {format_bytes(self.file_bytes)} on disk, plus working copies), "
+                f"more than the memory budget of {format_bytes(self.budget_bytes or 0)}. "
+                f"Use {STREAMING_TOOLS}, which stream the file, or raise VISIDATA_MCP_MEMORY_BUDGET_MB.")
+
+
+def _line_sample_ratio(file_path: str, fmt: str, columns: Optional[List[str]]) -> Optional[float]:
+    """Memory per byte of text of the first rows, or None if they cannot be parsed."""
+    with open_input(file_path) as f:
+        data = f.read(SAMPLE_BYTES)
+        at_end = not f.read(1)
+    # Cut at a line end; a quoted field spanning the cut makes the parse fail, so retry shorter
+    end = len(data)
+    for _ in range(4):
+        if not at_end or end < len(data):
+            end = data.rfind(b"\n", 0, end) + 1
+        if end <= 0:
+            return None
+        try:
+            if fmt == 'jsonl':
+                sample = pd.read_json(io.BytesIO(data[:end]), lines=True)
+                if columns is not None:
+                    sample = sample[[col for col in columns if col in sample.columns]]
+            else:
+                sample = pd.read_csv(io.BytesIO(data[:end]), sep='\t' if fmt == 'tsv' else ',',
+                                     usecols=columns)
+        except (ValueError, UnicodeDecodeError):
+            # ParserError is a ValueError
+            end -= 1
+            continue
+        return int(sample.memory_usage(deep=True).sum()) / end
+    return None
+
+
+def estimate_load(file_path: str, columns: Optional[List[str]] = None,
+                  file_type: Optional[str] = None, sheet: SheetRef = None) -> LoadEstimate:
+    """
+    Estimate the memory needed to load a file (or some of its columns) as one DataFrame.
+
+    Args:
+        file_path: Path to the data file, directory or glob
+        columns: Optional subset of columns that would be loaded
+        file_type: Optional explicit format hint
+        sheet: Excel sheet or table name, or 0-based index
+
+    Returns:
+        The estimate; check its fits property
+    """
+    from .loaders import SCHEMA_SAMPLE_ROWS, detect_format, file_fingerprint, sample_frame
+    from .partitions import discover_partitions, is_partitioned
+    from .sqlite_source import SqliteQuery
+
+    budget = memory_budget_bytes()
+    file_bytes = int(file_fingerprint(file_path)["size"])
+    sample_path = discover_partitions(file_path)[0].path if is_partitioned(file_path) else file_path
+    compressed = detect_compression(sample_path) is not None
+    text_bytes = file_bytes * (ASSUMED_COMPRESSION_RATIO if compressed else 1.0)
+
+    upper_bound = int(text_bytes * MAX_EXPANSION)
+    if budget is None or upper_bound * WORKING_SET_FACTOR <= budget:
+        return LoadEstimate(file_path, file_bytes, upper_bound, budget, "upper bound")
+
+    fmt = detect_format(file_path, file_type)
+    ratio = None
+    if fmt in ('csv', 'tsv', 'jsonl'):
+        try:
+            ratio = _line_sample_ratio(sample_path, fmt, columns)
+        except (OSError, ValueError):
+            ratio = None
+    if ratio is not None:
+        method = "sampled" + (f", assuming {ASSUMED_COMPRESSION_RATIO:g}x compression" if compressed else "")
+        return LoadEstimate(file_path, file_bytes, int(text_bytes * ratio), budget, method)
+    if fmt == 'sqlite' and sample_path == file_path:
+        sample = sample_frame(file_path, SCHEMA_SAMPLE_ROWS, columns=columns, file_type=file_type, sheet=sheet)
+        if len(sample):
+            rows = SqliteQuery(file_path, sheet).count()
+            per_row = sample.memory_usage(deep=True).sum() / len(sample)
+            return LoadEstimate(file_path, file_bytes, int(rows * per_row), budget, "sampled rows")
+    expansion = FORMAT_EXPANSION.get(fmt, MAX_EXPANSION)
+    return LoadEstimate(file_path, file_bytes, int(text_bytes * expansion), budget, f"{expansion:g}x file size")
+
+
+def check_collected(collected_bytes: int, budget_bytes: Optional[int], operation: str) -> None:
+    """
+    Refuse to keep collecting rows once they (plus working copies) exceed the budget.
+
+    Args:
+        collected_bytes: Deep memory size of the rows held so far
+        budget_bytes: The memory budget (memory_budget_bytes()), or None if unlimited
+        operation: What is collecting the rows, for the error message
+
+    Raises:
+        MemoryBudgetError: If the rows held would exceed the memory budget
+    """
+    if budget_bytes is None or collected_bytes * WORKING_SET_FACTOR <= budget_bytes:
+        return
+    raise MemoryBudgetError(
+        f"The rows collected for '{operation}' have reached {format_bytes(collected_bytes)}, which with working copies "
+        f"exceeds the memory budget of {format_bytes(budget_bytes)}. Filter or project the rows first, "
+        f"add a limit after the sort so it runs as a streaming top-k, or raise VISIDATA_MCP_MEMORY_BUDGET_MB.")
+
+
+def check_load(file_path: str, columns: Optional[List[str]] = None,
+               file_type: Optional[str] = None, sheet: SheetRef = None) -> LoadEstimate:
+    """
+    Estimate a load and refuse it if it does not fit.
+
+    Raises:
+        MemoryBudgetError: If the load would exceed the memory budget
+    """
+    estimate = estimate_load(file_path, columns=columns, file_type=file_type, sheet=sheet)
+    if not estimate.fits:
+        raise MemoryBudgetError(estimate.message())
+    return estimate
@@ -0,0 +1,422 @@
+"""
+Per-call performance metrics for the MCP tools.
+
+Every tool call is recorded with its wall time split into phases:
+
+- parse:     reading input files (loaders, SQLite queries)
+- render:    drawing and saving charts
+- serialize: encoding the JSON response
+- compute:   everything else
+
+Each record also holds the rows parsed, the size of the input files read,
+the peak resident memory during the call (Linux only; concurrent calls share
+the process-wide peak) and cache hits and misses (row indexes, dataset
+frames, charts). Phases are measured as self time, so a parse nested inside a
+render is counted once.
+
+The last WINDOW calls of each tool are kept for rolling percentiles and
+histograms, served as JSON by the ``visidata://metrics`` resource; lifetime
+counters and histograms are kept for Prometheus. Optionally every call is
+exported to a local file:
+
+    VISIDATA_MCP_METRICS_FILE    path of the export file (default: no export)
+    VISIDATA_MCP_METRICS_FORMAT  "jsonl" (one record appended per call) or
+                                 "prometheus" (text exposition format,
+                                 rewritten after each call, for a textfile
+                                 collector); default from the suffix: .prom
+                                 and .txt are Prometheus, anything else jsonl
+"""
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set
+
+import numpy as np
+
+from .profiling import attach_profile, profile_requested, run_profiled
+
+PHASES = ("parse", "compute", "render", "serialize")
+WINDOW = 1000
+RECENT_CALLS = 20
+# Upper bounds of the duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class CallRecord:
+    """Measurements of one tool call."""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.timestamp = time.time()
+        self.seconds = 0.0
+        self.status = "ok"
+        self.phases: Dict[str, float] = {}
+        self.rows = 0
+        self.bytes = 0
+        self.peak_rss_bytes: Optional[int] = None
+        self.caches: Dict[str, Dict[str, int]] = {}
+        self._files: Set[str] = set()
+        # Open phases: [name, start time, time spent in nested phases]
+        self._stack: List[list] = []
+
+    def in_phase(self, name: str) -> bool:
+        return any(frame[0] == name for frame in self._stack)
+
+    def add_file(self, source: Any) -> None:
+        """Count the size of an input file (a path, or an object with a file_path), once per call."""
+        path = getattr(source, "file_path", source)
+        if isinstance(path, str) and path not in self._files and os.path.isfile(path):
+            self._files.add(path)
+            self.bytes += os.path.getsize(path)
+
+    def as_dict(self) -> Dict[str, Any]:
+        phases = {name: round(seconds, 6) for name, seconds in self.phases.items() if seconds > 0}
+        return {
+            "tool": self.tool,
+            "timestamp": round(self.timestamp, 3),
+            "status": self.status,
+            "seconds": round(self.seconds, 6),
+            "phases": phases,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "caches": self.caches,
+        }
+
+
+_current: ContextVar[Optional[CallRecord]] = ContextVar("visidata_mcp_call", default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Attribute the time spent in the block to a phase of the current call."""
+    record = _current.get()
+    if record is None:
+        yield
+        return
+    frame = [name, time.perf_counter(), 0.0]
+    record._stack.append(frame)
+    try:
+        yield
+    finally:
+        record._stack.pop()
+        elapsed = time.perf_counter() - frame[1]
+        record.phases[name] = record.phases.get(name, 0.0) + elapsed - frame[2]
+        if record._stack:
+            record._stack[-1][2] += elapsed
+
+
+def measured(name: str, count_rows: bool = False) -> Callable:
+    """
+    Decorate a function (or generator function) so its time counts toward a phase.
+
+    Args:
+        name: Phase name
+        count_rows: Add the rows of the returned DataFrame (or yielded chunks) to
+            the call, unless the function runs inside another function of the
+            same phase; the first argument (a path, or an object with a
+            file_path) is counted as an input file
+    """
+    def decorate(function: Callable) -> Callable:
+        if inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def generator(*args: Any, **kwargs: Any) -> Iterator[Any]:
+                record = _current.get()
+                if record is None:
+                    yield from function(*args, **kwargs)
+                    return
+                outermost = count_rows and not record.in_phase(name)
+                if count_rows and args:
+                    record.add_file(args[0])
+                iterator = function(*args, **kwargs)
+                try:
+                    while True:
+                        with phase(name):
+                            try:
+                                item = next(iterator)
+                            except StopIteration:
+                                return
+                        if outermost:
+                            record.rows += len(item)
+                        yield item
+                finally:
+                    iterator.close()
+            return generator
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            record = _current.get()
+            if record is None:
+                return function(*args, **kwargs)
+            outermost = count_rows and not record.in_phase(name)
+            if count_rows and args:
+                record.add_file(args[0])
+            with phase(name):
+                result = function(*args, **kwargs)
+            if outermost and hasattr(result, "shape"):
+                record.rows += len(result)
+            return result
+        return wrapper
+    return decorate
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup of the current call."""
+    record = _current.get()
+    if record is not None:
+        counts = record.caches.setdefault(cache, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+
+
+def _reset_peak_rss() -> bool:
+    # Writing 5 to clear_refs resets the kernel's peak RSS (VmHWM) for this process
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def instrumented(function: Callable[..., str]) -> Callable[..., str]:
+    """
+    Record a metrics entry for every call of a tool (calls from inside another tool are part of it).
+
+    The tool also gains a keyword argument ``profile``: when true, or when
+    VISIDATA_MCP_PROFILE selects the tool, the call is profiled (see profiling.py).
+    """
+    @functools.wraps(function)
+    def wrapper(*args: Any, profile: bool = False, **kwargs: Any) -> str:
+        if _current.get() is not None:
+            return function(*args, **kwargs)
+        record = CallRecord(function.__name__)
+        token = _current.set(record)
+        measure_rss = _reset_peak_rss()
+        started = time.perf_counter()
+        try:
+            if profile_requested(record.tool, profile):
+                result, info = run_profiled(record.tool, function, *args, **kwargs)
+                result = attach_profile(result, info)
+            else:
+                result = function(*args, **kwargs)
+            if isinstance(result, str) and result.startswith("Error"):
+                record.status = "error"
+            return result
+        except BaseException:
+            record.status = "exception"
+            raise
+        finally:
+            record.seconds = time.perf_counter() - started
+            _current.reset(token)
+            record.phases["compute"] = max(0.0, record.seconds - sum(
+                seconds for name, seconds in record.phases.items() if name != "compute"))
+            if measure_rss:
+                record.peak_rss_bytes = _peak_rss_bytes()
+            get_registry().add(record)
+
+    # Advertise `profile` in the tool's schema, which is built from the signature
+    signature = inspect.signature(function)
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter("profile", inspect.Parameter.KEYWORD_ONLY, default=False, annotation=bool),
+    ])
+    return wrapper
+
+
+# -- aggregation ------------------------------------------------------------------
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"p50": round(float(p50), 6), "p90": round(float(p90), 6), "p99": round(float(p99), 6),
+            "max": round(max(values), 6)}
+
+
+def _histogram(values: List[float]) -> Dict[str, int]:
+    counts = np.searchsorted(np.sort(values), DURATION_BUCKETS, side="right")
+    histogram = {f"{bound:g}": int(count) for bound, count in zip(DURATION_BUCKETS, counts)}
+    histogram["+Inf"] = len(values)
+    return histogram
+
+
+class ToolStats:
+    """Lifetime counters and the rolling window of one tool's calls."""
+
+    def __init__(self) -> None:
+        self.calls: Dict[str, int] = {}
+        self.seconds = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.phase_seconds: Dict[str, float] = {}
+        self.rows = 0
+        self.bytes = 0
+        self.window: Deque[CallRecord] = deque(maxlen=WINDOW)
+
+    def add(self, record: CallRecord) -> None:
+        self.calls[record.status] = self.calls.get(record.status, 0) + 1
+        self.seconds += record.seconds
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if record.seconds <= bound:
+                self.buckets[i] += 1
+        for name, seconds in record.phases.items():
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+        self.rows += record.rows
+        self.bytes += record.bytes
+        self.window.append(record)
+
+    def summary(self) -> Dict[str, Any]:
+        window = list(self.window)
+        durations = [record.seconds for record in window]
+        peaks = [record.peak_rss_bytes for record in window if record.peak_rss_bytes is not None]
+        caches: Dict[str, Dict[str, int]] = {}
+        for record in window:
+            for cache, counts in record.caches.items():
+                total = caches.setdefault(cache, {"hits": 0, "misses": 0})
+                total["hits"] += counts["hits"]
+                total["misses"] += counts["misses"]
+        return {
+            "calls": sum(self.calls.values()),
+            "errors": self.calls.get("error", 0) + self.calls.get("exception", 0),
+            "window_calls": len(window),
+            "seconds": {**_percentiles(durations), "histogram": _histogram(durations)},
+            "phases": {name: _percentiles([record.phases.get(name, 0.0) for record in window])
+                       for name in PHASES if any(name in record.phases for record in window)},
+            "rows": _percentiles([float(record.rows) for record in window]),
+            "bytes": _percentiles([float(record.bytes) for record in window]),
+            "peak_rss_bytes": _percentiles([float(peak) for peak in peaks]),
+            "caches": caches,
+        }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """All tools' statistics, with the optional file export."""
+
+    def __init__(self, export_path: Optional[str] = None, export_format: Optional[str] = None):
+        self.started = time.time()
+        self.tools: Dict[str, ToolStats] = {}
+        self.caches: Dict[str, Dict[str, int]] = {}
+        self.recent: Deque[CallRecord] = deque(maxlen=RECENT_CALLS)
+        self.export_path = export_path
+        if export_format is None and export_path:
+            export_format = "prometheus" if export_path.endswith((".prom", ".txt")) else "jsonl"
+        self.export_format = export_format
+        self._lock = threading.Lock()
+
+    def add(self, record: CallRecord) -> None:
+        with self._lock:
+            self.tools.setdefault(record.tool, ToolStats()).add(record)
+            for cache, counts in record.caches.items():
+                total = self.caches.setdefault(cache, {"hits": 0, "misses": 0})
+                total["hits"] += counts["hits"]
+                total["misses"] += counts["misses"]
+            self.recent.append(record)
+            if self.export_path:
+                try:
+                    self._export(record)
+                except OSError:
+                    pass
+
+    def _export(self, record: CallRecord) -> None:
+        if self.export_format == "prometheus":
+            tmp = f"{self.export_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                f.write(self._prometheus_text())
+            os.replace(tmp, self.export_path)
+        else:
+            with open(self.export_path, "a") as f:
+                f.write(json.dumps(record.as_dict()) + "\n")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Rolling statistics of every tool, lifetime cache counts and the latest calls."""
+        with self._lock:
+            return {
+                "since": round(self.started, 3),
+                "window": WINDOW,
+                "tools": {tool: stats.summary() for tool, stats in sorted(self.tools.items())},
+                "caches": {cache: dict(counts) for cache, counts in sorted(self.caches.items())},
+                "recent_calls": [record.as_dict() for record in self.recent],
+                "export": ({"path": self.export_path, "format": self.export_format}
+                           if self.export_path else None),
+            }
+
+    def prometheus_text(self) -> str:
+        """Lifetime counters and histograms in the Prometheus text exposition format."""
+        with self._lock:
+            return self._prometheus_text()
+
+    def _prometheus_text(self) -> str:
+        lines = ["# HELP visidata_mcp_calls_total Tool calls by result status",
+                 "# TYPE visidata_mcp_calls_total counter"]
+        for tool, stats in sorted(self.tools.items()):
+            for status, count in sorted(stats.calls.items()):
+                lines.append(f'visidata_mcp_calls_total{{tool="{_label(tool)}",status="{status}"}} {count}')
+        lines += ["# HELP visidata_mcp_call_duration_seconds Tool call wall time",
+                  "# TYPE visidata_mcp_call_duration_seconds histogram"]
+        for tool, stats in sorted(self.tools.items()):
+            name = _label(tool)
+            total = sum(stats.calls.values())
+            bounds = [f"{bound:g}" for bound in DURATION_BUCKETS] + ["+Inf"]
+            for bound, count in zip(bounds, stats.buckets + [total]):
+                lines.append(f'visidata_mcp_call_duration_seconds_bucket{{tool="{name}",le="{bound}"}} {count}')
+            lines.append(f'visidata_mcp_call_duration_seconds_sum{{tool="{name}"}} {stats.seconds:.6f}')
+            lines.append(f'visidata_mcp_call_duration_seconds_count{{tool="{name}"}} {total}')
+        lines += ["# HELP visidata_mcp_phase_seconds_total Time spent per phase of the tool calls",
+                  "# TYPE visidata_mcp_phase_seconds_total counter"]
+        for tool, stats in sorted(self.tools.items()):
+            for phase_name, seconds in sorted(stats.phase_seconds.items()):
+                lines.append(f'visidata_mcp_phase_seconds_total{{tool="{_label(tool)}",phase="{phase_name}"}}'
+                             f' {seconds:.6f}')
+        for metric, text in (("rows", "Rows parsed"), ("bytes", "Size of the input files read")):
+            lines += [f"# HELP visidata_mcp_{metric}_total {text}",
+                      f"# TYPE visidata_mcp_{metric}_total counter"]
+            for tool, stats in sorted(self.tools.items()):
+                lines.append(f'visidata_mcp_{metric}_total{{tool="{_label(tool)}"}} {getattr(stats, metric)}')
+        lines += ["# HELP visidata_mcp_peak_rss_bytes Highest peak resident memory of the recent calls",
+                  "# TYPE visidata_mcp_peak_rss_bytes gauge"]
+        for tool, stats in sorted(self.tools.items()):
+            peaks = [record.peak_rss_bytes for record in stats.window if record.peak_rss_bytes is not None]
+            if peaks:
+                lines.append(f'visidata_mcp_peak_rss_bytes{{tool="{_label(tool)}"}} {max(peaks)}')
+        lines += ["# HELP visidata_mcp_cache_requests_total Cache lookups by result",
+                  "# TYPE visidata_mcp_cache_requests_total counter"]
+        for cache, counts in sorted(self.caches.items()):
+            for result, key in (("hit", "hits"), ("miss", "misses")):
+                lines.append(f'visidata_mcp_cache_requests_total{{cache="{_label(cache)}",result="{result}"}}'
+                             f' {counts[key]}')
+        return "\n".join(lines) + "\n"
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> MetricsRegistry:
+    """The process-wide metrics registry, configured from the environment."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry(os.environ.get("VISIDATA_MCP_METRICS_FILE") or None,
+                                        os.environ.get("VISIDATA_MCP_METRICS_FORMAT") or None)
+        return _registry
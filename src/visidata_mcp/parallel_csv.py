@@ -0,0 +1,217 @@
+"""
+Multi-core parsing of large CSV and TSV files by byte ranges.
+
+pandas parses a CSV on one core. A large file is instead cut into byte ranges
+that start and end on record boundaries, and each range is parsed by a worker
+process with the same column names and options; the pieces are then
+concatenated in file order (read_frame) or handed out as chunks (iter_chunks).
+
+The boundaries come from the file's row index (row_index.py), whose scan is
+quote-aware, so a newline inside a quoted field never splits a record. The
+scan is vectorized and several times faster than parsing, and it is cached on
+disk, so it is paid once per version of the file.
+
+Each range is checked as it is parsed: its first record must have one field
+per column and it must hold the number of rows the index expects. If a range
+fails to parse or fails a check (the index and pandas disagree about where
+records end), or a worker process dies, the file is parsed in a single pass
+instead, continuing after the chunks already handed out.
+
+Each worker infers column types for its own range. When ranges disagree (a
+column that is numeric in one range and text in another) the pieces are cast
+to the text type, so the column has one type throughout.
+
+Configuration (environment variables):
+    VISIDATA_MCP_PARSE_WORKERS  worker processes (default: one per core, at
+                                most 8; 1 disables parallel parsing)
+"""
+
+import io
+import os
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .partitions import MAX_WORKERS, process_pool
+from .row_index import DEFAULT_STRIDE, RowIndex, get_row_index, is_indexable
+
+# Files smaller than this are parsed in one pass
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+# Smallest byte range worth a worker task
+MIN_RANGE_BYTES = 8 * 1024 * 1024
+
+ByteRange = Tuple[int, int]
+
+
+class RangeParseError(ValueError):
+    """A byte range did not parse into the records the row index expects."""
+
+
+def parse_workers() -> int:
+    """Worker processes used for parsing (VISIDATA_MCP_PARSE_WORKERS, default: one per core)."""
+    configured = os.environ.get("VISIDATA_MCP_PARSE_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    return max(1, min(os.cpu_count() or 1, MAX_WORKERS))
+
+
+def use_parallel(file_path: str, fmt: str, workers: Optional[int] = None) -> bool:
+    """Whether a file is large enough, and the host has the cores, to parse it in parallel."""
+    if fmt not in ('csv', 'tsv') or (workers or parse_workers()) <= 1:
+        return False
+    return is_indexable(file_path, fmt) and os.path.getsize(file_path) >= PARALLEL_MIN_BYTES
+
+
+def split_ranges(index: RowIndex, parts: int) -> List[ByteRange]:
+    """
+    Cut a file's data records into about `parts` byte ranges of similar size.
+
+    Ranges start at indexed records, so they never split a record.
+    """
+    if index.total_rows == 0:
+        return []
+    file_size = os.path.getsize(index.file_path)
+    starts = index.offsets
+    targets = np.linspace(starts[0], file_size, parts + 1)[1:-1]
+    nearest = np.minimum(np.searchsorted(starts, targets), len(starts) - 1)
+    cuts = np.unique(np.concatenate((starts[:1], starts[nearest])))
+    bounds = [int(cut) for cut in cuts] + [file_size]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def chunk_ranges(index: RowIndex, chunksize: int) -> List[ByteRange]:
+    """Byte ranges of chunksize records each."""
+    if index.total_rows == 0:
+        return []
+    bounds = [int(offset) for offset in index.offsets[::chunksize // index.stride]]
+    bounds.append(os.path.getsize(index.file_path))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def expected_rows(index: RowIndex, ranges: List[ByteRange]) -> List[int]:
+    """Rows the index places in each of consecutive ranges that start at indexed records."""
+    starts = [int(row) * index.stride for row in np.searchsorted(index.offsets, [start for start, _ in ranges])]
+    return [end - start for start, end in zip(starts, starts[1:] + [index.total_rows])]
+
+
+def parse_range(file_path: str, byte_range: ByteRange, sep: str, names: List[str],
+                columns: Optional[List[str]] = None, rows: Optional[int] = None) -> pd.DataFrame:
+    """
+    Worker task: parse the records in one byte range of a file.
+
+    Raises:
+        RangeParseError: If the range does not start with a whole record or
+            does not hold the expected number of rows
+    """
+    start, end = byte_range
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    first = pd.read_csv(io.BytesIO(data), sep=sep, header=None, nrows=1, dtype=str)
+    if len(first.columns) != len(names):
+        raise RangeParseError(f"Record at byte {start} has {len(first.columns)} fields, expected {len(names)}")
+    # A range is small enough to type each column in one go rather than per internal block
+    piece = pd.read_csv(io.BytesIO(data), sep=sep, header=None, names=names, usecols=columns, low_memory=False)
+    if rows is not None and len(piece) != rows:
+        raise RangeParseError(f"Bytes {start}-{end} hold {len(piece)} rows, expected {rows}")
+    return piece
+
+
+def _unify_dtypes(pieces: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    """Cast columns read as numbers in some ranges and as text in others to text everywhere."""
+    casts = {}
+    for col in pieces[0].columns:
+        dtypes = [piece[col].dtype for piece in pieces]
+        if any(dtype != dtypes[0] for dtype in dtypes):
+            text = next((dtype for dtype in dtypes if pd.api.types.is_string_dtype(dtype)), None)
+            if text is not None:
+                casts[col] = text
+    return [piece.astype(casts) for piece in pieces] if casts else pieces
+
+
+def read_csv_parallel(file_path: str, fmt: str = 'csv', columns: Optional[List[str]] = None,
+                      workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Parse a whole CSV or TSV file with several worker processes.
+
+    Args:
+        file_path: Path to an uncompressed CSV or TSV file
+        fmt: 'csv' or 'tsv'
+        columns: Optional subset of columns to parse
+        workers: Worker processes (default: parse_workers())
+
+    Returns:
+        The DataFrame pd.read_csv(..., low_memory=False) would return
+    """
+    workers = workers or parse_workers()
+    index = get_row_index(file_path, file_type=fmt)
+    missing = [col for col in columns or [] if col not in index.columns]
+    if missing:
+        raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+    file_size = os.path.getsize(file_path)
+    parts = max(1, min(workers * 2, file_size // MIN_RANGE_BYTES))
+    ranges = split_ranges(index, parts)
+    if not ranges:
+        return pd.DataFrame(columns=columns or index.columns)
+    try:
+        with process_pool.lease(workers) as pool:
+            futures = [pool.submit(parse_range, file_path, byte_range, index.sep, index.columns, columns, rows)
+                       for byte_range, rows in zip(ranges, expected_rows(index, ranges))]
+            pieces = [future.result() for future in futures]
+    except (pd.errors.ParserError, RangeParseError, BrokenProcessPool):
+        # The index does not match how pandas reads the file, or a worker died; parse it in one pass
+        return pd.read_csv(file_path, sep=index.sep, usecols=columns, low_memory=False)
+    return pd.concat(_unify_dtypes(pieces), ignore_index=True)
+
+
+def iter_csv_parallel(file_path: str, fmt: str = 'csv', columns: Optional[List[str]] = None,
+                      chunksize: int = 100_000, workers: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Parse a CSV or TSV file in chunks of chunksize rows, several chunks at a time.
+
+    At most two chunks per worker are in flight, so memory stays bounded.
+    chunksize must be a multiple of the row index stride.
+
+    Yields:
+        DataFrame chunks in file order
+    """
+    workers = workers or parse_workers()
+    index = get_row_index(file_path, file_type=fmt)
+    ranges = chunk_ranges(index, chunksize)
+    pending: "deque[Future]" = deque()
+    yielded = 0
+    try:
+        with process_pool.lease(workers) as pool:
+            try:
+                for byte_range, rows in zip(ranges, expected_rows(index, ranges)):
+                    pending.append(pool.submit(parse_range, file_path, byte_range, index.sep, index.columns,
+                                               columns, rows))
+                    if len(pending) >= workers * 2:
+                        chunk = pending.popleft().result()
+                        yielded += len(chunk)
+                        yield chunk
+                while pending:
+                    chunk = pending.popleft().result()
+                    yielded += len(chunk)
+                    yield chunk
+                return
+            finally:
+                # A reader that stops early leaves chunks nobody will collect
+                for future in pending:
+                    future.cancel()
+    except (pd.errors.ParserError, RangeParseError, BrokenProcessPool):
+        pass
+
+    # The index does not match how pandas reads the file, or a worker died: continue in one pass
+    # after the rows handed out
+    with pd.read_csv(file_path, sep=index.sep, usecols=columns, chunksize=chunksize) as reader:
+        for chunk in reader:
+            if yielded >= len(chunk):
+                yielded -= len(chunk)
+                continue
+            yield chunk.iloc[yielded:]
+            yielded = 0
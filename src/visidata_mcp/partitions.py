@@ -0,0 +1,174 @@
+"""
+Partitioned datasets: a directory or glob of files read as one table.
+
+Exports often arrive as one file per day or per key, e.g.
+``jobs/2024-10-*.csv`` or a Hive-style tree such as
+``jobs/country=Germany/date=2024-10-01/part-0.csv``. Any tool's file_path may
+be such a directory or glob pattern. The matching files are the partitions,
+read in sorted path order; ``key=value`` directory names become columns of
+every row in that partition (numeric when every value is a number).
+
+Filters on a partition column are answered from the paths alone, so
+partitions that cannot match are never opened. Whole-file reads and
+per-partition analyses run in a pool of worker processes, one partition per
+task, and their partial results are merged by the caller.
+"""
+
+import glob
+import os
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import unquote
+
+import pandas as pd
+
+from .compression import strip_compression
+from .worker_pool import WorkerPool
+
+# File types picked up when a directory is given (files are matched by suffix)
+DATA_SUFFIXES = ('csv', 'tsv', 'json', 'jsonl', 'ndjson', 'xlsx', 'xls', 'parquet', 'feather', 'arrow')
+
+MAX_WORKERS = 8
+
+# Worker processes for partition reads and parallel CSV parsing
+process_pool = WorkerPool()
+
+
+class Partition(NamedTuple):
+    """One file of a partitioned dataset and the partition column values from its path."""
+
+    path: str
+    values: Dict[str, Any]
+
+
+def is_partitioned(file_path: str) -> bool:
+    """Whether a path names several files: a directory or a glob pattern."""
+    return os.path.isdir(file_path) or glob.has_magic(file_path)
+
+
+def _is_data_file(path: str) -> bool:
+    name = os.path.basename(path)
+    # Skip hidden files and markers such as _SUCCESS
+    if name.startswith(('.', '_')):
+        return False
+    return Path(strip_compression(path)).suffix.lower().lstrip('.') in DATA_SUFFIXES
+
+
+def _hive_values(path: str, root: str) -> Dict[str, str]:
+    values = {}
+    relative = os.path.relpath(os.path.dirname(path), root)
+    for segment in Path(relative).parts:
+        key, sep, value = segment.partition('=')
+        if sep and key:
+            values[unquote(key)] = unquote(value)
+    return values
+
+
+def _typed(values: List[str]) -> List[Any]:
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+    if numbers.notna().all():
+        return [int(n) if float(n).is_integer() else float(n) for n in numbers]
+    return values
+
+
+def discover_partitions(file_path: str) -> List[Partition]:
+    """
+    List the partitions of a directory or glob pattern.
+
+    Raises:
+        FileNotFoundError: If nothing matches
+        ValueError: If files disagree about their partition columns
+    """
+    if os.path.isdir(file_path):
+        root = file_path
+        paths = [os.path.join(directory, name)
+                 for directory, _, names in os.walk(file_path) for name in names]
+        paths = [path for path in paths if _is_data_file(path)]
+    else:
+        # The directories before the first wildcard are the root of the partition paths
+        parts = Path(file_path).parts
+        fixed = parts[:next(i for i, part in enumerate(parts) if glob.has_magic(part))]
+        root = str(Path(*fixed)) if fixed else "."
+        paths = [path for path in glob.glob(file_path, recursive=True) if os.path.isfile(path)]
+    if not paths:
+        raise FileNotFoundError(f"No data files match '{file_path}'")
+    paths.sort()
+
+    raw = [_hive_values(path, root) for path in paths]
+    keys = list(raw[0])
+    if any(list(values) != keys for values in raw):
+        raise ValueError(f"Partition directories under '{file_path}' do not all use the same key=value columns")
+    columns = {key: _typed([values[key] for values in raw]) for key in keys}
+    return [Partition(path, {key: columns[key][i] for key in keys}) for i, path in enumerate(paths)]
+
+
+def partition_keys(partitions: List[Partition]) -> List[str]:
+    """Names of the partition columns."""
+    return list(partitions[0].values) if partitions else []
+
+
+def partition_frame(partitions: List[Partition]) -> pd.DataFrame:
+    """One row of partition column values per partition, for evaluating filters on paths."""
+    return pd.DataFrame([partition.values for partition in partitions], columns=partition_keys(partitions))
+
+
+def add_partition_columns(chunk: pd.DataFrame, partition: Partition,
+                          columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Append a partition's column values to a chunk read from its file.
+
+    Args:
+        chunk: Rows read from the partition's file
+        partition: The partition the rows came from
+        columns: Optional output columns and their order
+    """
+    missing = {key: value for key, value in partition.values.items()
+               if key not in chunk.columns and (columns is None or key in columns)}
+    if missing:
+        chunk = chunk.assign(**missing)
+    return chunk[columns] if columns is not None else chunk
+
+
+def fingerprint(file_path: str) -> Dict[str, Any]:
+    """Size and modification time of a partitioned dataset, changing when any file does."""
+    size = 0
+    mtime_ns = 0
+    partitions = discover_partitions(file_path)
+    for partition in partitions:
+        stat = os.stat(partition.path)
+        size += stat.st_size
+        mtime_ns = max(mtime_ns, stat.st_mtime_ns)
+    return {"path": os.path.abspath(file_path), "size": size, "mtime_ns": mtime_ns,
+            "partitions": len(partitions)}
+
+
+# -- parallel execution ---------------------------------------------------------
+
+def default_workers(partition_count: int) -> int:
+    """Worker processes used for a number of partitions: one per core, at most MAX_WORKERS."""
+    return max(1, min(partition_count, os.cpu_count() or 1, MAX_WORKERS))
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes."""
+    process_pool.shutdown()
+
+
+def map_partitions(function: Callable[..., Any], partitions: List[Partition],
+                   workers: Optional[int] = None, **kwargs: Any) -> List[Any]:
+    """
+    Run function(partition, **kwargs) for every partition, in parallel processes.
+
+    The function must be importable at module level. With a single worker
+    (or a single partition) it runs in this process.
+
+    Returns:
+        The results, in partition order
+    """
+    workers = workers or default_workers(len(partitions))
+    task = partial(function, **kwargs)
+    if workers <= 1 or len(partitions) <= 1:
+        return [task(partition) for partition in partitions]
+    with process_pool.lease(workers) as pool:
+        return list(pool.map(task, partitions))
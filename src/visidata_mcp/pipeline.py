@@ -0,0 +1,669 @@
+"""
+Lazy query pipelines for the run_pipeline tool.
+
+A pipeline is an ordered list of operation dicts (filter, project, derive,
+group_by, sort, limit, write) applied to a single input file. Building a
+Pipeline only validates the operations and produces a plan; nothing is read
+until execute() is called. Before execution the plan is optimized:
+
+- projections are pushed down so the reader only parses referenced columns
+- filters are moved ahead of derive/project steps so they run right after parsing
+- a sort directly followed by a limit becomes a streaming top-k
+- row-wise operations are fused and run chunk by chunk in one pass, and a
+  limit stops reading the file as soon as it is satisfied
+- on a SQLite table the leading filters, the projection and a first sort,
+  top-k, limit or group_by run inside the database as one SELECT
+- on a partitioned dataset, leading filters on partition columns skip the
+  partitions whose path values cannot match
+
+Blocking operations (sort, group_by) end a stage; the stages that follow run
+over their in-memory result. A sort without a limit, and rows a database
+sorted or grouped, are collected in memory and checked against the memory
+budget as they accumulate.
+"""
+
+import ast
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from .aggregate import HashAggregator, normalize_aggregations
+from .loaders import (DEFAULT_CHUNKSIZE, ChunkWriter, detect_format, iter_chunks, iter_partition_chunks,
+                      read_columns)
+from .memory_guard import check_collected, memory_budget_bytes
+from .partitions import Partition, discover_partitions, is_partitioned, partition_frame, partition_keys
+from .serialization import frame_to_records
+from .sqlite_source import SqliteQuery, can_push_aggregations
+
+FILTER_CONDITIONS = ("equals", "contains", "greater_than", "less_than")
+STREAMING_OPS = ("filter", "project", "derive", "limit")
+BLOCKING_OPS = ("sort", "top_k", "group_by")
+
+OP_ALIASES = {
+    "select": "project",
+    "group": "group_by",
+    "aggregate": "group_by",
+    "head": "limit",
+    "save": "write",
+}
+
+
+class PipelineError(ValueError):
+    """Raised when a pipeline definition is invalid."""
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+# What a derive expression may contain: column names, numbers and operators
+EXPRESSION_NODES = (
+    ast.Expression, ast.Name, ast.Load, ast.Constant, ast.BinOp, ast.UnaryOp, ast.Compare, ast.BoolOp,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.UAdd, ast.USub, ast.Not, ast.Invert, ast.BitAnd, ast.BitOr, ast.And, ast.Or,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+
+
+def expression_columns(expression: str) -> Set[str]:
+    """
+    Check a derive expression and return the column names it refers to.
+
+    Only column names (plain, or quoted in backticks), numeric and boolean
+    literals and arithmetic, comparison and logical operators are allowed,
+    so DataFrame.eval never sees local variable references (@name),
+    attribute access or function calls.
+
+    Raises:
+        PipelineError: If the expression contains anything else
+    """
+    if '@' in expression:
+        raise PipelineError(f"Expression '{expression}': '@' variable references are not allowed")
+    quoted: Dict[str, str] = {}
+
+    def placeholder(match: "re.Match[str]") -> str:
+        name = f"__column_{len(quoted)}__"
+        quoted[name] = match.group(1)
+        return name
+
+    try:
+        tree = ast.parse(re.sub(r'`([^`]*)`', placeholder, expression), mode='eval')
+    except SyntaxError:
+        raise PipelineError(f"Expression '{expression}' is not valid")
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, EXPRESSION_NODES):
+            raise PipelineError(f"Expression '{expression}': {type(node).__name__} is not allowed; "
+                                "use column names, numbers and arithmetic or comparison operators")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise PipelineError(f"Expression '{expression}': only numeric literals are allowed")
+        if isinstance(node, ast.Name):
+            names.add(quoted.get(node.id, node.id))
+    return names
+
+
+def normalize_operation(op: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """
+    Validate one operation dict and fill in defaults.
+
+    Args:
+        op: Operation as supplied by the caller
+        index: Position of the operation, used in error messages
+
+    Returns:
+        A normalized copy of the operation
+    """
+    if not isinstance(op, dict) or "op" not in op:
+        raise PipelineError(f"Operation {index} must be an object with an 'op' key")
+
+    name = OP_ALIASES.get(str(op["op"]).lower(), str(op["op"]).lower())
+    where = f"Operation {index} ({name})"
+
+    if name == "filter":
+        condition = op.get("condition", "equals")
+        if condition not in FILTER_CONDITIONS:
+            raise PipelineError(f"{where}: unknown condition '{condition}'. Use: {', '.join(FILTER_CONDITIONS)}")
+        if "column" not in op or "value" not in op:
+            raise PipelineError(f"{where}: 'column' and 'value' are required")
+        value = str(op["value"])
+        if condition in ("greater_than", "less_than"):
+            try:
+                float(value)
+            except ValueError:
+                raise PipelineError(f"{where}: cannot convert '{value}' to number for {condition} comparison")
+        return {"op": name, "column": op["column"], "condition": condition, "value": value}
+
+    if name == "project":
+        columns = _as_list(op.get("columns"))
+        if not columns:
+            raise PipelineError(f"{where}: 'columns' must list at least one column")
+        return {"op": name, "columns": columns}
+
+    if name == "derive":
+        if not op.get("column") or not op.get("expression"):
+            raise PipelineError(f"{where}: 'column' and 'expression' are required")
+        try:
+            expression_columns(str(op["expression"]))
+        except PipelineError as e:
+            raise PipelineError(f"{where}: {e}")
+        return {"op": name, "column": op["column"], "expression": str(op["expression"])}
+
+    if name == "group_by":
+        keys = _as_list(op.get("keys", op.get("by")))
+        if not keys:
+            raise PipelineError(f"{where}: 'keys' must list at least one column")
+        try:
+            aggregations = normalize_aggregations(op.get("aggregations"))
+        except ValueError as e:
+            raise PipelineError(f"{where}: {e}")
+        return {"op": name, "keys": keys, "aggregations": aggregations}
+
+    if name == "sort":
+        columns = _as_list(op.get("columns", op.get("column")))
+        if not columns:
+            raise PipelineError(f"{where}: 'column' is required")
+        return {"op": name, "columns": columns, "descending": bool(op.get("descending", False))}
+
+    if name == "limit":
+        try:
+            rows = int(op.get("rows", op.get("n")))
+        except (TypeError, ValueError):
+            raise PipelineError(f"{where}: 'rows' must be an integer")
+        if rows < 0:
+            raise PipelineError(f"{where}: 'rows' must not be negative")
+        return {"op": name, "rows": rows}
+
+    if name == "write":
+        if not op.get("path"):
+            raise PipelineError(f"{where}: 'path' is required")
+        return {"op": name, "path": op["path"], "format": op.get("format")}
+
+    raise PipelineError(
+        f"Operation {index}: unknown op '{op['op']}'. "
+        "Use: filter, project, derive, group_by, sort, limit, write"
+    )
+
+
+def describe_operation(op: Dict[str, Any]) -> str:
+    """Render an operation as a short human-readable string for plans."""
+    name = op["op"]
+    if name == "filter":
+        return f"filter {op['column']} {op['condition']} {op['value']}"
+    if name == "project":
+        return f"project {', '.join(op['columns'])}"
+    if name == "derive":
+        return f"derive {op['column']} = {op['expression']}"
+    if name == "group_by":
+        aggs = ', '.join(a["as"] for a in op["aggregations"])
+        return f"group_by {', '.join(op['keys'])} -> {aggs}"
+    if name == "sort":
+        return f"sort {', '.join(op['columns'])}{' desc' if op['descending'] else ''}"
+    if name == "top_k":
+        return f"top_k {op['rows']} by {', '.join(op['columns'])}{' desc' if op['descending'] else ''}"
+    if name == "limit":
+        return f"limit {op['rows']}"
+    return f"write {op['path']}"
+
+
+def filter_mask(df: pd.DataFrame, column: str, condition: str, value: str) -> pd.Series:
+    """Boolean mask with the same semantics as the filter_data tool."""
+    if condition == "equals":
+        return df[column].astype(str) == value
+    if condition == "contains":
+        return df[column].astype(str).str.contains(value, case=False, na=False)
+    numeric = pd.to_numeric(df[column], errors='coerce')
+    if condition == "greater_than":
+        return numeric > float(value)
+    return numeric < float(value)
+
+
+def prune_partitions(partitions: List[Partition], column: str, condition: str, value: str) -> List[Partition]:
+    """The partitions that can hold rows matching a filter; all of them unless it is on a partition column."""
+    if column not in partition_keys(partitions):
+        return partitions
+    keep = filter_mask(partition_frame(partitions), column, condition, value)
+    return [partition for partition, kept in zip(partitions, keep) if kept]
+
+
+def filter_partition(partition: Partition, column: str, condition: str, value: str,
+                     keep_rows: bool = False, sheet: Optional[str] = None) -> Tuple[int, int, Optional[pd.DataFrame]]:
+    """
+    Worker task: filter one partition of a partitioned dataset.
+
+    Returns:
+        (rows read, rows matched, the matching rows if keep_rows else None)
+    """
+    rows = 0
+    matched = 0
+    kept: List[pd.DataFrame] = []
+    for chunk in iter_partition_chunks(partition, sheet=sheet):
+        matches = chunk[filter_mask(chunk, column, condition, value)]
+        rows += len(chunk)
+        matched += len(matches)
+        if keep_rows:
+            kept.append(matches)
+    return rows, matched, pd.concat(kept, ignore_index=True) if keep_rows else None
+
+
+class Pipeline:
+    """
+    A lazily evaluated, optimized query plan over one input file.
+
+    Args:
+        file_path: Path to the data file
+        operations: Ordered list of operation dicts
+        chunksize: Rows per chunk for the streaming scan
+    """
+
+    def __init__(self, file_path: str, operations: List[Dict[str, Any]],
+                 chunksize: int = DEFAULT_CHUNKSIZE):
+        if not operations:
+            raise PipelineError("Pipeline needs at least one operation")
+        self.file_path = file_path
+        self.chunksize = chunksize
+        self.source_columns = read_columns(file_path)
+        self.optimizations: List[str] = []
+
+        ops = [normalize_operation(op, i) for i, op in enumerate(operations)]
+        self.write_op = None
+        if ops[-1]["op"] == "write":
+            self.write_op = ops.pop()
+        if any(op["op"] == "write" for op in ops):
+            raise PipelineError("'write' can only be the last operation")
+
+        self.output_columns = self._validate(ops)
+        self.operations = self._optimize(ops)
+        self.scan_columns = self._pushdown_projection(self.operations)
+        self.stages = self._build_stages(self.operations)
+        self.sql_query = self._pushdown_sql() if detect_format(file_path) == 'sqlite' else None
+        self.partitions = self._prune_partitions() if is_partitioned(file_path) else None
+
+    # -- planning -------------------------------------------------------------
+
+    def _validate(self, ops: List[Dict[str, Any]]) -> List[str]:
+        """Check column references against the schema flowing through the plan."""
+        columns = list(self.source_columns)
+
+        def require(names: List[str], index: int, op: Dict[str, Any]) -> None:
+            missing = [n for n in names if n not in columns]
+            if missing:
+                raise PipelineError(
+                    f"Operation {index} ({op['op']}): columns not found: {missing}. "
+                    f"Available columns: {columns}"
+                )
+
+        for i, op in enumerate(ops):
+            if op["op"] == "filter":
+                require([op["column"]], i, op)
+            elif op["op"] == "project":
+                require(op["columns"], i, op)
+                columns = list(op["columns"])
+            elif op["op"] == "derive":
+                refs = sorted(expression_columns(op["expression"]))
+                require(refs, i, op)
+                op["_refs"] = refs
+                if op["column"] not in columns:
+                    columns.append(op["column"])
+            elif op["op"] == "group_by":
+                require(op["keys"] + [a["column"] for a in op["aggregations"] if a["column"]], i, op)
+                columns = op["keys"] + [a["as"] for a in op["aggregations"]]
+            elif op["op"] == "sort":
+                require(op["columns"], i, op)
+        return columns
+
+    def _optimize(self, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ops = list(ops)
+
+        # Filter pushdown: run filters before derived columns and projections
+        for i in range(len(ops)):
+            if ops[i]["op"] != "filter":
+                continue
+            j = i
+            while j > 0 and (ops[j - 1]["op"] == "project" or
+                             (ops[j - 1]["op"] == "derive" and ops[j - 1]["column"] != ops[j]["column"])):
+                ops[j - 1], ops[j] = ops[j], ops[j - 1]
+                j -= 1
+            if j != i:
+                self.optimizations.append(
+                    f"pushed '{describe_operation(ops[j])}' ahead of {i - j} projection/derive step(s)")
+
+        # Sort + limit fusion into a streaming top-k
+        fused = []
+        for op in ops:
+            if op["op"] == "limit" and fused and fused[-1]["op"] == "sort":
+                sort = fused.pop()
+                fused.append({"op": "top_k", "columns": sort["columns"],
+                              "descending": sort["descending"], "rows": op["rows"]})
+                self.optimizations.append(
+                    f"fused sort and limit into streaming top-{op['rows']} (no full sort)")
+            else:
+                fused.append(op)
+        return fused
+
+    def _pushdown_projection(self, ops: List[Dict[str, Any]]) -> Optional[List[str]]:
+        """Work backwards from the output to find which source columns are needed."""
+        needed: Optional[Set[str]] = None
+        for op in reversed(ops):
+            name = op["op"]
+            if name == "project":
+                needed = set(op["columns"])
+            elif name == "group_by":
+                needed = set(op["keys"]) | {a["column"] for a in op["aggregations"] if a["column"]}
+            elif name == "derive":
+                if needed is not None:
+                    needed.discard(op["column"])
+                    needed |= set(op["_refs"])
+            elif name == "filter" and needed is not None:
+                needed.add(op["column"])
+            elif name in ("sort", "top_k") and needed is not None:
+                needed |= set(op["columns"])
+
+        if needed is None:
+            return None
+        columns = [col for col in self.source_columns if col in needed]
+        if len(columns) < len(self.source_columns):
+            self.optimizations.append(
+                f"projection pushdown: reading {len(columns)} of {len(self.source_columns)} columns")
+        return columns
+
+    def _build_stages(self, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        stages = []
+        current: List[Dict[str, Any]] = []
+        for op in ops:
+            if op["op"] in BLOCKING_OPS:
+                stages.append({"operators": current, "sink": op})
+                current = []
+            else:
+                current.append(op)
+        stages.append({"operators": current, "sink": None})
+        if any(op["op"] == "limit" for op in stages[0]["operators"]):
+            self.optimizations.append("limit pushdown: the scan stops once enough rows have been produced")
+        return stages
+
+    def _pushdown_sql(self) -> SqliteQuery:
+        """Move the leading filters and the first blocking operation of a SQLite scan into SQL."""
+        query = SqliteQuery(self.file_path)
+        if self.scan_columns is not None:
+            query.select(self.scan_columns)
+        stage = self.stages[0]
+        operators = stage["operators"]
+
+        filters = 0
+        while filters < len(operators) and operators[filters]["op"] == "filter":
+            op = operators[filters]
+            query.where(op["column"], op["condition"], op["value"])
+            filters += 1
+        rest = operators[filters:]
+        stage["operators"] = rest
+        if filters:
+            self.optimizations.append(f"pushed {filters} filter(s) into the SQLite WHERE clause")
+
+        sink = stage["sink"]
+        if sink is not None and all(op["op"] == "project" for op in rest):
+            if sink["op"] == "group_by" and can_push_aggregations(sink["aggregations"]):
+                query.group_by(sink["keys"], sink["aggregations"])
+                # The database returns the groups; projections before them no longer apply
+                stage["operators"] = []
+                sink["pushed"] = True
+                self.optimizations.append("pushed group_by into SQLite GROUP BY")
+            elif sink["op"] in ("sort", "top_k"):
+                query.order_by(sink["columns"], descending=sink["descending"])
+                if sink["op"] == "top_k":
+                    query.limit(sink["rows"])
+                sink["pushed"] = True
+                self.optimizations.append(f"pushed {sink['op']} into SQLite ORDER BY"
+                                          + (" ... LIMIT" if sink["op"] == "top_k" else ""))
+        elif sink is None:
+            limits = [op["rows"] for op in rest if op["op"] == "limit"]
+            if limits and all(op["op"] in ("project", "limit") for op in rest):
+                query.limit(min(limits))
+                self.optimizations.append("pushed limit into SQLite LIMIT")
+        return query
+
+    def _prune_partitions(self) -> List[Partition]:
+        """Drop the partitions the leading filters rule out by their path values alone."""
+        partitions = discover_partitions(self.file_path)
+        kept = partitions
+        for op in self.stages[0]["operators"]:
+            if op["op"] != "filter":
+                break
+            kept = prune_partitions(kept, op["column"], op["condition"], op["value"])
+        if len(kept) < len(partitions):
+            self.optimizations.append(f"partition pruning: reading {len(kept)} of {len(partitions)} partitions")
+        return kept
+
+    def explain(self) -> Dict[str, Any]:
+        """Describe the optimized plan without running it."""
+        stages = []
+        for i, stage in enumerate(self.stages):
+            source = (f"scan {self.file_path}" if i == 0 else f"result of stage {i}")
+            sink = stage["sink"]
+            if sink is None:
+                sink_text = (describe_operation(self.write_op) if self.write_op else "collect preview")
+            else:
+                sink_text = describe_operation(sink) + (" (in SQLite)" if sink.get("pushed") else "")
+            stages.append({
+                "stage": i + 1,
+                "source": source,
+                "fused_operators": [describe_operation(op) for op in stage["operators"]],
+                "sink": sink_text,
+            })
+        plan = {
+            "columns_read": self.scan_columns if self.scan_columns is not None else self.source_columns,
+            "optimizations": self.optimizations,
+            "stages": stages,
+        }
+        if self.sql_query is not None:
+            plan["sql"] = self.sql_query.sql()[0]
+        return plan
+
+    # -- execution ------------------------------------------------------------
+
+    def _scan(self, stats: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+        if self.sql_query is not None:
+            reader = self.sql_query.iter_chunks(self.chunksize)
+        elif self.partitions is not None:
+            reader = (chunk for partition in self.partitions
+                      for chunk in iter_partition_chunks(partition, columns=self.scan_columns,
+                                                         chunksize=self.chunksize))
+        else:
+            reader = iter_chunks(self.file_path, columns=self.scan_columns, chunksize=self.chunksize)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    chunk = next(reader)
+                except StopIteration:
+                    stats["seconds"] += time.perf_counter() - start
+                    stats["completed"] = True
+                    return
+                stats["seconds"] += time.perf_counter() - start
+                stats["chunks"] += 1
+                stats["rows_read"] += len(chunk)
+                yield chunk
+        finally:
+            reader.close()
+
+    def _stream(self, chunks: Iterator[pd.DataFrame], operators: List[Dict[str, Any]],
+                op_stats: List[Dict[str, Any]]) -> Iterator[pd.DataFrame]:
+        """Apply fused row-wise operators to each chunk, stopping early on limits."""
+        remaining = {i: op["rows"] for i, op in enumerate(operators) if op["op"] == "limit"}
+        for chunk in chunks:
+            for i, op in enumerate(operators):
+                start = time.perf_counter()
+                op_stats[i]["rows_in"] += len(chunk)
+                if op["op"] == "filter":
+                    chunk = chunk[filter_mask(chunk, op["column"], op["condition"], op["value"])]
+                elif op["op"] == "project":
+                    chunk = chunk[op["columns"]]
+                elif op["op"] == "derive":
+                    chunk = chunk.assign(**{op["column"]: chunk.eval(op["expression"], local_dict={}, global_dict={})})
+                elif op["op"] == "limit":
+                    chunk = chunk.iloc[:remaining[i]]
+                    remaining[i] -= len(chunk)
+                op_stats[i]["rows_out"] += len(chunk)
+                op_stats[i]["seconds"] += time.perf_counter() - start
+            yield chunk
+            if any(left <= 0 for left in remaining.values()):
+                return
+
+    def _run_sink(self, chunks: Iterator[pd.DataFrame], sink: Dict[str, Any],
+                  sink_stats: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Consume every chunk into a blocking operator and return its result.
+
+        Raises:
+            MemoryBudgetError: If the rows a sort collects exceed the memory budget
+        """
+        budget = memory_budget_bytes()
+        collected = 0
+        if sink.get("pushed"):
+            # The database already grouped or sorted the rows; just collect them
+            kept = []
+            for chunk in chunks:
+                start = time.perf_counter()
+                sink_stats["rows_in"] += len(chunk)
+                kept.append(chunk)
+                if budget is not None:
+                    collected += int(chunk.memory_usage(deep=True).sum())
+                    check_collected(collected, budget, describe_operation(sink))
+                sink_stats["seconds"] += time.perf_counter() - start
+            start = time.perf_counter()
+            result = (pd.concat(kept, ignore_index=True) if kept
+                      else pd.DataFrame(columns=self.sql_query.output_columns))
+        elif sink["op"] == "group_by":
+            with HashAggregator(sink["keys"], sink["aggregations"]) as aggregator:
+                for chunk in chunks:
+                    start = time.perf_counter()
+                    sink_stats["rows_in"] += len(chunk)
+                    aggregator.add(chunk)
+                    sink_stats["seconds"] += time.perf_counter() - start
+                start = time.perf_counter()
+                result = aggregator.result()
+                sink_stats["strategy"] = aggregator.stats()["strategy"]
+        else:
+            ascending = not sink["descending"]
+            kept: List[pd.DataFrame] = []
+            for chunk in chunks:
+                start = time.perf_counter()
+                sink_stats["rows_in"] += len(chunk)
+                if sink["op"] == "top_k":
+                    # Keep only the best k rows seen so far; stable sort keeps file order for ties
+                    merged = pd.concat(kept + [chunk]) if kept else chunk
+                    kept = [merged.sort_values(sink["columns"], ascending=ascending,
+                                               kind='mergesort').head(sink["rows"])]
+                else:
+                    kept.append(chunk)
+                    if budget is not None:
+                        collected += int(chunk.memory_usage(deep=True).sum())
+                        check_collected(collected, budget, describe_operation(sink))
+                sink_stats["seconds"] += time.perf_counter() - start
+            start = time.perf_counter()
+            result = pd.concat(kept) if kept else pd.DataFrame(columns=self.scan_columns or self.source_columns)
+            if sink["op"] == "sort":
+                result = result.sort_values(sink["columns"], ascending=ascending, kind='mergesort')
+            result = result.reset_index(drop=True)
+        sink_stats["seconds"] += time.perf_counter() - start
+        sink_stats["rows_out"] = len(result)
+        return result
+
+    def execute(self, preview_rows: int = 10) -> Dict[str, Any]:
+        """
+        Run the plan.
+
+        Args:
+            preview_rows: Number of result rows to include in the response
+
+        Returns:
+            Dictionary with the plan, per-stage timings and a result preview
+        """
+        started = time.perf_counter()
+        scan_stats = {"seconds": 0.0, "chunks": 0, "rows_read": 0, "completed": False}
+        chunks: Iterator[pd.DataFrame] = self._scan(scan_stats)
+        stage_timings = []
+
+        for i, stage in enumerate(self.stages):
+            stage_start = time.perf_counter()
+            op_stats = [{"operator": describe_operation(op), "seconds": 0.0, "rows_in": 0, "rows_out": 0}
+                        for op in stage["operators"]]
+            stream = self._stream(chunks, stage["operators"], op_stats)
+
+            if stage["sink"] is not None:
+                sink_stats = {"operator": describe_operation(stage["sink"]), "seconds": 0.0,
+                              "rows_in": 0, "rows_out": 0}
+                result = self._run_sink(stream, stage["sink"], sink_stats)
+                op_stats.append(sink_stats)
+                chunks = iter([result])
+                rows_out = len(result)
+            else:
+                rows_out, preview, columns = self._finish(stream, preview_rows, op_stats)
+
+            stage_timings.append({
+                "stage": i + 1,
+                "seconds": round(time.perf_counter() - stage_start, 6),
+                "rows_out": rows_out,
+                "operators": [dict(s, seconds=round(s["seconds"], 6)) for s in op_stats],
+            })
+
+        # The scan runs inside the first stage; report it on its own as well
+        return {
+            "pipeline_completed": True,
+            "input_file": self.file_path,
+            "plan": self.explain(),
+            "scan": {
+                "seconds": round(scan_stats["seconds"], 6),
+                "chunks": scan_stats["chunks"],
+                "rows_read": scan_stats["rows_read"],
+                "stopped_early": not scan_stats["completed"],
+            },
+            "stage_timings": stage_timings,
+            "total_seconds": round(time.perf_counter() - started, 6),
+            "rows_output": rows_out,
+            "columns": columns,
+            "preview": preview,
+            "saved_to": self.write_op["path"] if self.write_op else None,
+        }
+
+    def _finish(self, stream: Iterator[pd.DataFrame], preview_rows: int,
+                op_stats: List[Dict[str, Any]]):
+        """Drain the final stage into the writer (if any) while keeping a preview."""
+        writer = None
+        write_stats = None
+        if self.write_op:
+            writer = ChunkWriter(self.write_op["path"], self.write_op["format"])
+            write_stats = {"operator": describe_operation(self.write_op), "seconds": 0.0,
+                           "rows_in": 0, "rows_out": 0}
+            op_stats.append(write_stats)
+
+        rows = 0
+        head: List[pd.DataFrame] = []
+        head_rows = 0
+        columns = list(self.output_columns)
+        for chunk in stream:
+            rows += len(chunk)
+            columns = list(chunk.columns)
+            if head_rows < preview_rows:
+                head.append(chunk.head(preview_rows - head_rows))
+                head_rows += len(head[-1])
+            if writer is not None:
+                start = time.perf_counter()
+                writer.write(chunk)
+                write_stats["rows_in"] += len(chunk)
+                write_stats["seconds"] += time.perf_counter() - start
+
+        if writer is not None:
+            start = time.perf_counter()
+            writer.close(columns)
+            write_stats["rows_out"] = writer.rows_written
+            write_stats["seconds"] += time.perf_counter() - start
+
+        preview = []
+        if head:
+            preview = frame_to_records(pd.concat(head))
+        return rows, preview, columns
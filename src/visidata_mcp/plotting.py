@@ -0,0 +1,489 @@
+"""
+Plotting helpers for the chart tools.
+
+Large inputs are reduced before they reach matplotlib, so drawing cost depends
+on the size of the image rather than the number of rows:
+
+- line charts are downsampled with Largest-Triangle-Three-Buckets (LTTB),
+  which keeps the visual shape (peaks, troughs) of the series
+- scatter plots are binned into a 2D density grid and drawn as one raster image
+- grouped scatter plots are sampled per category, keeping each group's share
+"""
+
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .metrics import measured
+
+# Above this many points create_graph switches to its large-data rendering
+DEFAULT_MAX_POINTS = 20_000
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Pick the indexes of the points kept by Largest-Triangle-Three-Buckets.
+
+    Args:
+        x: X values sorted ascending
+        y: Y values aligned with x
+        threshold: Number of points to keep (at least 3)
+
+    Returns:
+        Sorted array of selected indexes, always including the first and last point
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    every = (n - 2) / (threshold - 2)
+    # edges[i]:edges[i+1] is bucket i; the first and last points are their own buckets
+    edges = (np.floor(np.arange(threshold - 1) * every) + 1).astype('int64')
+    edges[-1] = n - 1
+
+    selected = np.empty(threshold, dtype='int64')
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Twice the triangle area between the previous pick, each candidate and the next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def density_grid(x: np.ndarray, y: np.ndarray, x_bins: int, y_bins: int
+                 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bin points into a 2D count grid.
+
+    Args:
+        x: X values
+        y: Y values
+        x_bins: Number of bins along x
+        y_bins: Number of bins along y
+
+    Returns:
+        (counts with shape (y_bins, x_bins), x edges, y edges)
+    """
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=[x_bins, y_bins])
+    return counts.T, x_edges, y_edges
+
+
+def grid_shape(width: float, height: float, dpi: int, pixels_per_bin: int = 4) -> Tuple[int, int]:
+    """Choose a density grid resolution that roughly matches the output image."""
+    x_bins = int(np.clip(width * dpi / pixels_per_bin, 50, 1000))
+    y_bins = int(np.clip(height * dpi / pixels_per_bin, 50, 1000))
+    return x_bins, y_bins
+
+
+def stratified_sample(df: pd.DataFrame, category_column: str, max_points: int,
+                      seed: int = 0) -> pd.DataFrame:
+    """
+    Sample rows while keeping each category's share of the data.
+
+    Every category keeps at least one row so no group disappears from the legend.
+    """
+    if len(df) <= max_points:
+        return df
+    fraction = max_points / len(df)
+    sampled = df.groupby(category_column, sort=False).sample(frac=fraction, random_state=seed)
+    missing = ~df[category_column].isin(sampled[category_column])
+    if missing.any():
+        sampled = pd.concat([sampled, df[missing].drop_duplicates(subset=[category_column])])
+    return sampled.sort_index()
+
+
+def new_figure(width: float, height: float):
+    """
+    Create a standalone Agg figure.
+
+    The figure is not registered with pyplot, so rendering shares no global
+    state and several charts can be drawn at once from different threads.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(width, height))
+    FigureCanvasAgg(fig)
+    return fig
+
+
+@measured("render")
+def render_skills_heatmap(heatmap_df: pd.DataFrame, output_path: str, title: str) -> None:
+    """Draw a locations x skills percentage heatmap."""
+    import seaborn as sns
+
+    fig = new_figure(max(12, len(heatmap_df.columns) * 0.8), max(8, len(heatmap_df.index) * 0.6))
+    ax = fig.add_subplot()
+    sns.heatmap(heatmap_df,
+                ax=ax,
+                annot=True,
+                fmt='.1f',
+                cmap='YlOrRd',
+                cbar_kws={'label': 'Skill Percentage (%)'},
+                linewidths=0.5)
+
+    ax.set_title(title)
+    ax.set_xlabel('Skills')
+    ax.set_ylabel('Locations')
+    ax.set_xticks(ax.get_xticks(), ax.get_xticklabels(), rotation=45, ha='right')
+    ax.tick_params(axis='y', labelrotation=0)
+    fig.tight_layout()
+
+    # Save the plot
+    fig.savefig(output_path, dpi=300, bbox_inches='tight')
+
+
+class ChartError(ValueError):
+    """Raised when a chart cannot be drawn from the given data and options."""
+
+
+@measured("render")
+def render_graph(df: pd.DataFrame, x_column: str, y_column: str, output_path: str,
+                 graph_type: str = "scatter", category_column: Optional[str] = None,
+                 dpi: int = 300, width: float = 10, height: float = 6,
+                 max_points: int = DEFAULT_MAX_POINTS) -> Dict[str, Any]:
+    """
+    Draw a scatter, line, bar or histogram chart of two columns.
+
+    Scatter and line charts with more than max_points points are rendered in
+    large-data mode (density raster, per-category sample or LTTB).
+
+    Returns:
+        Information about the created graph
+    """
+    import seaborn as sns
+    from matplotlib.colors import LogNorm
+
+    # Validate columns exist
+    if x_column not in df.columns:
+        raise ChartError(f"Column '{x_column}' not found in data")
+    if y_column not in df.columns:
+        raise ChartError(f"Column '{y_column}' not found in data")
+    if category_column and category_column not in df.columns:
+        raise ChartError(f"Category column '{category_column}' not found in data")
+    if graph_type not in ("scatter", "line", "bar", "histogram"):
+        raise ChartError(f"Unsupported graph type '{graph_type}'. Use: scatter, line, bar, histogram")
+
+    # Remove rows with NaN values in plotting columns
+    plot_columns = [x_column, y_column]
+    if category_column:
+        plot_columns.append(category_column)
+    df_clean = df[plot_columns].copy()
+    df_clean[x_column] = pd.to_numeric(df_clean[x_column], errors='coerce')
+    df_clean[y_column] = pd.to_numeric(df_clean[y_column], errors='coerce')
+    df_clean = df_clean.dropna()
+
+    if len(df_clean) == 0:
+        raise ChartError("No valid data points for plotting after removing NaN values")
+
+    # Create the plot
+    fig = new_figure(width, height)
+    ax = fig.add_subplot()
+    large_data = len(df_clean) > max_points
+    render_mode = "full"
+    points_drawn = len(df_clean)
+
+    if graph_type == "scatter":
+        if large_data and category_column:
+            # Keep each category's share of the points
+            sample = stratified_sample(df_clean, category_column, max_points)
+            sns.scatterplot(data=sample, x=x_column, y=y_column, hue=category_column,
+                            alpha=0.7, rasterized=True, ax=ax)
+            render_mode, points_drawn = "sampled", len(sample)
+        elif large_data:
+            # Aggregate into a density raster sized to the output image
+            x_bins, y_bins = grid_shape(width, height, dpi)
+            counts, x_edges, y_edges = density_grid(df_clean[x_column].to_numpy(),
+                                                    df_clean[y_column].to_numpy(), x_bins, y_bins)
+            image = ax.imshow(np.ma.masked_equal(counts, 0), origin='lower', aspect='auto',
+                               extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+                               cmap='viridis', norm=LogNorm(), interpolation='nearest')
+            fig.colorbar(image, ax=ax, label='Points per bin')
+            render_mode, points_drawn = "density", int(np.count_nonzero(counts))
+        elif category_column:
+            sns.scatterplot(data=df_clean, x=x_column, y=y_column, hue=category_column, alpha=0.7, ax=ax)
+        else:
+            ax.scatter(df_clean[x_column], df_clean[y_column], alpha=0.7)
+    elif graph_type == "line":
+        if large_data:
+            # LTTB keeps the shape of each series with far fewer vertices
+            groups = (df_clean.groupby(category_column, sort=True) if category_column
+                      else [(None, df_clean)])
+            n_groups = df_clean[category_column].nunique() if category_column else 1
+            points_drawn = 0
+            for category, group in groups:
+                group = group.sort_values(x_column, kind='mergesort')
+                keep = lttb_indices(group[x_column].to_numpy(), group[y_column].to_numpy(),
+                                    max(3, max_points // n_groups))
+                ax.plot(group[x_column].to_numpy()[keep], group[y_column].to_numpy()[keep],
+                         label=None if category is None else str(category), rasterized=True)
+                points_drawn += len(keep)
+            if category_column:
+                ax.legend(title=category_column)
+            render_mode = "lttb"
+        elif category_column:
+            # Fixed seed keeps the bootstrapped confidence band reproducible
+            sns.lineplot(data=df_clean, x=x_column, y=y_column, hue=category_column, seed=0, ax=ax)
+        else:
+            ax.plot(df_clean[x_column], df_clean[y_column])
+    elif graph_type == "bar":
+        if category_column:
+            # Group by category and take mean of y values for each x value
+            grouped = df_clean.groupby([x_column, category_column])[y_column].mean().reset_index()
+            sns.barplot(data=grouped, x=x_column, y=y_column, hue=category_column, ax=ax)
+        else:
+            grouped = df_clean.groupby(x_column)[y_column].mean()
+            ax.bar(grouped.index, grouped.values)
+    else:
+        if category_column:
+            for category in df_clean[category_column].unique():
+                subset = df_clean[df_clean[category_column] == category]
+                ax.hist(subset[y_column], alpha=0.7, label=str(category), bins=20)
+            ax.legend()
+        else:
+            ax.hist(df_clean[y_column], bins=20, alpha=0.7)
+        ax.set_xlabel(y_column)
+        ax.set_ylabel('Frequency')
+
+    # Set labels and title
+    ax.set_xlabel(x_column.replace('_', ' ').title())
+    ax.set_ylabel(y_column.replace('_', ' ').title())
+
+    title = f"{graph_type.title()} Plot: {y_column} vs {x_column}"
+    if category_column:
+        title += f" (grouped by {category_column})"
+    ax.set_title(title)
+
+    # Add grid for better readability
+    ax.grid(True, alpha=0.3)
+
+    # Adjust layout to prevent label cutoff
+    fig.tight_layout()
+
+    # Save the plot
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+
+    return {
+        "graph_created": True,
+        "graph_type": graph_type,
+        "x_column": x_column,
+        "y_column": y_column,
+        "category_column": category_column,
+        "data_points": len(df_clean),
+        "render_mode": render_mode,
+        "points_drawn": points_drawn,
+        "points_represented": len(df_clean),
+        "dpi": dpi,
+        "output_file": output_path,
+        "file_size": Path(output_path).stat().st_size if Path(output_path).exists() else 0
+    }
+
+
+def _numeric_columns(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    if columns:
+        # Validate specified columns exist
+        missing_cols = [col for col in columns if col not in df.columns]
+        if missing_cols:
+            raise ChartError(f"Columns not found: {missing_cols}")
+        return df[columns].select_dtypes(include=['number'])
+    return df.select_dtypes(include=['number'])
+
+
+@measured("render")
+def render_correlation_heatmap(df: pd.DataFrame, output_path: str,
+                               columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Draw a correlation heatmap of the numeric columns.
+
+    Returns:
+        Information about the created heatmap
+    """
+    numeric_df = _numeric_columns(df, columns)
+    if numeric_df.empty:
+        raise ChartError("No numeric columns found for correlation analysis")
+
+    # Calculate correlation matrix
+    return render_correlation_matrix(numeric_df.corr(), output_path)
+
+
+@measured("render")
+def render_correlation_matrix(correlation_matrix: pd.DataFrame, output_path: str) -> Dict[str, Any]:
+    """
+    Draw an already computed correlation matrix as a heatmap.
+
+    Returns:
+        Information about the created heatmap
+    """
+    import seaborn as sns
+
+    if correlation_matrix.empty:
+        raise ChartError("No numeric columns found for correlation analysis")
+
+    # Create the heatmap
+    fig = new_figure(10, 8)
+    ax = fig.add_subplot()
+    sns.heatmap(correlation_matrix,
+                ax=ax,
+                annot=True,
+                cmap='coolwarm',
+                center=0,
+                fmt='.2f',
+                square=True,
+                linewidths=0.5)
+
+    ax.set_title('Correlation Heatmap')
+    fig.tight_layout()
+
+    # Save the plot
+    fig.savefig(output_path, dpi=300, bbox_inches='tight')
+
+    return {
+        "heatmap_created": True,
+        "columns_analyzed": list(correlation_matrix.columns),
+        "total_correlations": len(correlation_matrix.columns) ** 2,
+        "output_file": output_path,
+        "file_size": Path(output_path).stat().st_size if Path(output_path).exists() else 0
+    }
+
+
+DISTRIBUTION_PLOT_TYPES = ("histogram", "box", "violin", "kde")
+
+
+def check_plot_type(plot_type: str) -> None:
+    """Reject distribution plot types that cannot be drawn."""
+    if plot_type not in DISTRIBUTION_PLOT_TYPES:
+        raise ChartError(f"Unsupported plot type '{plot_type}'. Use: {', '.join(DISTRIBUTION_PLOT_TYPES)}")
+
+
+@measured("render")
+def render_distribution_plots(df: pd.DataFrame, output_path: str,
+                              columns: Optional[List[str]] = None,
+                              plot_type: str = "histogram") -> Dict[str, Any]:
+    """
+    Draw one distribution subplot (histogram, box, violin or kde) per numeric column.
+
+    Returns:
+        Information about the created distribution plots
+    """
+    from .distribution import summarize_frame
+
+    check_plot_type(plot_type)
+    numeric_df = _numeric_columns(df, columns)
+    if numeric_df.empty:
+        raise ChartError("No numeric columns found for distribution analysis")
+
+    summaries = summarize_frame(numeric_df, list(numeric_df.columns))
+    return render_distribution_summaries(summaries, output_path, plot_type)
+
+
+def _draw_violin(ax, summary) -> None:
+    curve = summary.kde(cut=2)
+    if curve is not None:
+        grid, density = curve
+        ax.fill_betweenx(grid, -density, density, alpha=0.7, edgecolor='black')
+        width = density.max()
+    else:
+        width = 1.0
+    # Inner box like seaborn's: the IQR as a thick bar, whiskers as a thin line, the median as a dot
+    box = summary.box_stats()
+    ax.vlines(0, box["whislo"], box["whishi"], color='black', linewidth=1)
+    ax.vlines(0, box["q1"], box["q3"], color='black', linewidth=5)
+    ax.scatter([0], [box["med"]], color='white', s=12, zorder=3)
+    ax.set_xlim(-1.1 * width, 1.1 * width)
+    ax.set_xticks([])
+
+
+@measured("render")
+def render_distribution_summaries(summaries: List[Any], output_path: str,
+                                  plot_type: str = "histogram") -> Dict[str, Any]:
+    """
+    Draw distribution subplots from precomputed column summaries.
+
+    Args:
+        summaries: ColumnDistribution objects, one per subplot
+        output_path: Path where to save the image
+        plot_type: histogram, box, violin or kde
+
+    Returns:
+        Information about the created distribution plots
+    """
+    check_plot_type(plot_type)
+    if not summaries:
+        raise ChartError("No numeric columns found for distribution analysis")
+
+    # Calculate subplot dimensions
+    n_cols = len(summaries)
+    if n_cols <= 4:
+        n_rows, n_plot_cols = 1, n_cols
+    else:
+        n_plot_cols = 3
+        n_rows = math.ceil(n_cols / n_plot_cols)
+
+    # Create subplots
+    fig = new_figure(5*n_plot_cols, 4*n_rows)
+    axes = fig.subplots(n_rows, n_plot_cols)
+    if n_cols == 1:
+        axes = [axes]
+    elif n_rows == 1:
+        axes = axes if n_cols > 1 else [axes]
+    else:
+        axes = axes.flatten()
+
+    # Create distribution plots
+    for i, summary in enumerate(summaries):
+        ax = axes[i] if n_cols > 1 else axes[0]
+        column = summary.name
+
+        if not summary.count:
+            ax.text(0.5, 0.5, 'No data', ha='center', va='center', transform=ax.transAxes)
+        elif plot_type == "histogram":
+            counts, edges = summary.histogram()
+            ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7, edgecolor='black')
+            ax.set_ylabel('Frequency')
+        elif plot_type == "box":
+            ax.bxp([summary.box_stats()])
+            ax.set_ylabel('Value')
+        elif plot_type == "violin":
+            _draw_violin(ax, summary)
+            ax.set_ylabel(column)
+        else:
+            curve = summary.kde()
+            if curve is not None:
+                ax.plot(*curve)
+            ax.set_ylabel('Density')
+
+        ax.set_title(f'{plot_type.title()} of {column}')
+        ax.set_xlabel(column.replace('_', ' ').title())
+        ax.grid(True, alpha=0.3)
+
+    # Hide empty subplots
+    for i in range(n_cols, len(axes)):
+        axes[i].set_visible(False)
+
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=300, bbox_inches='tight')
+
+    columns_plotted = [summary.name for summary in summaries]
+    return {
+        "distribution_plots_created": True,
+        "plot_type": plot_type,
+        "columns_plotted": columns_plotted,
+        "total_plots": len(columns_plotted),
+        "output_file": output_path,
+        "file_size": Path(output_path).stat().st_size if Path(output_path).exists() else 0
+    }
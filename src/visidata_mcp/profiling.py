@@ -0,0 +1,164 @@
+"""
+Opt-in profiling of individual tool calls.
+
+A profiled call runs under cProfile and tracemalloc and writes three files to
+the profile directory, named after the tool and the time of the call:
+
+- <name>.prof        cProfile statistics, for pstats, snakeviz or gprof2dot
+- <name>.stats.txt   the functions with the most cumulative and own time
+- <name>.alloc.txt   the peak traced memory and the source lines holding the
+                     most memory at the end of the call, with tracebacks
+
+Their paths are added to the tool's JSON response under "profile". A call is
+profiled when it is made with ``profile=True`` (every tool accepts it) or
+when the environment asks for it:
+
+    VISIDATA_MCP_PROFILE      "all", or comma-separated tool names
+    VISIDATA_MCP_PROFILE_DIR  where profiles are written (default: profiles/
+                              in the cache directory)
+
+When profiling is off the only cost is reading the environment variable.
+cProfile sees the calling thread only, so time spent in worker processes
+shows up as waiting; tracemalloc traces the whole process, so concurrent
+calls' allocations are included.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TRACEBACKS = 5
+TRACE_FRAMES = 10
+
+
+def profile_requested(tool: str, requested: bool = False) -> bool:
+    """Whether a call of the tool should be profiled (per call, or VISIDATA_MCP_PROFILE)."""
+    if requested:
+        return True
+    setting = os.environ.get("VISIDATA_MCP_PROFILE", "").strip()
+    if not setting:
+        return False
+    names = {name.strip() for name in setting.split(",")}
+    return "all" in names or tool in names
+
+
+def profile_dir() -> str:
+    """Directory profiles are written to (VISIDATA_MCP_PROFILE_DIR)."""
+    from .loaders import cache_root
+
+    return os.environ.get("VISIDATA_MCP_PROFILE_DIR") or os.path.join(cache_root(), "profiles")
+
+
+def _stats_report(profiler: cProfile.Profile, tool: str, seconds: float) -> str:
+    out = io.StringIO()
+    out.write(f"{tool}: {seconds:.3f}s wall time\n\n")
+    stats = pstats.Stats(profiler, stream=out).strip_dirs()
+    for order in ("cumulative", "tottime"):
+        out.write(f"== top {TOP_FUNCTIONS} functions by {order} time ==\n")
+        stats.sort_stats(order).print_stats(TOP_FUNCTIONS)
+    return out.getvalue()
+
+
+def _allocation_report(snapshot: tracemalloc.Snapshot, peak: int, current: int) -> str:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+    lines = [f"peak traced memory: {peak / 1e6:.1f} MB",
+             f"traced at the end of the call: {current / 1e6:.1f} MB", "",
+             f"== top {TOP_ALLOCATIONS} allocation sites by size ==",
+             "(memory still allocated at the end of the call, by the line that allocated it)"]
+    for i, stat in enumerate(snapshot.statistics("lineno")[:TOP_ALLOCATIONS], 1):
+        frame = stat.traceback[0]
+        lines.append(f"{i:3}. {frame.filename}:{frame.lineno}: "
+                     f"{stat.size / 1e6:.2f} MB in {stat.count} blocks")
+    lines += ["", f"== tracebacks of the top {TRACEBACKS} sites =="]
+    for stat in snapshot.statistics("traceback")[:TRACEBACKS]:
+        lines.append(f"{stat.size / 1e6:.2f} MB in {stat.count} blocks")
+        lines += [f"    {line}" for line in stat.traceback.format(most_recent_first=True)]
+    return "\n".join(lines) + "\n"
+
+
+def run_profiled(tool: str, function: Callable[..., str], *args: Any,
+                 **kwargs: Any) -> Tuple[str, Dict[str, Any]]:
+    """
+    Call a tool under cProfile and tracemalloc and write its profile files.
+
+    Args:
+        tool: Tool name, used in the file names
+        function: The tool function
+        *args, **kwargs: Its arguments
+
+    Returns:
+        The tool's result and the profile description (file paths, wall time,
+        peak traced memory), or an "error" entry if no profile could be taken
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Another profiler (e.g. a debugger or an outer cProfile) is already active
+        return function(*args, **kwargs), {"error": f"cProfile unavailable: {e}"}
+
+    # Leave an outer tracemalloc session (such as the benchmarks') running
+    own_tracing = not tracemalloc.is_tracing()
+    if own_tracing:
+        tracemalloc.start(TRACE_FRAMES)
+    snapshot: Optional[tracemalloc.Snapshot] = None
+    started = time.perf_counter()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - started
+        profiler.disable()
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if own_tracing:
+                tracemalloc.stop()
+
+    directory = profile_dir()
+    base = os.path.join(directory, f"{tool}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}")
+    info: Dict[str, Any] = {
+        "stats_file": f"{base}.prof",
+        "report_file": f"{base}.stats.txt",
+        "allocations_file": f"{base}.alloc.txt",
+        "seconds": round(seconds, 6),
+        "peak_traced_bytes": peak,
+    }
+    try:
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(info["stats_file"])
+        with open(info["report_file"], "w") as f:
+            f.write(_stats_report(profiler, tool, seconds))
+        with open(info["allocations_file"], "w") as f:
+            f.write(_allocation_report(snapshot, peak, current))
+    except OSError as e:
+        return result, {"error": f"Could not write profile to {directory}: {e}"}
+    return result, info
+
+
+def attach_profile(result: str, info: Dict[str, Any]) -> str:
+    """Add the profile description to a tool response (a JSON object, or any other text)."""
+    if result.startswith("{"):
+        try:
+            payload = json.loads(result)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            from .serialization import to_json
+
+            payload["profile"] = info
+            return to_json(payload)
+    return f"{result}\n\nProfile: {json.dumps(info)}"
@@ -0,0 +1,142 @@
+"""
+A pool of warm rendering worker processes for batch chart requests.
+
+Workers are spawned once (so they never inherit the server's threads), and on
+start-up they import matplotlib and seaborn and draw a throwaway figure so the
+font cache and styles are ready before the first real chart arrives. The pool
+is reused by every batch call and shut down when the server exits.
+
+Batches lease the pool (worker_pool.WorkerPool) while their charts render,
+so growing it never stops a batch in flight, and a pool whose worker died
+is replaced for the next batch.
+
+A batch ships its data to the workers once, as a pickle file; each worker
+loads it on its first chart of the batch and keeps it for the rest. The
+batch deletes the file when it ends, and the workers then drop their copy
+within RELEASE_POLL_SECONDS.
+"""
+
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, ContextManager, Dict, List, Optional
+
+from .worker_pool import WorkerPool
+
+CHART_TYPES = ("graph", "correlation_heatmap", "distribution")
+
+RELEASE_POLL_SECONDS = 0.5
+
+# Per-worker cache of the batch's data frame, released once the batch's data file is removed
+_frame_cache: Dict[str, Any] = {"path": None, "df": None}
+_frame_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    """Number of rendering workers used when the caller does not choose."""
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def _warm_up() -> None:
+    import matplotlib
+    matplotlib.use('Agg')
+    import seaborn  # noqa: F401 - import cost is paid once per worker
+    from .plotting import new_figure
+
+    fig = new_figure(2, 2)
+    fig.text(0.5, 0.5, "warm-up")
+    fig.canvas.draw()
+
+
+render_workers = WorkerPool(initializer=_warm_up)
+
+
+def leased_pool(workers: Optional[int] = None) -> ContextManager[ProcessPoolExecutor]:
+    """
+    Lease the shared rendering pool, starting or growing it if needed.
+
+    Args:
+        workers: Desired number of worker processes (default: up to 4)
+    """
+    return render_workers.lease(workers or default_workers())
+
+
+def shutdown_pool() -> None:
+    """Stop the rendering workers."""
+    render_workers.shutdown()
+
+
+def validate_spec(spec: Dict[str, Any], index: int) -> None:
+    """Check a chart spec before it is sent to a worker."""
+    if not isinstance(spec, dict):
+        raise ValueError(f"Chart {index} must be an object")
+    if spec.get("chart") not in CHART_TYPES:
+        raise ValueError(f"Chart {index}: unknown chart '{spec.get('chart')}'. Use: {', '.join(CHART_TYPES)}")
+    if not spec.get("output_path"):
+        raise ValueError(f"Chart {index}: 'output_path' is required")
+    if spec["chart"] == "graph" and not (spec.get("x_column") and spec.get("y_column")):
+        raise ValueError(f"Chart {index}: graph charts need 'x_column' and 'y_column'")
+
+
+def chart_columns(spec: Dict[str, Any]) -> Optional[List[str]]:
+    """Columns a chart reads, or None when it uses every numeric column."""
+    if spec["chart"] == "graph":
+        return [c for c in (spec["x_column"], spec["y_column"], spec.get("category_column")) if c]
+    return list(spec["columns"]) if spec.get("columns") else None
+
+
+def render_chart(df, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Render one chart spec from an already loaded DataFrame."""
+    from .plotting import render_correlation_heatmap, render_distribution_plots, render_graph
+
+    if spec["chart"] == "graph":
+        options = {k: spec[k] for k in ("graph_type", "category_column", "dpi", "width",
+                                        "height", "max_points") if k in spec}
+        return render_graph(df, spec["x_column"], spec["y_column"], spec["output_path"], **options)
+    if spec["chart"] == "correlation_heatmap":
+        return render_correlation_heatmap(df, spec["output_path"], columns=spec.get("columns"))
+    return render_distribution_plots(df, spec["output_path"], columns=spec.get("columns"),
+                                     plot_type=spec.get("plot_type", "histogram"))
+
+
+def _release_when_removed(data_path: str) -> None:
+    """Worker thread: drop the cached frame once its batch has deleted the data file."""
+    while True:
+        time.sleep(RELEASE_POLL_SECONDS)
+        with _frame_lock:
+            if _frame_cache["path"] != data_path:
+                return
+            if not os.path.exists(data_path):
+                _frame_cache["path"] = _frame_cache["df"] = None
+                return
+
+
+def _batch_frame(data_path: str):
+    import pandas as pd
+
+    with _frame_lock:
+        if _frame_cache["path"] != data_path:
+            _frame_cache["df"] = None  # free the previous batch's frame before loading this one
+            _frame_cache["df"] = pd.read_pickle(data_path)
+            _frame_cache["path"] = data_path
+            threading.Thread(target=_release_when_removed, args=(data_path,), daemon=True).start()
+        return _frame_cache["df"]
+
+
+def render_chart_from_file(data_path: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Worker entry point: render a chart from the batch's pickled data.
+
+    Returns:
+        The chart result, or {"error": ...} if it could not be drawn
+    """
+    from .plotting import ChartError
+
+    try:
+        return render_chart(_batch_frame(data_path), spec)
+    except ChartError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"{str(e)}\n{traceback.format_exc()}"}
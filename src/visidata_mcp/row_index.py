@@ -0,0 +1,280 @@
+"""
+Sparse byte-offset index of the records in a CSV, TSV or JSON Lines file.
+
+Reaching row N of a delimited file normally means parsing every row before it.
+The index stores the byte offset of every ``stride``-th record, so a page of
+rows is read by seeking to the nearest indexed record and parsing at most
+``stride`` rows from there: paging deep into a file costs about the same as
+reading its first page.
+
+Record boundaries are found with vectorized scans over large blocks. A newline
+ends a record only when an even number of field quotes precede it, so
+newlines inside quoted fields are skipped (an escaped ``""`` counts twice and
+keeps the parity). As in pandas, a quote opens a quoted field only at the
+start of a field; anywhere else in an unquoted field (``5" tv``) it is a
+literal character and does not count. Blocks without such stray quotes are
+checked in one vectorized pass; a block with one is walked quote by quote.
+JSON Lines records never contain raw newlines, so there every non-blank line
+is a record. Blank lines are not counted, as in pandas.
+
+Indexes are cached in memory and under the cache directory, keyed by the
+file's fingerprint, so each version of a file is scanned once.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .compression import detect_compression
+from .loaders import cache_root, detect_format, file_fingerprint, read_columns
+from .metrics import measured, record_cache
+
+INDEX_VERSION = 2
+DEFAULT_STRIDE = 10_000
+BLOCK_SIZE = 16 * 1024 * 1024
+MEMORY_CACHE_ENTRIES = 32
+
+INDEXED_FORMATS = ('csv', 'tsv', 'jsonl')
+
+QUOTE = ord('"')
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+
+
+def field_quotes(data: np.ndarray, quotes: np.ndarray, inside: int, last_byte: int,
+                 closed_at_end: bool, sep: int) -> np.ndarray:
+    """
+    The quotes of a block that open or close quoted fields, dropping literal ones.
+
+    Args:
+        data: The block's bytes
+        quotes: Positions of every quote character in the block
+        inside: 1 if the block starts inside a quoted field
+        last_byte: The byte before the block (a newline at the start of the file)
+        closed_at_end: Whether the byte before the block is a closing quote
+        sep: The field separator
+
+    Returns:
+        Positions of the quotes that toggle between quoted and unquoted
+    """
+    if len(quotes) == 0:
+        return quotes
+    before = np.where(quotes > 0, data[quotes - 1], last_byte)
+    state = (inside + np.arange(len(quotes))) & 1
+    # An escaped "" reopens right after a closing quote
+    after_closing = np.empty(len(quotes), dtype=bool)
+    after_closing[0] = quotes[0] == 0 and closed_at_end
+    after_closing[1:] = (quotes[1:] - 1 == quotes[:-1]) & (state[:-1] == 1)
+    if ((state == 1) | (before == sep) | (before == NEWLINE) | after_closing).all():
+        return quotes
+
+    # A quote inside an unquoted field: follow the quoting rule quote by quote
+    kept = []
+    closed = -2
+    for position in quotes.tolist():
+        if inside:
+            inside, closed = 0, position
+            kept.append(position)
+            continue
+        previous = int(data[position - 1]) if position > 0 else last_byte
+        if (previous in (sep, NEWLINE) or (position > 0 and closed == position - 1)
+                or (position == 0 and closed_at_end)):
+            inside = 1
+            kept.append(position)
+    return np.array(kept, dtype=quotes.dtype)
+
+
+class RowIndex:
+    """
+    Offsets of every stride-th data record of a delimited or JSON Lines file.
+
+    Args:
+        file_path: Path to the indexed file
+        fmt: File format (csv, tsv or jsonl)
+        columns: Column names
+        offsets: Byte offset of records 0, stride, 2 * stride, ...
+        total_rows: Number of data records (excluding the header and blank lines)
+        stride: Records between indexed offsets
+    """
+
+    def __init__(self, file_path: str, fmt: str, columns: List[str], offsets: np.ndarray,
+                 total_rows: int, stride: int):
+        self.file_path = file_path
+        self.format = fmt
+        self.columns = list(columns)
+        self.offsets = offsets
+        self.total_rows = total_rows
+        self.stride = stride
+
+    @property
+    def sep(self) -> str:
+        return '\t' if self.format == 'tsv' else ','
+
+    @classmethod
+    @measured("parse")
+    def build(cls, file_path: str, fmt: str = 'csv', stride: int = DEFAULT_STRIDE) -> "RowIndex":
+        """Scan a file once and record where every stride-th record starts."""
+        # JSON Lines have no header and no quoted newlines
+        delimited = fmt != 'jsonl'
+        offsets: List[np.ndarray] = []
+        rows = 0
+        header_done = not delimited
+        sep = ord('\t' if fmt == 'tsv' else ',')
+        parity = 0
+        closed_at_end = False
+        position = 0
+        record_start = 0
+        # The file starts like a new record
+        last_byte = NEWLINE
+
+        with open(file_path, 'rb') as f:
+            while True:
+                block = f.read(BLOCK_SIZE)
+                if not block:
+                    break
+                data = np.frombuffer(block, dtype=np.uint8)
+                newlines = np.flatnonzero(data == NEWLINE)
+                if delimited:
+                    quotes = field_quotes(data, np.flatnonzero(data == QUOTE), parity, last_byte,
+                                          closed_at_end, sep)
+                    quotes_before = parity + np.searchsorted(quotes, newlines)
+                    local_ends = newlines[(quotes_before & 1) == 0]
+                    parity = (parity + len(quotes)) & 1
+                    closed_at_end = bool(len(quotes)) and quotes[-1] == len(data) - 1 and parity == 0
+                else:
+                    local_ends = newlines
+
+                if len(local_ends):
+                    ends = local_ends + position
+                    starts = np.concatenate(([record_start], ends[:-1] + 1))
+                    lengths = ends - starts
+                    # The byte before each terminator, to spot "\r\n" blank lines
+                    before = np.where(local_ends > 0, data[np.maximum(local_ends - 1, 0)], last_byte)
+                    blank = (lengths == 0) | ((lengths == 1) & (before == CARRIAGE_RETURN))
+                    starts = starts[~blank]
+                    if not header_done and len(starts):
+                        # The first non-blank record is the header
+                        starts = starts[1:]
+                        header_done = True
+                    numbers = rows + np.arange(len(starts))
+                    offsets.append(starts[numbers % stride == 0])
+                    rows += len(starts)
+                    record_start = int(ends[-1]) + 1
+
+                last_byte = int(data[-1])
+                position += len(data)
+
+        # A last record without a trailing newline
+        length = position - record_start
+        if length > 1 or (length == 1 and last_byte != CARRIAGE_RETURN):
+            if header_done:
+                if rows % stride == 0:
+                    offsets.append(np.array([record_start]))
+                rows += 1
+
+        columns = read_columns(file_path, file_type=fmt)
+        all_offsets = np.concatenate(offsets).astype('int64') if offsets else np.zeros(0, dtype='int64')
+        return cls(file_path, fmt, columns, all_offsets, rows, stride)
+
+    @measured("parse", count_rows=True)
+    def read_rows(self, start: int, count: int, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read data rows [start, start + count) by seeking to the nearest indexed record.
+
+        Args:
+            start: First row number (0-based, excluding the header)
+            count: Maximum number of rows to read
+            columns: Optional subset of columns to parse
+
+        Returns:
+            DataFrame of at most count rows
+        """
+        if start >= self.total_rows or count <= 0:
+            return pd.DataFrame(columns=columns or self.columns)
+        block = start // self.stride
+        skip = start - block * self.stride
+        with open(self.file_path, 'rb') as f:
+            f.seek(int(self.offsets[block]))
+            if self.format == 'jsonl':
+                lines = list(islice((line for line in f if line.strip()), skip + count))[skip:]
+                page = pd.read_json(io.BytesIO(b"".join(lines)), lines=True)
+                return page.reindex(columns=columns) if columns is not None else page
+            page = pd.read_csv(f, sep=self.sep, header=None, names=self.columns,
+                               usecols=columns, nrows=skip + count)
+        return page.iloc[skip:].reset_index(drop=True)
+
+    # -- persistence -------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, offsets=self.offsets, total_rows=self.total_rows, stride=self.stride,
+                 format=self.format, columns=json.dumps(self.columns))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, file_path: str) -> "RowIndex":
+        with np.load(path) as saved:
+            return cls(file_path, str(saved['format']), json.loads(str(saved['columns'])),
+                       saved['offsets'], int(saved['total_rows']), int(saved['stride']))
+
+
+def is_indexable(file_path: str, file_type: Optional[str] = None) -> bool:
+    """Whether a file can be row-indexed: an uncompressed CSV, TSV or JSON Lines file."""
+    return (os.path.isfile(file_path) and detect_format(file_path, file_type) in INDEXED_FORMATS
+            and detect_compression(file_path) is None)
+
+
+_indexes: "OrderedDict[str, RowIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_row_index(file_path: str, file_type: Optional[str] = None,
+                  stride: int = DEFAULT_STRIDE) -> RowIndex:
+    """
+    Get the row index of a CSV, TSV or JSON Lines file, building it on first use.
+
+    Raises:
+        ValueError: If the file is not an uncompressed CSV, TSV or JSON Lines file
+    """
+    fmt = detect_format(file_path, file_type)
+    if not is_indexable(file_path, fmt):
+        raise ValueError("Row indexes are only available for uncompressed CSV, TSV and JSON Lines files")
+    payload = {"file": file_fingerprint(file_path), "format": fmt, "stride": stride, "version": INDEX_VERSION}
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    with _indexes_lock:
+        if key in _indexes:
+            _indexes.move_to_end(key)
+            record_cache("row_index", True)
+            return _indexes[key]
+
+    directory = os.path.join(cache_root(), "row_index")
+    path = os.path.join(directory, f"{key}.npz")
+    index = None
+    if os.path.exists(path):
+        try:
+            index = RowIndex.load(path, file_path)
+        except (OSError, ValueError, KeyError):
+            index = None
+    record_cache("row_index", index is not None)
+    if index is None:
+        index = RowIndex.build(file_path, fmt=fmt, stride=stride)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            index.save(path)
+        except OSError:
+            pass
+
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > MEMORY_CACHE_ENTRIES:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,101 @@
+"""
+JSON serialization for tool responses.
+
+DataFrames are converted column by column: missing values become None and
+numpy scalars become Python objects with one vectorized call per column,
+instead of checking every cell. Responses are encoded with orjson when it is
+installed (``pip install visidata-mcp[fast]``) and with the standard library
+otherwise.
+
+Responses are indented by default; set VISIDATA_MCP_COMPACT_JSON=1 to send
+them without whitespace.
+"""
+
+import datetime
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .metrics import measured
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def compact_default() -> bool:
+    """Whether responses are compact unless a caller says otherwise."""
+    return os.environ.get("VISIDATA_MCP_COMPACT_JSON", "").lower() in ("1", "true", "yes")
+
+
+def column_values(series: pd.Series) -> List[Any]:
+    """
+    Convert a column to a list of JSON-ready Python values.
+
+    Missing values become None, numbers and booleans become Python numbers and
+    booleans, timestamps and other non-JSON objects become strings.
+    """
+    missing = series.isna()
+    if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_timedelta64_dtype(series):
+        values = series.astype(str).astype(object)
+    else:
+        # astype(object) turns numpy numbers into Python numbers in one pass
+        values = series.astype(object)
+    if missing.any():
+        values = values.where(~missing, None)
+    return values.tolist()
+
+
+@measured("serialize")
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a DataFrame to a list of row dictionaries, column-wise."""
+    names = [str(name) for name in df.columns]
+    columns = [column_values(df.iloc[:, i]) for i in range(df.shape[1])]
+    return [dict(zip(names, row)) for row in zip(*columns)] if columns else [{} for _ in range(len(df))]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, pd.DataFrame):
+        return frame_to_records(value)
+    if isinstance(value, pd.Series):
+        return column_values(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+@measured("serialize")
+def to_json(obj: Any, compact: Optional[bool] = None) -> str:
+    """
+    Encode a tool response.
+
+    Args:
+        obj: Response object; numpy values, frames and timestamps are converted
+        compact: Omit indentation (default: VISIDATA_MCP_COMPACT_JSON)
+
+    Returns:
+        The JSON text
+    """
+    if compact is None:
+        compact = compact_default()
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=_default, option=option).decode()
+        except TypeError:
+            # e.g. dictionary keys orjson cannot encode; the standard library stringifies them
+            pass
+    if compact:
+        return json.dumps(obj, default=_default, separators=(',', ':'))
+    return json.dumps(obj, default=_default, indent=2)
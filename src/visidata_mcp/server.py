@@ -20,11 +20,15 @@ from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp import Context
 import warnings
 
+from .memory_guard import MemoryBudgetError
+from .metrics import instrumented
+from .serialization import column_values, frame_to_records, to_json
+
 # Try to import visualization packages early to detect missing dependencies
 try:
     import matplotlib
     matplotlib.use('Agg')  # Use non-interactive backend
-    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
     import seaborn as sns
     VISUALIZATION_AVAILABLE = True
 except ImportError as e:
@@ -71,123 +75,151 @@ mcp = FastMCP("VisiData")
 
 
 @mcp.tool()
+@instrumented
 def load_data(file_path: str, file_type: Optional[str] = None) -> str:
     """
     Load data from a file using VisiData.
     
+    The file is registered as a dataset whose schema and rows can then be read
+    page by page through the returned resource URIs.
+    
     Args:
         file_path: Path to the data file
         file_type: Optional file type hint (csv, json, xlsx, etc.)
     
     Returns:
-        String representation of the loaded data structure
+        String representation of the loaded data structure, with its dataset_id
     """
     try:
-        # Use pandas as a reliable fallback for common formats
-        import pandas as pd
         from pathlib import Path
+        from .datasets import register_dataset
+        from .sqlite_source import table_names
+        from .visidata_backend import list_tables
         
-        file_extension = Path(file_path).suffix.lower()
-        
-        # Load with pandas first for reliability
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            # Try CSV as default
-            df = pd.read_csv(file_path)
+        dataset = register_dataset(file_path, file_type)
         
         # Get basic information about the dataset
         info = {
             "filename": Path(file_path).name,
-            "rows": len(df),
-            "columns": len(df.columns),
-            "column_names": list(df.columns)[:10],  # First 10 columns
-            "column_types": [str(df[col].dtype) for col in df.columns[:10]],
-            "file_size": Path(file_path).stat().st_size if Path(file_path).exists() else 0
+            "dataset_id": dataset.dataset_id,
+            "rows": dataset.total_rows,
+            "columns": len(dataset.columns),
+            "column_names": dataset.columns[:10],  # First 10 columns
+            "column_types": dataset.column_types[:10],
+            "file_size": dataset.fingerprint["size"],
+            "resources": dataset.uris()
         }
         
-        return json.dumps(info, indent=2)
-        
+        # Databases, HTML pages and archives hold several tables; the first one was loaded
+        tables = []
+        if dataset.format == 'sqlite':
+            tables = table_names(file_path)
+        elif dataset.format == 'visidata':
+            tables = list_tables(file_path, None if file_type in (None, 'visidata') else file_type)
+        if tables:
+            info["tables"] = tables
+        if "partitions" in dataset.fingerprint:
+            info["partitions"] = dataset.fingerprint["partitions"]
+        
+        return to_json(info)
+        
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error loading data: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
-def get_data_sample(file_path: str, rows: int = 10) -> str:
+@instrumented
+def get_data_sample(file_path: str, rows: int = 10, offset: int = 0, sheet: Optional[str] = None) -> str:
     """
     Get a sample of data from a file.
     
+    Pages can start anywhere: CSV and TSV files are read through a cached
+    byte-offset index and SQLite tables with LIMIT/OFFSET, so a page deep into
+    the file costs about the same as the first.
+    
     Args:
         file_path: Path to the data file
         rows: Number of rows to return (default: 10)
+        offset: Row number to start from, 0-based (default: 0)
+        sheet: Excel sheet or table name, or 0-based index (default: the first)
     
     Returns:
-        Sample data in JSON format
+        Sample data in JSON format, with next_offset for the following page
     """
     try:
         import pandas as pd
         from pathlib import Path
-        
-        file_extension = Path(file_path).suffix.lower()
-        
-        # Load with pandas
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
+        from .loaders import detect_format, iter_chunks
+        from .row_index import get_row_index, is_indexable
+        from .sqlite_source import SqliteQuery
+        
+        if rows < 0 or offset < 0:
+            return "Error: rows and offset must not be negative"
+        
+        if is_indexable(file_path):
+            index = get_row_index(file_path)
+            sample_df = index.read_rows(offset, rows)
+            total_rows = index.total_rows
+            columns = index.columns
+        elif detect_format(file_path) == 'sqlite':
+            query = SqliteQuery(file_path, sheet)
+            total_rows = query.count()
+            columns = query.columns
+            sample_df = query.limit(rows, offset).frame()
         else:
-            df = pd.read_csv(file_path)
-        
-        # Get sample rows
-        sample_df = df.head(rows)
+            # Stream the file, keeping only the requested page and counting the rest
+            pages = []
+            total_rows = 0
+            columns = None
+            for chunk in iter_chunks(file_path, sheet=sheet):
+                if columns is None:
+                    columns = list(chunk.columns)
+                first = max(offset - total_rows, 0)
+                last = min(offset + rows - total_rows, len(chunk))
+                if first < last:
+                    pages.append(chunk.iloc[first:last])
+                total_rows += len(chunk)
+            sample_df = pd.concat(pages) if pages else pd.DataFrame(columns=columns)
         
         # Convert to records for JSON serialization
-        sample_data = []
-        for _, row in sample_df.iterrows():
-            row_data = {}
-            for col in df.columns:
-                value = row[col]
-                # Handle pandas/numpy types for JSON serialization
-                if pd.isna(value):
-                    row_data[col] = None
-                elif hasattr(value, 'item'):  # numpy types
-                    row_data[col] = value.item()
-                else:
-                    row_data[col] = str(value) if value is not None else None
-            sample_data.append(row_data)
+        sample_data = frame_to_records(sample_df)
+        next_offset = offset + len(sample_data)
         
         result = {
             "filename": Path(file_path).name,
-            "total_rows": len(df),
-            "total_columns": len(df.columns),
+            "total_rows": total_rows,
+            "total_columns": len(columns),
+            "offset": offset,
             "sample_rows": len(sample_data),
-            "columns": list(df.columns),
+            "next_offset": next_offset if next_offset < total_rows else None,
+            "columns": columns,
             "data": sample_data
         }
         
-        return json.dumps(result, indent=2)
+        return to_json(result)
         
     except Exception as e:
         return f"Error getting data sample: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
-def analyze_data(file_path: str) -> str:
+@instrumented
+def analyze_data(file_path: str, incremental: bool = False) -> str:
     """
     Perform basic analysis on a dataset.
     
+    A file too large for the memory budget is profiled chunk by chunk instead
+    of being loaded; past 100,000 distinct values in a column its unique count
+    and most common values are then approximate (listed under "approximate").
+    With incremental=True a CSV, TSV or JSON Lines file is always profiled
+    that way and the profile is saved, so later incremental calls only parse
+    the rows appended since; the results are approximate in the same way.
+    
     Args:
         file_path: Path to the data file
+        incremental: Save the profile and reuse it for an append-only file
     
     Returns:
         Analysis results including statistics and data types
@@ -195,20 +227,34 @@ def analyze_data(file_path: str) -> str:
     try:
         import pandas as pd
         from pathlib import Path
-        
-        file_extension = Path(file_path).suffix.lower()
-        
-        # Load with pandas
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
+        from .column_profile import profile_file
+        from .incremental import incremental_profile, supports_incremental
+        from .loaders import read_frame
+        from .memory_guard import estimate_load
+        
+        profiles = None
+        if incremental:
+            if not supports_incremental(file_path):
+                return "Error: Incremental analysis needs a single, uncompressed CSV, TSV or JSON Lines file"
+            # Only rows appended since the last incremental analysis are parsed
+            total_rows, profiles, execution = incremental_profile(file_path)
         else:
-            df = pd.read_csv(file_path)
+            estimate = estimate_load(file_path)
+            if not estimate.fits:
+                # Too big to load: profile the columns chunk by chunk instead
+                total_rows, profiles = profile_file(file_path)
+                execution = {"mode": "chunked", **estimate.as_dict()}
+        if profiles is not None:
+            analysis = {
+                "filename": Path(file_path).name,
+                "total_rows": total_rows,
+                "total_columns": len(profiles),
+                "columns": [profile.analysis() for profile in profiles],
+                "execution": execution
+            }
+            return to_json(analysis)
+        
+        df = read_frame(file_path)
         
         analysis = {
             "filename": Path(file_path).name,
@@ -229,15 +275,7 @@ def analyze_data(file_path: str) -> str:
             }
             
             # Get some sample values
-            sample_values = []
-            valid_values = col_data.dropna().head(5)
-            for value in valid_values:
-                if hasattr(value, 'item'):  # numpy types
-                    sample_values.append(value.item())
-                else:
-                    sample_values.append(str(value) if value is not None else None)
-            
-            col_info["sample_values"] = sample_values
+            col_info["sample_values"] = column_values(col_data.dropna().head(5))
             
             # Add basic statistics for numeric columns
             if pd.api.types.is_numeric_dtype(col_data):
@@ -251,193 +289,207 @@ def analyze_data(file_path: str) -> str:
             
             analysis["columns"].append(col_info)
         
-        return json.dumps(analysis, indent=2)
+        return to_json(analysis)
         
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error analyzing data: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
-def convert_data(input_path: str, output_path: str, output_format: Optional[str] = None) -> str:
+@instrumented
+def convert_data(input_path: str, output_path: str, output_format: Optional[str] = None,
+                 sheet: Optional[str] = None, max_rows: Optional[int] = None) -> str:
     """
     Convert data from one format to another using pandas.
     
+    The input is read and written chunk by chunk, so CSV, TSV and Excel files
+    of any size are converted with constant memory.
+    
     Args:
         input_path: Path to the input data file
         output_path: Path for the output file
         output_format: Target format (csv, json, xlsx, etc.)
+        sheet: Excel sheet or table name, or 0-based index, to read (default: the first)
+        max_rows: Optional maximum number of rows to convert
     
     Returns:
         Success message or error details
     """
     try:
-        import pandas as pd
-        from pathlib import Path
+        from .loaders import ChunkWriter, iter_chunks, read_columns
         
-        # Load data with pandas
-        input_extension = Path(input_path).suffix.lower()
-        
-        if input_extension == '.csv':
-            df = pd.read_csv(input_path)
-        elif input_extension == '.json':
-            df = pd.read_json(input_path)
-        elif input_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(input_path)
-        elif input_extension == '.tsv':
-            df = pd.read_csv(input_path, sep='\t')
-        else:
-            df = pd.read_csv(input_path)
-        
-        # Determine output format from extension if not specified
-        if output_format is None:
-            output_format = Path(output_path).suffix.lstrip('.')
-        
-        # Save in the new format
-        if output_format == 'csv':
-            df.to_csv(output_path, index=False)
-        elif output_format == 'json':
-            df.to_json(output_path, orient='records', indent=2)
-        elif output_format in ['xlsx', 'xls']:
-            df.to_excel(output_path, index=False)
-        elif output_format == 'tsv':
-            df.to_csv(output_path, sep='\t', index=False)
-        else:
-            # Default to CSV
-            df.to_csv(output_path, index=False)
-            output_format = 'csv'
+        columns = read_columns(input_path, sheet=sheet)
+        writer = ChunkWriter(output_path, output_format)
+        for chunk in iter_chunks(input_path, sheet=sheet, nrows=max_rows):
+            writer.write(chunk)
+        writer.close(columns)
         
         result = {
             "input_file": input_path,
             "output_file": output_path,
-            "output_format": output_format,
-            "rows_converted": len(df),
-            "columns_converted": len(df.columns)
+            "output_format": writer.format,
+            "rows_converted": writer.rows_written,
+            "columns_converted": len(columns)
         }
         
-        return json.dumps(result, indent=2)
+        return to_json(result)
         
     except Exception as e:
         return f"Error converting data: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
-def filter_data(file_path: str, column: str, condition: str, value: str, output_path: Optional[str] = None) -> str:
+@instrumented
+def filter_data(file_path: str, column: str, condition: str, value: str, output_path: Optional[str] = None,
+                sheet: Optional[str] = None) -> str:
     """
     Filter data based on a condition.
     
+    Rows are filtered chunk by chunk and matches are streamed to the output file.
+    On SQLite tables the filter runs as a SQL WHERE clause instead. On a directory
+    or glob of files, partitions are filtered in parallel and a filter on a
+    partition column skips the partitions that cannot match.
+    
     Args:
         file_path: Path to the data file
         column: Column name to filter on
         condition: Filter condition (equals, contains, greater_than, less_than)
         value: Value to filter by
         output_path: Optional path to save filtered data
+        sheet: Excel sheet or table name, or 0-based index (default: the first)
     
     Returns:
         Information about the filtered data
     """
     try:
-        import pandas as pd
-        from pathlib import Path
+        from .loaders import ChunkWriter, detect_format, iter_chunks, read_columns
+        from .partitions import discover_partitions, is_partitioned, map_partitions
+        from .pipeline import filter_mask, filter_partition, prune_partitions
+        from .sqlite_source import SqliteQuery
         
-        file_extension = Path(file_path).suffix.lower()
-        
-        # Load with pandas
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            df = pd.read_csv(file_path)
+        columns = read_columns(file_path, sheet=sheet)
+        if column not in columns:
+            return f"Error: Column '{column}' not found. Available columns: {columns}"
         
-        if column not in df.columns:
-            return f"Error: Column '{column}' not found. Available columns: {list(df.columns)}"
-        
-        original_rows = len(df)
-        
-        # Apply filter
-        if condition == "equals":
-            filtered_df = df[df[column].astype(str) == value]
-        elif condition == "contains":
-            filtered_df = df[df[column].astype(str).str.contains(value, case=False, na=False)]
-        elif condition == "greater_than":
-            try:
-                numeric_value = float(value)
-                filtered_df = df[pd.to_numeric(df[column], errors='coerce') > numeric_value]
-            except ValueError:
-                return f"Error: Cannot convert '{value}' to number for greater_than comparison"
-        elif condition == "less_than":
+        if condition not in ("equals", "contains", "greater_than", "less_than"):
+            return f"Error: Unknown condition '{condition}'. Use: equals, contains, greater_than, less_than"
+        if condition in ("greater_than", "less_than"):
             try:
-                numeric_value = float(value)
-                filtered_df = df[pd.to_numeric(df[column], errors='coerce') < numeric_value]
+                float(value)
             except ValueError:
-                return f"Error: Cannot convert '{value}' to number for less_than comparison"
+                return f"Error: Cannot convert '{value}' to number for {condition} comparison"
+        
+        writer = ChunkWriter(output_path) if output_path else None
+        original_rows = 0
+        filtered_rows = 0
+        sql = None
+        partition_stats = None
+        if is_partitioned(file_path):
+            # original_rows then counts the rows of the partitions that were read
+            partitions = discover_partitions(file_path)
+            scanned = prune_partitions(partitions, column, condition, value)
+            for rows, matched, matches in map_partitions(filter_partition, scanned, column=column,
+                                                         condition=condition, value=value,
+                                                         keep_rows=writer is not None, sheet=sheet):
+                original_rows += rows
+                filtered_rows += matched
+                if writer is not None:
+                    writer.write(matches)
+            partition_stats = {"total": len(partitions), "scanned": len(scanned),
+                               "pruned": len(partitions) - len(scanned)}
+        elif detect_format(file_path) == 'sqlite':
+            # Only the matching rows leave the database, and only if they are saved
+            original_rows = SqliteQuery(file_path, sheet).count()
+            query = SqliteQuery(file_path, sheet).where(column, condition, value)
+            sql = query.sql()[0]
+            if writer is not None:
+                for matches in query.iter_chunks():
+                    writer.write(matches)
+                filtered_rows = writer.rows_written
+            else:
+                filtered_rows = query.count()
         else:
-            return f"Error: Unknown condition '{condition}'. Use: equals, contains, greater_than, less_than"
+            for chunk in iter_chunks(file_path, sheet=sheet):
+                matches = chunk[filter_mask(chunk, column, condition, value)]
+                original_rows += len(chunk)
+                filtered_rows += len(matches)
+                if writer is not None:
+                    writer.write(matches)
         
         result = {
             "original_rows": original_rows,
-            "filtered_rows": len(filtered_df),
+            "filtered_rows": filtered_rows,
             "filter_applied": f"{column} {condition} {value}"
         }
+        if sql is not None:
+            result["sql"] = sql
+        if partition_stats is not None:
+            result["partitions"] = partition_stats
         
         # If output path is specified, save filtered data
-        if output_path:
-            output_extension = Path(output_path).suffix.lower()
-            if output_extension == '.csv':
-                filtered_df.to_csv(output_path, index=False)
-            elif output_extension == '.json':
-                filtered_df.to_json(output_path, orient='records', indent=2)
-            elif output_extension in ['.xlsx', '.xls']:
-                filtered_df.to_excel(output_path, index=False)
-            else:
-                # Default to CSV
-                filtered_df.to_csv(output_path, index=False)
+        if writer is not None:
+            writer.close(columns)
             result["saved_to"] = output_path
         
-        return json.dumps(result, indent=2)
+        return to_json(result)
         
     except Exception as e:
         return f"Error filtering data: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
-def get_column_stats(file_path: str, column: str) -> str:
+@instrumented
+def get_column_stats(file_path: str, column: str, incremental: bool = False) -> str:
     """
     Get statistics for a specific column.
     
+    Only the column is loaded. If even that is too large for the memory budget,
+    it is profiled chunk by chunk and the median and quartiles are estimated
+    to within 1% (listed under "approximate"). With incremental=True a CSV,
+    TSV or JSON Lines column is always profiled that way and the profile is
+    saved, so later incremental calls only parse the rows appended since; the
+    median, quartiles and, past 100,000 distinct values, the unique count
+    are then approximate.
+    
     Args:
         file_path: Path to the data file
         column: Column name to analyze
+        incremental: Save the profile and reuse it for an append-only file
     
     Returns:
         Column statistics in JSON format
     """
     try:
         import pandas as pd
-        from pathlib import Path
-        
-        file_extension = Path(file_path).suffix.lower()
-        
-        # Load with pandas
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            df = pd.read_csv(file_path)
-        
-        if column not in df.columns:
-            return f"Error: Column '{column}' not found. Available columns: {list(df.columns)}"
-        
-        col_data = df[column]
+        from .column_profile import profile_file
+        from .incremental import incremental_profile, supports_incremental
+        from .loaders import read_columns, read_frame
+        from .memory_guard import estimate_load
+        
+        columns = read_columns(file_path)
+        if column not in columns:
+            return f"Error: Column '{column}' not found. Available columns: {columns}"
+        
+        if incremental:
+            if not supports_incremental(file_path):
+                return "Error: Incremental analysis needs a single, uncompressed CSV, TSV or JSON Lines file"
+            # Only rows appended since the last incremental call are parsed
+            _, (profile,), execution = incremental_profile(file_path, columns=[column])
+            stats = profile.stats()
+            stats["execution"] = execution
+            return to_json(stats)
+        
+        # Only the column is loaded; if even that is too big it is profiled chunk by chunk
+        estimate = estimate_load(file_path, columns=[column])
+        if not estimate.fits:
+            _, (profile,) = profile_file(file_path, columns=[column])
+            stats = profile.stats()
+            stats["execution"] = {"mode": "chunked", **estimate.as_dict()}
+            return to_json(stats)
+        
+        col_data = read_frame(file_path, columns=[column])[column]
         
         stats = {
             "column": column,
@@ -482,43 +534,58 @@ def get_column_stats(file_path: str, column: str) -> str:
                     "percentage": round(count / len(col_data) * 100, 2)
                 })
         
-        return json.dumps(stats, indent=2)
+        return to_json(stats)
         
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error getting column stats: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
-def sort_data(file_path: str, column: str, descending: bool = False, output_path: Optional[str] = None) -> str:
+@instrumented
+def sort_data(file_path: str, column: str, descending: bool = False, output_path: Optional[str] = None,
+              sheet: Optional[str] = None) -> str:
     """
     Sort data by a specific column.
     
+    SQLite tables are sorted by the database (ORDER BY), which can use an index
+    on the column, and the sorted rows are streamed to the output file.
+    
     Args:
         file_path: Path to the data file
         column: Column name to sort by
         descending: Sort in descending order (default: False)
         output_path: Optional path to save sorted data
+        sheet: Excel sheet or table name, or 0-based index (default: the first)
     
     Returns:
         Information about the sorted data
     """
     try:
-        import pandas as pd
-        from pathlib import Path
+        from .loaders import ChunkWriter, detect_format, read_frame, write_frame
+        from .sqlite_source import SqliteQuery
+        
+        if detect_format(file_path) == 'sqlite':
+            query = SqliteQuery(file_path, sheet)
+            if column not in query.columns:
+                return f"Error: Column '{column}' not found. Available columns: {query.columns}"
+            query.order_by([column], descending=descending)
+            result = {
+                "sorted_by": column,
+                "descending": descending,
+                "total_rows": query.count(),
+                "sql": query.sql()[0]
+            }
+            if output_path:
+                writer = ChunkWriter(output_path)
+                for chunk in query.iter_chunks():
+                    writer.write(chunk)
+                writer.close(query.columns)
+                result["saved_to"] = output_path
+            return to_json(result)
         
-        file_extension = Path(file_path).suffix.lower()
-        
-        # Load with pandas
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            df = pd.read_csv(file_path)
+        df = read_frame(file_path, sheet=sheet)
         
         if column not in df.columns:
             return f"Error: Column '{column}' not found. Available columns: {list(df.columns)}"
@@ -534,31 +601,31 @@ def sort_data(file_path: str, column: str, descending: bool = False, output_path
         
         # If output path is specified, save sorted data
         if output_path:
-            output_extension = Path(output_path).suffix.lower()
-            if output_extension == '.csv':
-                sorted_df.to_csv(output_path, index=False)
-            elif output_extension == '.json':
-                sorted_df.to_json(output_path, orient='records', indent=2)
-            elif output_extension in ['.xlsx', '.xls']:
-                sorted_df.to_excel(output_path, index=False)
-            else:
-                # Default to CSV
-                sorted_df.to_csv(output_path, index=False)
+            write_frame(sorted_df, output_path)
             result["saved_to"] = output_path
         
-        return json.dumps(result, indent=2)
+        return to_json(result)
         
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error sorting data: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
+@instrumented
 def create_graph(file_path: str, x_column: str, y_column: str, 
                 output_path: str, graph_type: str = "scatter", 
-                category_column: Optional[str] = None) -> str:
+                category_column: Optional[str] = None,
+                dpi: int = 300, width: float = 10, height: float = 6,
+                max_points: int = 20000) -> str:
     """
     Create a graph/plot from data using matplotlib/seaborn.
     
+    Scatter and line charts with more than max_points points switch to a large-data
+    mode: line series are downsampled with LTTB, scatters are binned into a density
+    raster (or sampled per category when grouped).
+    
     Args:
         file_path: Path to the data file
         x_column: Column name for x-axis (must be numeric)
@@ -566,6 +633,10 @@ def create_graph(file_path: str, x_column: str, y_column: str,
         output_path: Path where to save the graph image
         graph_type: Type of graph (scatter, line, bar, histogram)
         category_column: Optional categorical column for grouping/coloring
+        dpi: Output resolution in dots per inch (default: 300)
+        width: Figure width in inches (default: 10)
+        height: Figure height in inches (default: 6)
+        max_points: Point count above which large-data rendering is used (default: 20000)
     
     Returns:
         Information about the created graph
@@ -574,126 +645,58 @@ def create_graph(file_path: str, x_column: str, y_column: str,
         if not VISUALIZATION_AVAILABLE:
             return f"Error: {VISUALIZATION_ERROR}"
             
-        import pandas as pd
-        from pathlib import Path
+        from .chart_cache import get_chart_cache
+        from .loaders import read_frame
+        from .plotting import ChartError, render_graph
+        
+        # Reuse an identical chart of the same file contents if one was drawn before
+        cache = get_chart_cache()
+        cache_key = cache.key(file_path, "create_graph", {
+            "x_column": x_column, "y_column": y_column, "graph_type": graph_type,
+            "category_column": category_column, "dpi": dpi, "width": width,
+            "height": height, "max_points": max_points, "format": Path(output_path).suffix.lower()
+        })
+        cached = cache.fetch(cache_key, output_path)
+        if cached is not None:
+            return to_json(cached)
         
         # Load the data
-        file_extension = Path(file_path).suffix.lower()
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            df = pd.read_csv(file_path)
+        df = read_frame(file_path)
         
-        # Validate columns exist
-        if x_column not in df.columns:
-            return f"Error: Column '{x_column}' not found in data"
-        if y_column not in df.columns:
-            return f"Error: Column '{y_column}' not found in data"
-        if category_column and category_column not in df.columns:
-            return f"Error: Category column '{category_column}' not found in data"
-        
-        # Ensure numeric columns are properly typed
         try:
-            df[x_column] = pd.to_numeric(df[x_column], errors='coerce')
-            df[y_column] = pd.to_numeric(df[y_column], errors='coerce')
-        except:
-            return f"Error: Could not convert {x_column} or {y_column} to numeric values"
-        
-        # Remove rows with NaN values in plotting columns
-        plot_columns = [x_column, y_column]
-        if category_column:
-            plot_columns.append(category_column)
-        df_clean = df[plot_columns].dropna()
-        
-        if len(df_clean) == 0:
-            return "Error: No valid data points for plotting after removing NaN values"
-        
-        # Create the plot
-        plt.figure(figsize=(10, 6))
-        
-        if graph_type == "scatter":
-            if category_column:
-                sns.scatterplot(data=df_clean, x=x_column, y=y_column, hue=category_column, alpha=0.7)
-            else:
-                plt.scatter(df_clean[x_column], df_clean[y_column], alpha=0.7)
-        elif graph_type == "line":
-            if category_column:
-                sns.lineplot(data=df_clean, x=x_column, y=y_column, hue=category_column)
-            else:
-                plt.plot(df_clean[x_column], df_clean[y_column])
-        elif graph_type == "bar":
-            if category_column:
-                # Group by category and take mean of y values for each x value
-                grouped = df_clean.groupby([x_column, category_column])[y_column].mean().reset_index()
-                sns.barplot(data=grouped, x=x_column, y=y_column, hue=category_column)
-            else:
-                grouped = df_clean.groupby(x_column)[y_column].mean()
-                plt.bar(grouped.index, grouped.values)
-        elif graph_type == "histogram":
-            if category_column:
-                for category in df_clean[category_column].unique():
-                    subset = df_clean[df_clean[category_column] == category]
-                    plt.hist(subset[y_column], alpha=0.7, label=str(category), bins=20)
-                plt.legend()
-            else:
-                plt.hist(df_clean[y_column], bins=20, alpha=0.7)
-            plt.xlabel(y_column)
-            plt.ylabel('Frequency')
-        else:
-            return f"Error: Unsupported graph type '{graph_type}'. Use: scatter, line, bar, histogram"
-        
-        # Set labels and title
-        plt.xlabel(x_column.replace('_', ' ').title())
-        plt.ylabel(y_column.replace('_', ' ').title())
-        
-        title = f"{graph_type.title()} Plot: {y_column} vs {x_column}"
-        if category_column:
-            title += f" (grouped by {category_column})"
-        plt.title(title)
-        
-        # Add grid for better readability
-        plt.grid(True, alpha=0.3)
-        
-        # Adjust layout to prevent label cutoff
-        plt.tight_layout()
-        
-        # Save the plot
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        result = {
-            "graph_created": True,
-            "graph_type": graph_type,
-            "x_column": x_column,
-            "y_column": y_column,
-            "category_column": category_column,
-            "data_points": len(df_clean),
-            "output_file": output_path,
-            "file_size": Path(output_path).stat().st_size if Path(output_path).exists() else 0
-        }
-        
-        return json.dumps(result, indent=2)
-        
+            result = render_graph(df, x_column, y_column, output_path, graph_type=graph_type,
+                                  category_column=category_column, dpi=dpi, width=width,
+                                  height=height, max_points=max_points)
+        except ChartError as e:
+            return f"Error: {str(e)}"
+        
+        cache.store(cache_key, output_path, result)
+        result["cache_hit"] = False
+        return to_json(result)
+        
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error creating graph: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
+@instrumented
 def create_correlation_heatmap(file_path: str, output_path: str, 
-                              columns: Optional[List[str]] = None) -> str:
+                              columns: Optional[List[str]] = None,
+                              precision: str = "float64", memory_budget_mb: int = 256) -> str:
     """
     Create a correlation heatmap from numeric columns in the dataset.
     
+    The matrix is computed in one streaming pass, so memory use depends on the
+    number of columns rather than the number of rows.
+    
     Args:
         file_path: Path to the data file
         output_path: Path where to save the heatmap image
         columns: Optional list of specific columns to include (if None, uses all numeric columns)
+        precision: Arithmetic for each chunk, float64 or float32 (default: float64)
+        memory_budget_mb: Approximate working memory per chunk in MB (default: 256)
     
     Returns:
         Information about the created heatmap
@@ -702,76 +705,93 @@ def create_correlation_heatmap(file_path: str, output_path: str,
         if not VISUALIZATION_AVAILABLE:
             return f"Error: {VISUALIZATION_ERROR}"
             
-        import pandas as pd
-        from pathlib import Path
+        from .chart_cache import get_chart_cache
+        from .correlation import stream_correlation
+        from .plotting import ChartError, render_correlation_matrix
+        
+        cache = get_chart_cache()
+        cache_key = cache.key(file_path, "create_correlation_heatmap", {
+            "columns": columns, "precision": precision, "format": Path(output_path).suffix.lower()
+        })
+        cached = cache.fetch(cache_key, output_path)
+        if cached is not None:
+            return to_json(cached)
         
-        # Load the data
-        file_extension = Path(file_path).suffix.lower()
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            df = pd.read_csv(file_path)
-        
-        # Select numeric columns
-        if columns:
-            # Validate specified columns exist
-            missing_cols = [col for col in columns if col not in df.columns]
-            if missing_cols:
-                return f"Error: Columns not found: {missing_cols}"
-            numeric_df = df[columns].select_dtypes(include=['number'])
-        else:
-            numeric_df = df.select_dtypes(include=['number'])
+        try:
+            accumulator = stream_correlation(file_path, columns=columns, precision=precision,
+                                             memory_budget_bytes=memory_budget_mb * 1024 * 1024)
+            result = render_correlation_matrix(accumulator.matrix(), output_path)
+        except (ChartError, ValueError) as e:
+            return f"Error: {str(e)}"
+        result["rows_scanned"] = accumulator.rows
         
-        if numeric_df.empty:
-            return "Error: No numeric columns found for correlation analysis"
+        cache.store(cache_key, output_path, result)
+        result["cache_hit"] = False
+        return to_json(result)
         
-        # Calculate correlation matrix
-        correlation_matrix = numeric_df.corr()
+    except Exception as e:
+        return f"Error creating correlation heatmap: {str(e)}\n{traceback.format_exc()}"
+
+
+@mcp.tool()
+@instrumented
+def get_correlation_matrix(file_path: str, columns: Optional[List[str]] = None,
+                           precision: str = "float64", memory_budget_mb: int = 256,
+                           include_counts: bool = False) -> str:
+    """
+    Compute the Pearson correlation matrix of numeric columns without drawing it.
+    
+    Missing values are handled pairwise: each pair uses the rows where both values are present.
+    
+    Args:
+        file_path: Path to the data file
+        columns: Optional list of specific columns to include (if None, uses all numeric columns)
+        precision: Arithmetic for each chunk, float64 or float32 (default: float64)
+        memory_budget_mb: Approximate working memory per chunk in MB (default: 256)
+        include_counts: Also return the number of rows used for each pair
+    
+    Returns:
+        JSON with the correlation matrix as {column: {column: value}}
+    """
+    try:
+        from .correlation import matrix_to_records, stream_correlation
         
-        # Create the heatmap
-        plt.figure(figsize=(10, 8))
-        sns.heatmap(correlation_matrix, 
-                   annot=True, 
-                   cmap='coolwarm', 
-                   center=0,
-                   fmt='.2f',
-                   square=True,
-                   linewidths=0.5)
-        
-        plt.title('Correlation Heatmap')
-        plt.tight_layout()
-        
-        # Save the plot
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        try:
+            accumulator = stream_correlation(file_path, columns=columns, precision=precision,
+                                             memory_budget_bytes=memory_budget_mb * 1024 * 1024)
+        except ValueError as e:
+            return f"Error: {str(e)}"
+        if not accumulator.columns:
+            return "Error: No numeric columns found for correlation analysis"
         
         result = {
-            "heatmap_created": True,
-            "columns_analyzed": list(correlation_matrix.columns),
-            "total_correlations": len(correlation_matrix.columns) ** 2,
-            "output_file": output_path,
-            "file_size": Path(output_path).stat().st_size if Path(output_path).exists() else 0
+            "file_path": file_path,
+            "columns": accumulator.columns,
+            "rows_scanned": accumulator.rows,
+            "precision": precision,
+            "matrix": matrix_to_records(accumulator.matrix())
         }
+        if include_counts:
+            result["pair_counts"] = accumulator.pair_counts().to_dict(orient='index')
         
-        return json.dumps(result, indent=2)
+        return to_json(result)
         
     except Exception as e:
-        return f"Error creating correlation heatmap: {str(e)}\n{traceback.format_exc()}"
+        return f"Error computing correlation matrix: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
+@instrumented
 def create_distribution_plots(file_path: str, output_path: str, 
                             columns: Optional[List[str]] = None,
                             plot_type: str = "histogram") -> str:
     """
     Create distribution plots for numeric columns.
     
+    The file is streamed into per-column summaries (fine-grained histogram,
+    quartiles, moments) and the plots are drawn from those, so drawing cost does
+    not grow with the number of rows.
+    
     Args:
         file_path: Path to the data file
         output_path: Path where to save the distribution plots
@@ -785,98 +805,155 @@ def create_distribution_plots(file_path: str, output_path: str,
         if not VISUALIZATION_AVAILABLE:
             return f"Error: {VISUALIZATION_ERROR}"
             
-        import pandas as pd
-        from pathlib import Path
-        import math
+        from .chart_cache import get_chart_cache
+        from .distribution import summarize_file
+        from .loaders import numeric_columns
+        from .plotting import ChartError, check_plot_type, render_distribution_summaries
+        
+        cache = get_chart_cache()
+        cache_key = cache.key(file_path, "create_distribution_plots", {
+            "columns": columns, "plot_type": plot_type, "format": Path(output_path).suffix.lower()
+        })
+        cached = cache.fetch(cache_key, output_path)
+        if cached is not None:
+            return to_json(cached)
         
-        # Load the data
-        file_extension = Path(file_path).suffix.lower()
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            df = pd.read_csv(file_path)
-        
-        # Select numeric columns
-        if columns:
-            missing_cols = [col for col in columns if col not in df.columns]
-            if missing_cols:
-                return f"Error: Columns not found: {missing_cols}"
-            numeric_df = df[columns].select_dtypes(include=['number'])
-        else:
-            numeric_df = df.select_dtypes(include=['number'])
-        
-        if numeric_df.empty:
-            return "Error: No numeric columns found for distribution analysis"
+        try:
+            check_plot_type(plot_type)
+            summaries = summarize_file(file_path, numeric_columns(file_path, columns))
+            result = render_distribution_summaries(summaries, output_path, plot_type)
+        except (ChartError, ValueError) as e:
+            return f"Error: {str(e)}"
+        result["summaries"] = {summary.name: summary.to_dict() for summary in summaries}
+        
+        cache.store(cache_key, output_path, result)
+        result["cache_hit"] = False
+        return to_json(result)
+        
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Error creating distribution plots: {str(e)}\n{traceback.format_exc()}"
+
+
+@mcp.tool()
+@instrumented
+def create_charts_batch(file_path: str, charts: List[Dict[str, Any]], workers: Optional[int] = None) -> str:
+    """
+    Render many charts from one dataset in a single call.
+    
+    The file is loaded once (only the columns the charts need) and the charts are
+    rendered in parallel by a pool of warm worker processes that stays up between calls.
+    
+    Args:
+        file_path: Path to the data file
+        charts: List of chart specs, each with a "chart" type and an "output_path":
+            - {"chart": "graph", "x_column": ..., "y_column": ..., "output_path": ...,
+               "graph_type": "scatter", "category_column": ..., "dpi": 300, "width": 10, "height": 6}
+            - {"chart": "correlation_heatmap", "output_path": ..., "columns": [...]}
+            - {"chart": "distribution", "output_path": ..., "columns": [...], "plot_type": "histogram"}
+        workers: Number of rendering processes (default: up to 4)
+    
+    Returns:
+        One result per chart, in the order given, plus load and render timings
+    """
+    try:
+        if not VISUALIZATION_AVAILABLE:
+            return f"Error: {VISUALIZATION_ERROR}"
         
-        # Calculate subplot dimensions
-        n_cols = len(numeric_df.columns)
-        if n_cols <= 4:
-            n_rows, n_plot_cols = 1, n_cols
-        else:
-            n_plot_cols = 3
-            n_rows = math.ceil(n_cols / n_plot_cols)
-        
-        # Create subplots
-        fig, axes = plt.subplots(n_rows, n_plot_cols, figsize=(5*n_plot_cols, 4*n_rows))
-        if n_cols == 1:
-            axes = [axes]
-        elif n_rows == 1:
-            axes = axes if n_cols > 1 else [axes]
-        else:
-            axes = axes.flatten()
+        import time
+        from concurrent.futures.process import BrokenProcessPool
+        from .loaders import read_columns, read_frame
+        from .chart_cache import get_chart_cache
+        from .metrics import phase
+        from .render_pool import chart_columns, leased_pool, render_chart_from_file, validate_spec
         
-        # Create distribution plots
-        for i, column in enumerate(numeric_df.columns):
-            ax = axes[i] if n_cols > 1 else axes[0]
-            
-            if plot_type == "histogram":
-                ax.hist(numeric_df[column].dropna(), bins=20, alpha=0.7, edgecolor='black')
-                ax.set_ylabel('Frequency')
-            elif plot_type == "box":
-                ax.boxplot(numeric_df[column].dropna())
-                ax.set_ylabel('Value')
-            elif plot_type == "violin":
-                sns.violinplot(y=numeric_df[column].dropna(), ax=ax)
-            elif plot_type == "kde":
-                sns.kdeplot(data=numeric_df[column].dropna(), ax=ax)
-                ax.set_ylabel('Density')
-            else:
-                return f"Error: Unsupported plot type '{plot_type}'. Use: histogram, box, violin, kde"
+        if not charts:
+            return "Error: No charts requested"
+        try:
+            for i, spec in enumerate(charts):
+                validate_spec(spec, i)
+        except ValueError as e:
+            return f"Error: {str(e)}"
+        
+        # Charts already in the cache are copied out; only the rest are rendered
+        cache = get_chart_cache()
+        chart_results: List[Optional[Dict[str, Any]]] = [None] * len(charts)
+        cache_keys = []
+        for i, spec in enumerate(charts):
+            params = {k: v for k, v in spec.items() if k != "output_path"}
+            params["format"] = Path(spec["output_path"]).suffix.lower()
+            cache_keys.append(cache.key(file_path, "create_charts_batch", params))
+            chart_results[i] = cache.fetch(cache_keys[i], spec["output_path"])
+        pending = [i for i, cached in enumerate(chart_results) if cached is None]
+        
+        # Load only the columns the charts need, once for the whole batch
+        started = time.perf_counter()
+        needed = [chart_columns(charts[i]) for i in pending]
+        columns = None
+        if all(cols is not None for cols in needed):
+            available = read_columns(file_path)
+            wanted = {col for cols in needed for col in cols}
+            columns = [col for col in available if col in wanted]
+        rows_loaded = 0
+        columns_loaded: List[str] = []
+        load_seconds = render_seconds = 0.0
+        if pending:
+            df = read_frame(file_path, columns=columns)
+            rows_loaded, columns_loaded = len(df), list(df.columns)
             
-            ax.set_title(f'{plot_type.title()} of {column}')
-            ax.set_xlabel(column.replace('_', ' ').title())
-            ax.grid(True, alpha=0.3)
-        
-        # Hide empty subplots
-        for i in range(n_cols, len(axes)):
-            axes[i].set_visible(False)
-        
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+            fd, data_path = tempfile.mkstemp(prefix="visidata_mcp_batch_", suffix=".pkl")
+            os.close(fd)
+            try:
+                df.to_pickle(data_path)
+                load_seconds = time.perf_counter() - started
+                
+                render_started = time.perf_counter()
+                # A dead worker breaks the pool; the charts left are retried once on a fresh one
+                for attempt in range(2):
+                    remaining = [i for i in pending if chart_results[i] is None]
+                    try:
+                        with leased_pool(workers) as pool, phase("render"):
+                            futures = {i: pool.submit(render_chart_from_file, data_path, charts[i])
+                                       for i in remaining}
+                            for i, future in futures.items():
+                                chart_results[i] = future.result()
+                                if "error" not in chart_results[i]:
+                                    cache.store(cache_keys[i], charts[i]["output_path"], chart_results[i])
+                                    chart_results[i]["cache_hit"] = False
+                        break
+                    except BrokenProcessPool:
+                        if attempt:
+                            for i in pending:
+                                if chart_results[i] is None:
+                                    chart_results[i] = {"error": "A rendering worker stopped unexpectedly "
+                                                                 "(out of memory?); retry with fewer or smaller charts"}
+                render_seconds = time.perf_counter() - render_started
+            finally:
+                os.remove(data_path)
         
         result = {
-            "distribution_plots_created": True,
-            "plot_type": plot_type,
-            "columns_plotted": list(numeric_df.columns),
-            "total_plots": len(numeric_df.columns),
-            "output_file": output_path,
-            "file_size": Path(output_path).stat().st_size if Path(output_path).exists() else 0
+            "batch_completed": True,
+            "charts_requested": len(charts),
+            "charts_created": sum(1 for r in chart_results if "error" not in r),
+            "cache_hits": len(charts) - len(pending),
+            "rows_loaded": rows_loaded,
+            "columns_loaded": columns_loaded,
+            "load_seconds": round(load_seconds, 6),
+            "render_seconds": round(render_seconds, 6),
+            "results": chart_results
         }
         
-        return json.dumps(result, indent=2)
+        return to_json(result)
         
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
-        return f"Error creating distribution plots: {str(e)}\n{traceback.format_exc()}"
+        return f"Error creating charts: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
+@instrumented
 def get_supported_formats() -> str:
     """
     Get a list of supported file formats in VisiData.
@@ -911,10 +988,13 @@ def get_supported_formats() -> str:
         result = {
             "supported_formats": formats,
             "total_formats": len(formats),
-            "note": "VisiData supports many more formats through plugins and loaders"
+            "note": ("SQLite tables are queried with SQL; formats other than CSV, TSV, JSON, Excel and "
+                     "SQLite are read with VisiData's own loaders. Pick a table of a database, HTML page "
+                     "or archive with the sheet argument. "
+                     "VisiData supports many more formats through plugins and loaders")
         }
         
-        return json.dumps(result, indent=2)
+        return to_json(result)
         
     except Exception as e:
         return f"Error getting supported formats: {str(e)}\n{traceback.format_exc()}"
@@ -961,10 +1041,18 @@ This MCP server provides access to VisiData functionality through the following
 8. **get_supported_formats** - List supported file formats
    - Shows all formats VisiData can handle
 
+## Resources:
+
+- `visidata://datasets` - Datasets registered by load_data
+- `visidata://dataset/{dataset_id}/schema` - Columns, types and row count of a dataset
+- `visidata://dataset/{dataset_id}/rows/{start}-{end}` - Rows start to end (exclusive), up to 10,000 per page
+
 ## Usage Examples:
 
 - Load a CSV file: `load_data("/path/to/data.csv")`
 - Get 5 rows: `get_data_sample("/path/to/data.csv", 5)`
+- Get the next 5 rows: `get_data_sample("/path/to/data.csv", 5, offset=5)`
+- Read rows 100-199 of a loaded dataset: `visidata://dataset/<dataset_id>/rows/100-200`
 - Convert CSV to JSON: `convert_data("/path/to/data.csv", "/path/to/output.json")`
 - Filter data: `filter_data("/path/to/data.csv", "age", "greater_than", "18")`
 
@@ -978,6 +1066,59 @@ Visit: https://visidata.org for more information.
     return help_text
 
 
+@mcp.resource("visidata://datasets", mime_type="application/json")
+def list_dataset_resources() -> str:
+    """List the datasets registered by load_data."""
+    from .datasets import list_datasets
+    
+    return to_json([
+        {"dataset_id": d.dataset_id, "file_path": d.file_path, "total_rows": d.total_rows, "uris": d.uris()}
+        for d in list_datasets()
+    ])
+
+
+@mcp.resource("visidata://dataset/{dataset_id}/schema", mime_type="application/json")
+def get_dataset_schema(dataset_id: str) -> str:
+    """Column names and types, row count and page URIs of a registered dataset."""
+    from .datasets import get_dataset
+    
+    return to_json(get_dataset(dataset_id).schema())
+
+
+@mcp.resource("visidata://dataset/{dataset_id}/rows/{start}-{end}", mime_type="application/json")
+def get_dataset_rows(dataset_id: str, start: str, end: str) -> str:
+    """Rows start (inclusive) to end (exclusive) of a registered dataset, at most 10,000 per page."""
+    from .datasets import get_dataset, parse_page
+    
+    dataset = get_dataset(dataset_id)
+    page = parse_page(start, end)
+    rows = frame_to_records(dataset.read_rows(page.start, page.stop))
+    next_start = page.start + len(rows)
+    return to_json({
+        "dataset_id": dataset_id,
+        "start": page.start,
+        "end": next_start,
+        "total_rows": dataset.total_rows,
+        "next": (f"visidata://dataset/{dataset_id}/rows/{next_start}-{next_start + len(page)}"
+                 if rows and next_start < dataset.total_rows else None),
+        "rows": rows
+    })
+
+
+@mcp.resource("visidata://metrics", mime_type="application/json")
+def get_metrics() -> str:
+    """
+    Performance metrics of the tool calls since the server started.
+    
+    Per tool: call and error counts, and over the last 1,000 calls the percentiles
+    and histogram of the wall time, the time per phase (parse, compute, render,
+    serialize), rows and input bytes, peak memory and cache hits and misses.
+    """
+    from .metrics import get_registry
+    
+    return to_json(get_registry().snapshot())
+
+
 @mcp.prompt()
 def analyze_dataset_prompt(file_path: str) -> str:
     """
@@ -1010,6 +1151,7 @@ Please be thorough and provide actionable insights.
 
 
 @mcp.tool()
+@instrumented
 def parse_skills_column(file_path: str, skills_column: str, output_path: Optional[str] = None) -> str:
     """
     Parse comma-separated skills into individual skills and create one-hot encoding.
@@ -1024,20 +1166,10 @@ def parse_skills_column(file_path: str, skills_column: str, output_path: Optiona
     """
     try:
         import pandas as pd
-        from pathlib import Path
+        from .loaders import read_frame, write_frame
         
         # Load the data
-        file_extension = Path(file_path).suffix.lower()
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            df = pd.read_csv(file_path)
+        df = read_frame(file_path)
         
         if skills_column not in df.columns:
             return f"Error: Column '{skills_column}' not found in data"
@@ -1071,14 +1203,7 @@ def parse_skills_column(file_path: str, skills_column: str, output_path: Optiona
         
         # Save processed data if output path provided
         if output_path:
-            if output_path.endswith('.csv'):
-                skills_df.to_csv(output_path, index=False)
-            elif output_path.endswith('.json'):
-                skills_df.to_json(output_path, orient='records', indent=2)
-            elif output_path.endswith(('.xlsx', '.xls')):
-                skills_df.to_excel(output_path, index=False)
-            else:
-                skills_df.to_csv(output_path, index=False)
+            write_frame(skills_df, output_path)
         
         result = {
             "skills_parsed": True,
@@ -1090,13 +1215,16 @@ def parse_skills_column(file_path: str, skills_column: str, output_path: Optiona
             "output_file": output_path if output_path else None
         }
         
-        return json.dumps(result, indent=2)
+        return to_json(result)
         
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error parsing skills: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
+@instrumented
 def analyze_skills_by_location(file_path: str, skills_column: str, location_column: str, 
                               output_path: Optional[str] = None) -> str:
     """
@@ -1113,21 +1241,11 @@ def analyze_skills_by_location(file_path: str, skills_column: str, location_colu
     """
     try:
         import pandas as pd
-        from pathlib import Path
         from collections import defaultdict, Counter
+        from .loaders import read_frame, write_frame
         
         # Load the data
-        file_extension = Path(file_path).suffix.lower()
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            df = pd.read_csv(file_path)
+        df = read_frame(file_path)
         
         if skills_column not in df.columns:
             return f"Error: Column '{skills_column}' not found in data"
@@ -1172,16 +1290,11 @@ def analyze_skills_by_location(file_path: str, skills_column: str, location_colu
         
         # Save analysis if output path provided
         if output_path:
-            analysis_df = pd.DataFrame(analysis_results)
-            if output_path.endswith('.csv'):
-                analysis_df.to_csv(output_path, index=False)
-            elif output_path.endswith('.json'):
+            if output_path.endswith('.json'):
                 with open(output_path, 'w') as f:
                     json.dump(analysis_results, f, indent=2)
-            elif output_path.endswith(('.xlsx', '.xls')):
-                analysis_df.to_excel(output_path, index=False)
             else:
-                analysis_df.to_csv(output_path, index=False)
+                write_frame(pd.DataFrame(analysis_results), output_path)
         
         result = {
             "analysis_completed": True,
@@ -1191,13 +1304,16 @@ def analyze_skills_by_location(file_path: str, skills_column: str, location_colu
             "output_file": output_path if output_path else None
         }
         
-        return json.dumps(result, indent=2)
+        return to_json(result)
         
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error analyzing skills by location: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
+@instrumented
 def create_skills_location_heatmap(file_path: str, skills_column: str, location_column: str, 
                                   output_path: str, top_skills: int = 15, top_locations: int = 10) -> str:
     """
@@ -1221,19 +1337,22 @@ def create_skills_location_heatmap(file_path: str, skills_column: str, location_
         import pandas as pd
         from pathlib import Path
         from collections import defaultdict, Counter
+        from .chart_cache import get_chart_cache
+        from .loaders import read_frame
+        from .plotting import render_skills_heatmap
+        
+        cache = get_chart_cache()
+        cache_key = cache.key(file_path, "create_skills_location_heatmap", {
+            "skills_column": skills_column, "location_column": location_column,
+            "top_skills": top_skills, "top_locations": top_locations,
+            "format": Path(output_path).suffix.lower()
+        })
+        cached = cache.fetch(cache_key, output_path)
+        if cached is not None:
+            return to_json(cached)
         
         # Load the data
-        file_extension = Path(file_path).suffix.lower()
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            df = pd.read_csv(file_path)
+        df = read_frame(file_path)
         
         if skills_column not in df.columns:
             return f"Error: Column '{skills_column}' not found in data"
@@ -1279,24 +1398,8 @@ def create_skills_location_heatmap(file_path: str, skills_column: str, location_
         heatmap_df = pd.DataFrame(matrix_data, index=top_locations_list, columns=top_skills_list)
         
         # Create the heatmap
-        plt.figure(figsize=(max(12, len(top_skills_list) * 0.8), max(8, len(top_locations_list) * 0.6)))
-        sns.heatmap(heatmap_df, 
-                   annot=True, 
-                   fmt='.1f',
-                   cmap='YlOrRd',
-                   cbar_kws={'label': 'Skill Percentage (%)'},
-                   linewidths=0.5)
-        
-        plt.title(f'Skills Distribution Across Top {top_locations} Locations\n(Top {top_skills} Skills)')
-        plt.xlabel('Skills')
-        plt.ylabel('Locations')
-        plt.xticks(rotation=45, ha='right')
-        plt.yticks(rotation=0)
-        plt.tight_layout()
-        
-        # Save the plot
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        render_skills_heatmap(heatmap_df, output_path,
+                              f'Skills Distribution Across Top {top_locations} Locations\n(Top {top_skills} Skills)')
         
         result = {
             "skills_location_heatmap_created": True,
@@ -1308,13 +1411,18 @@ def create_skills_location_heatmap(file_path: str, skills_column: str, location_
             "file_size": Path(output_path).stat().st_size if Path(output_path).exists() else 0
         }
         
-        return json.dumps(result, indent=2)
+        cache.store(cache_key, output_path, result)
+        result["cache_hit"] = False
+        return to_json(result)
         
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error creating skills-location heatmap: {str(e)}\n{traceback.format_exc()}"
 
 
 @mcp.tool()
+@instrumented
 def analyze_salary_by_location_and_skills(file_path: str, salary_column: str, location_column: str, 
                                         skills_column: str, output_path: Optional[str] = None) -> str:
     """
@@ -1332,22 +1440,13 @@ def analyze_salary_by_location_and_skills(file_path: str, salary_column: str, lo
     """
     try:
         import pandas as pd
-        from pathlib import Path
         from collections import defaultdict
         import re
+        from .excel import write_excel_sheets
+        from .loaders import read_frame
         
         # Load the data
-        file_extension = Path(file_path).suffix.lower()
-        if file_extension == '.csv':
-            df = pd.read_csv(file_path)
-        elif file_extension == '.json':
-            df = pd.read_json(file_path)
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif file_extension == '.tsv':
-            df = pd.read_csv(file_path, sep='\t')
-        else:
-            df = pd.read_csv(file_path)
+        df = read_frame(file_path)
         
         # Validate columns exist
         for col in [salary_column, location_column, skills_column]:
@@ -1440,9 +1539,10 @@ def analyze_salary_by_location_and_skills(file_path: str, salary_column: str, lo
                     json.dump(analysis_data, f, indent=2)
             else:
                 # Create separate sheets for locations and skills
-                with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                    pd.DataFrame(location_analysis).to_excel(writer, sheet_name='Locations', index=False)
-                    pd.DataFrame(skill_analysis).to_excel(writer, sheet_name='Skills', index=False)
+                write_excel_sheets(output_path, {
+                    "Locations": pd.DataFrame(location_analysis),
+                    "Skills": pd.DataFrame(skill_analysis)
+                })
         
         result = {
             "salary_analysis_completed": True,
@@ -1454,12 +1554,359 @@ def analyze_salary_by_location_and_skills(file_path: str, salary_column: str, lo
             "output_file": output_path if output_path else None
         }
         
-        return json.dumps(result, indent=2)
+        return to_json(result)
         
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error analyzing salary by location and skills: {str(e)}\n{traceback.format_exc()}"
 
 
+@mcp.tool()
+@instrumented
+def run_pipeline(file_path: str, operations: List[Dict[str, Any]], preview_rows: int = 10) -> str:
+    """
+    Run an ordered list of operations over a file as one lazy, streaming query.
+    
+    Instead of chaining filter_data, sort_data and convert_data through intermediate
+    files, the operations are planned together: only referenced columns are parsed,
+    filters run right after parsing, a sort followed by a limit becomes a top-k, and
+    row-wise steps are fused into a single pass over the file. A sort without a
+    limit holds every row in memory and stops with an error past the memory budget.
+    
+    Args:
+        file_path: Path to the data file
+        operations: Ordered list of operations, each an object with an "op" key:
+            - {"op": "filter", "column": "age", "condition": "greater_than", "value": "30"}
+              (conditions: equals, contains, greater_than, less_than)
+            - {"op": "project", "columns": ["name", "age"]}
+            - {"op": "derive", "column": "monthly", "expression": "salary / 12"}
+              (columns, numbers and arithmetic, comparison or logical operators only)
+            - {"op": "group_by", "keys": ["city"], "aggregations": [{"column": "salary", "function": "mean"}]}
+              (functions: count, sum, mean, min, max, std, approx_distinct, approx_quantile)
+            - {"op": "sort", "column": "salary", "descending": true}
+            - {"op": "limit", "rows": 100}
+            - {"op": "write", "path": "/path/to/output.csv"} (must be last)
+        preview_rows: Number of result rows to include in the response (default: 10)
+    
+    Returns:
+        The optimized plan, per-stage timings and a preview of the result
+    """
+    try:
+        from .datasets import register_dataset
+        from .pipeline import Pipeline, PipelineError
+        
+        try:
+            pipeline = Pipeline(file_path, operations)
+        except PipelineError as e:
+            return f"Error: {str(e)}"
+        
+        result = pipeline.execute(preview_rows=preview_rows)
+        if result.get("saved_to"):
+            # Let clients page through the saved result as a dataset resource
+            result["dataset_id"] = register_dataset(result["saved_to"]).dataset_id
+        return to_json(result)
+        
+    except MemoryBudgetError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Error running pipeline: {str(e)}\n{traceback.format_exc()}"
+
+
+@mcp.tool()
+@instrumented
+def group_by(file_path: str, keys: List[str], aggregations: Optional[List[Dict[str, Any]]] = None,
+             output_path: Optional[str] = None, memory_budget_mb: int = 256,
+             preview_rows: int = 20, sheet: Optional[str] = None) -> str:
+    """
+    Group rows by one or more key columns and aggregate other columns.
+    
+    The file is read in chunks and folded into a hash aggregation, so it never has
+    to fit in memory. If the per-group state outgrows the memory budget it is
+    hash-partitioned and spilled to temporary files, then merged partition by partition.
+    On SQLite tables the aggregation runs as a SQL GROUP BY (approx_distinct is then
+    exact) unless it uses approx_quantile. On a directory or glob of files each
+    partition is aggregated in a worker process and the partial states are merged.
+    
+    Args:
+        file_path: Path to the data file
+        keys: Column names to group by
+        aggregations: List of aggregates, each {"column": ..., "function": ..., "as": optional name}.
+            Functions: count, sum, mean, min, max, std, approx_distinct, approx_quantile
+            (approx_quantile takes "quantile", default 0.5). Defaults to a row count per group.
+        output_path: Optional path to save every group (csv, tsv, json, xlsx)
+        memory_budget_mb: Aggregation state size that triggers spilling to disk (default: 256)
+        preview_rows: Number of groups to include in the response (default: 20)
+        sheet: Excel sheet or table name, or 0-based index (default: the first)
+    
+    Returns:
+        Aggregated groups and how the aggregation was executed
+    """
+    try:
+        import time
+        from .aggregate import HashAggregator, aggregate_partition
+        from .loaders import ChunkWriter, detect_format, iter_chunks, iter_partition_chunks, read_columns
+        from .datasets import register_dataset
+        from .partitions import discover_partitions, is_partitioned, map_partitions
+        from .sqlite_source import SqliteQuery, can_push_aggregations
+        
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        if not keys:
+            return "Error: At least one key column is required"
+        
+        try:
+            aggregator = HashAggregator(keys, aggregations,
+                                        memory_budget_bytes=int(memory_budget_mb * 1024 * 1024))
+        except ValueError as e:
+            return f"Error: {str(e)}"
+        
+        available = read_columns(file_path, sheet=sheet)
+        missing_cols = [col for col in aggregator.columns if col not in available]
+        if missing_cols:
+            return f"Error: Columns not found: {missing_cols}. Available columns: {available}"
+        
+        started = time.perf_counter()
+        query = None
+        if detect_format(file_path) == 'sqlite' and can_push_aggregations(aggregator.aggregations):
+            query = SqliteQuery(file_path, sheet).group_by(keys, aggregator.aggregations)
+        partitions = discover_partitions(file_path) if is_partitioned(file_path) else None
+        with aggregator:
+            if query is not None:
+                results = query.iter_chunks()
+            elif partitions is not None:
+                partials = map_partitions(aggregate_partition, partitions, keys=keys,
+                                          aggregations=aggregator.aggregations,
+                                          memory_budget_bytes=aggregator.memory_budget_bytes, sheet=sheet)
+                for partition, partial in zip(partitions, partials):
+                    if partial["state"] is not None:
+                        aggregator.add_state(partial["state"], partial["rows"], partial["chunks"])
+                    elif partial["spilled"]:
+                        # Too large to ship back from the worker: aggregate it here, spilling as needed
+                        for chunk in iter_partition_chunks(partition, columns=aggregator.columns, sheet=sheet):
+                            aggregator.add(chunk)
+                results = aggregator.iter_results()
+            else:
+                for chunk in iter_chunks(file_path, columns=aggregator.columns, sheet=sheet):
+                    aggregator.add(chunk)
+                results = aggregator.iter_results()
+            
+            writer = ChunkWriter(output_path) if output_path else None
+            total_groups = 0
+            preview = []
+            for groups in results:
+                total_groups += len(groups)
+                if len(preview) < preview_rows:
+                    preview.extend(frame_to_records(groups.head(preview_rows - len(preview))))
+                if writer is not None:
+                    writer.write(groups)
+            if writer is not None:
+                writer.close(keys + [agg["as"] for agg in aggregator.aggregations])
+            if query is not None:
+                execution = {"strategy": "sqlite_group_by", "sql": query.sql()[0]}
+            else:
+                execution = aggregator.stats()
+                if partitions is not None:
+                    execution["partitions"] = len(partitions)
+        
+        execution["seconds"] = round(time.perf_counter() - started, 6)
+        result = {
+            "group_by_completed": True,
+            "keys": keys,
+            "aggregations": aggregator.aggregations,
+            "total_groups": total_groups,
+            "groups": preview,
+            "execution": execution,
+            "output_file": output_path if output_path else None
+        }
+        if output_path:
+            # Let clients page through the saved result as a dataset resource
+            result["dataset_id"] = register_dataset(output_path).dataset_id
+        
+        return to_json(result)
+        
+    except Exception as e:
+        return f"Error grouping data: {str(e)}\n{traceback.format_exc()}"
+
+
+@mcp.tool()
+@instrumented
+def join_data(left_path: str, right_path: str, on: List[str], right_on: Optional[List[str]] = None,
+              how: str = "inner", output_path: Optional[str] = None, memory_budget_mb: int = 256,
+              preview_rows: int = 10) -> str:
+    """
+    Join two data files on key columns, e.g. to enrich job postings with company metadata.
+    
+    The right file is the build side. If it fits in the memory budget it is loaded
+    into a hash table and the left file is streamed through it; otherwise both files
+    are hash-partitioned into temporary files and joined partition by partition.
+    Null keys never match.
+    
+    Args:
+        left_path: Path to the left data file
+        right_path: Path to the right data file (build side)
+        on: Key column(s) in the left file
+        right_on: Key column(s) in the right file (default: same names as on)
+        how: Join type (inner, left, anti)
+        output_path: Optional path to save the joined data
+        memory_budget_mb: Largest build side joined in memory, in MB (default: 256)
+        preview_rows: Number of joined rows to include in the response (default: 10)
+    
+    Returns:
+        Join results including the strategy that was chosen
+    """
+    try:
+        import time
+        from .datasets import register_dataset
+        from .join import FileJoin
+        from .loaders import ChunkWriter, read_columns
+        
+        left_on = [on] if isinstance(on, str) else list(on)
+        if right_on is None:
+            right_on = left_on
+        right_on = [right_on] if isinstance(right_on, str) else list(right_on)
+        
+        left_columns = read_columns(left_path)
+        right_columns = read_columns(right_path)
+        missing_cols = [col for col in left_on if col not in left_columns]
+        if missing_cols:
+            return f"Error: Columns not found in left file: {missing_cols}. Available columns: {left_columns}"
+        missing_cols = [col for col in right_on if col not in right_columns]
+        if missing_cols:
+            return f"Error: Columns not found in right file: {missing_cols}. Available columns: {right_columns}"
+        
+        try:
+            join = FileJoin(left_path, right_path, left_on, right_on, how=how,
+                            memory_budget_bytes=int(memory_budget_mb * 1024 * 1024))
+        except ValueError as e:
+            return f"Error: {str(e)}"
+        
+        started = time.perf_counter()
+        writer = ChunkWriter(output_path) if output_path else None
+        rows_output = 0
+        columns = None
+        preview = []
+        with join:
+            for chunk in join.iter_results():
+                rows_output += len(chunk)
+                columns = list(chunk.columns)
+                if len(preview) < preview_rows:
+                    preview.extend(frame_to_records(chunk.head(preview_rows - len(preview))))
+                if writer is not None:
+                    writer.write(chunk)
+            if writer is not None:
+                writer.close(columns or left_columns)
+            execution = join.stats()
+        
+        execution["seconds"] = round(time.perf_counter() - started, 6)
+        result = {
+            "join_completed": True,
+            "how": how,
+            "left_file": left_path,
+            "right_file": right_path,
+            "left_on": left_on,
+            "right_on": right_on,
+            "rows_output": rows_output,
+            "columns": columns or left_columns,
+            "preview": preview,
+            "execution": execution,
+            "output_file": output_path if output_path else None
+        }
+        if output_path:
+            # Let clients page through the saved result as a dataset resource
+            result["dataset_id"] = register_dataset(output_path).dataset_id
+        
+        return to_json(result)
+        
+    except Exception as e:
+        return f"Error joining data: {str(e)}\n{traceback.format_exc()}"
+
+
+@mcp.tool()
+@instrumented
+def query_data(sql: str, tables: Optional[Dict[str, str]] = None, output_path: Optional[str] = None,
+               output_format: Optional[str] = None, preview_rows: int = 20) -> str:
+    """
+    Run a SQL SELECT over data files with DuckDB, an embedded multi-threaded columnar engine.
+    
+    Files can be queried by path (SELECT * FROM '/data/jobs.csv') or bound to table
+    names with tables. CSV, TSV, JSON Lines, JSON arrays and Parquet are scanned by
+    DuckDB directly; other formats are streamed into it first. Without output_path
+    only a bounded preview is computed; with it, the full result is streamed to the file.
+    Needs the optional DuckDB dependency (pip install visidata-mcp[sql]).
+    
+    Args:
+        sql: A single SELECT (or WITH ... SELECT) statement
+        tables: Optional mapping of table name to file path or load_data dataset id,
+            e.g. {"jobs": "/data/jobs.csv"}
+        output_path: Optional path to save the full result (csv, tsv, json, jsonl, xlsx, parquet)
+        output_format: Optional explicit output format
+        preview_rows: Number of result rows to include in the response (default: 20)
+    
+    Returns:
+        Result columns, a preview of the rows, and where the result was saved
+    """
+    try:
+        import time
+        from .datasets import register_dataset
+        from .loaders import ChunkWriter
+        from .sql_engine import DUCKDB_AVAILABLE, SqlSession, is_parquet_output, iter_relation_chunks
+        
+        if not DUCKDB_AVAILABLE:
+            return "Error: query_data needs DuckDB. Install it with: pip install visidata-mcp[sql]"
+        if preview_rows < 0:
+            return "Error: preview_rows must not be negative"
+        
+        started = time.perf_counter()
+        with SqlSession(tables) as session:
+            try:
+                relation = session.relation(sql)
+            except ValueError as e:
+                return f"Error: {str(e)}"
+            columns = list(relation.columns)
+            
+            if output_path is None:
+                # Only the preview (plus one row to tell whether there is more) is computed
+                head = relation.limit(preview_rows + 1).df()
+                result = {
+                    "columns": columns,
+                    "preview_rows": min(len(head), preview_rows),
+                    "truncated": len(head) > preview_rows,
+                    "preview": frame_to_records(head.head(preview_rows)),
+                }
+            elif is_parquet_output(output_path, output_format):
+                relation.write_parquet(output_path)
+                written = session.conn.sql("SELECT * FROM read_parquet(?)", params=[output_path])
+                result = {
+                    "columns": columns,
+                    "rows": int(written.aggregate("count(*)").fetchone()[0]),
+                    "preview": frame_to_records(written.limit(preview_rows).df()),
+                    "saved_to": output_path,
+                }
+            else:
+                writer = ChunkWriter(output_path, output_format)
+                preview = []
+                for chunk in iter_relation_chunks(relation):
+                    if len(preview) < preview_rows:
+                        preview.extend(frame_to_records(chunk.head(preview_rows - len(preview))))
+                    writer.write(chunk)
+                writer.close(columns)
+                result = {
+                    "columns": columns,
+                    "rows": writer.rows_written,
+                    "preview": preview,
+                    "saved_to": output_path,
+                    # Let clients page through the saved result as a dataset resource
+                    "dataset_id": register_dataset(output_path, output_format).dataset_id,
+                }
+            result["tables"] = session.tables
+        
+        result["seconds"] = round(time.perf_counter() - started, 6)
+        return to_json(result)
+        
+    except Exception as e:
+        return f"Error querying data: {str(e)}\n{traceback.format_exc()}"
+
+
 def main():
     """Main entry point for the VisiData MCP server."""
     mcp.run()
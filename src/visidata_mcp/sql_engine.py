@@ -0,0 +1,180 @@
+"""
+SQL over data files with DuckDB, for the query_data tool.
+
+DuckDB is an embedded, multi-threaded columnar engine that runs in-process,
+so a query such as
+
+    SELECT company_location, avg(salary_usd) FROM jobs GROUP BY 1 ORDER BY 2 DESC
+
+runs vectorized over the file on every core without an external service.
+Files can be named directly in the SQL (``FROM '/data/jobs.csv'``) or bound to
+table names. CSV, TSV, JSON Lines, JSON arrays and Parquet (also gzip or zstd
+compressed) are scanned by DuckDB itself; every other format the server reads
+(Excel, SQLite, bz2/xz-compressed files, VisiData formats) is streamed into a
+DuckDB table chunk by chunk. A table can also be a dataset id from load_data.
+
+Results are fetched in vectorized chunks, so they can be streamed to an output
+file without being held in memory. DuckDB is optional:
+``pip install visidata-mcp[sql]``.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from .compression import compression_from_suffix, detect_compression, strip_compression
+from .datasets import get_dataset
+from .json_stream import LAYOUT_ARRAY, LAYOUT_LINES, json_layout
+from .loaders import DEFAULT_CHUNKSIZE, detect_format, iter_chunks
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+# DuckDB hands results out in vectors of this many rows
+VECTOR_SIZE = 2048
+# Compression DuckDB decompresses by itself while scanning
+DUCKDB_COMPRESSION = ('gzip', 'zstd')
+
+
+def require_duckdb() -> None:
+    """
+    Raises:
+        ValueError: If DuckDB is not installed
+    """
+    if not DUCKDB_AVAILABLE:
+        raise ValueError("SQL queries need DuckDB: pip install visidata-mcp[sql]")
+
+
+def _literal(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def scan_expression(file_path: str, file_type: Optional[str] = None) -> Optional[str]:
+    """
+    The DuckDB table function that scans a file directly, or None if DuckDB
+    cannot read it and it has to be loaded through the server's readers.
+    """
+    codec = detect_compression(file_path)
+    if codec is not None and codec not in DUCKDB_COMPRESSION:
+        return None
+    path = _literal(os.path.abspath(file_path))
+    compression = f", compression={_literal(codec)}" if codec else ""
+    if (file_type or Path(strip_compression(file_path)).suffix).lower().lstrip('.') == 'parquet':
+        return None if codec else f"read_parquet({path})"
+    fmt = detect_format(file_path, file_type)
+    if fmt in ('csv', 'tsv'):
+        delimiter = _literal('\t' if fmt == 'tsv' else ',')
+        return f"read_csv({path}, header=true, delim={delimiter}{compression})"
+    if fmt == 'jsonl':
+        return f"read_json({path}, format='newline_delimited'{compression})"
+    if fmt == 'json':
+        layout = json_layout(file_path)
+        if layout == LAYOUT_ARRAY:
+            return f"read_json({path}, format='array'{compression})"
+        if layout == LAYOUT_LINES:
+            return f"read_json({path}, format='newline_delimited'{compression})"
+    return None
+
+
+def _resolve_source(source: str) -> Tuple[str, Optional[str]]:
+    # A table can name a dataset registered by load_data instead of a path
+    if not os.path.exists(source):
+        try:
+            dataset = get_dataset(source)
+        except ValueError:
+            raise FileNotFoundError(f"No such file or dataset: '{source}'") from None
+        return dataset.file_path, dataset.format
+    return source, None
+
+
+class SqlSession:
+    """
+    An in-memory DuckDB connection with named tables bound to files.
+
+    Args:
+        tables: Mapping of table name to file path or dataset id
+        threads: Worker threads for DuckDB (default: one per core)
+    """
+
+    def __init__(self, tables: Optional[Dict[str, str]] = None, threads: Optional[int] = None):
+        require_duckdb()
+        config = {"threads": threads} if threads else {}
+        self.conn = duckdb.connect(":memory:", config=config)
+        self.tables: Dict[str, str] = {}
+        for name, source in (tables or {}).items():
+            self.tables[name] = self._bind(name, source)
+
+    def _bind(self, name: str, source: str) -> str:
+        file_path, file_type = _resolve_source(source)
+        expression = scan_expression(file_path, file_type)
+        if expression is not None:
+            self.conn.execute(f"CREATE VIEW {_identifier(name)} AS SELECT * FROM {expression}")
+            return "scanned by duckdb"
+        created = False
+        for chunk in iter_chunks(file_path, file_type=file_type):
+            self.conn.register("__chunk", chunk)
+            if created:
+                self.conn.execute(f"INSERT INTO {_identifier(name)} SELECT * FROM __chunk")
+            else:
+                self.conn.execute(f"CREATE TABLE {_identifier(name)} AS SELECT * FROM __chunk")
+                created = True
+            self.conn.unregister("__chunk")
+        return "loaded in chunks"
+
+    def relation(self, sql: str) -> Any:
+        """
+        Plan a single SELECT statement.
+
+        Raises:
+            ValueError: If the SQL is not exactly one read-only query
+        """
+        statements = self.conn.extract_statements(sql)
+        if len(statements) != 1:
+            raise ValueError(f"Expected one SQL statement, got {len(statements)}")
+        if statements[0].type != duckdb.StatementType.SELECT:
+            raise ValueError("Only SELECT queries are allowed")
+        return self.conn.sql(sql)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "SqlSession":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def iter_relation_chunks(relation: Any, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """
+    Run a relation and yield its rows in DataFrame chunks.
+
+    Yields:
+        DataFrame chunks in result order; at least one, possibly empty
+    """
+    vectors = max(1, chunksize // VECTOR_SIZE)
+    yielded = False
+    while True:
+        chunk = relation.fetch_df_chunk(vectors)
+        if len(chunk) == 0:
+            break
+        yield chunk
+        yielded = True
+    if not yielded:
+        yield pd.DataFrame(columns=relation.columns)
+
+
+def is_parquet_output(output_path: str, output_format: Optional[str] = None) -> bool:
+    """Whether a query result should be written as Parquet (by DuckDB)."""
+    if compression_from_suffix(output_path) is not None:
+        return False
+    return (output_format or Path(output_path).suffix).lower().lstrip('.') == 'parquet'
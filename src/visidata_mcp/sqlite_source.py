@@ -0,0 +1,346 @@
+"""
+SQLite databases as query sources.
+
+Instead of loading a whole table into pandas and filtering, sorting or
+grouping it there, the parts of a tool call that SQL can express are
+translated into one SELECT statement, so only the result rows cross into
+Python and the database's own indexes are used:
+
+    SqliteQuery(path, "jobs").where("salary_usd", "greater_than", "100000")
+                             .select(["job_title", "salary_usd"])
+                             .order_by(["salary_usd"], descending=True)
+                             .limit(10)
+
+Filters keep the semantics of the filter_data tool (equals compares the text
+form of a value, contains is a case-insensitive regular expression search,
+greater_than/less_than only match numbers), and NULLs sort last like pandas.
+Databases are opened read-only. A ``sheet`` argument picks a table or view by
+name or 0-based index; the first table is used by default.
+"""
+
+import math
+import os
+import re
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import quote
+
+import pandas as pd
+
+from .metrics import measured
+
+SQLITE_FORMATS = ('sqlite', 'sqlite3', 'db')
+
+# Aggregates with a SQL equivalent; approx_distinct is computed exactly
+SQL_AGGREGATES = ("count", "sum", "mean", "min", "max", "std", "approx_distinct")
+
+DEFAULT_CHUNKSIZE = 100_000
+
+SheetRef = Optional[Union[str, int]]
+
+_NUMERIC_AFFINITY = ('INT', 'REAL', 'FLOA', 'DOUB', 'NUM', 'DEC', 'BOOL')
+_TEXT_AFFINITY = ('CHAR', 'CLOB', 'TEXT')
+_REGEX_SPECIAL = set('.^$*+?{}[]\\|()')
+
+
+def is_sqlite_format(file_type: str) -> bool:
+    """Whether a file type (a suffix without the dot) is a SQLite database."""
+    return file_type in SQLITE_FORMATS
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table or column name for use in SQL."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _to_number(value: Any) -> Optional[float]:
+    # Same coercion as pd.to_numeric(errors='coerce') for a single value
+    if value is None or isinstance(value, bytes):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _regexp_search(pattern: str, value: Any) -> int:
+    if value is None:
+        return 0
+    return 1 if re.search(pattern, str(value), re.IGNORECASE) else 0
+
+
+class _SampleStd:
+    """Sample standard deviation (Welford), matching pandas' std with ddof=1."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def step(self, value: Any) -> None:
+        if value is None:
+            return
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def finalize(self) -> Optional[float]:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+
+def connect(file_path: str) -> sqlite3.Connection:
+    """
+    Open a database read-only, with the helper functions the queries use.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"No such file: '{file_path}'")
+    conn = sqlite3.connect(f"file:{quote(os.path.abspath(file_path))}?mode=ro", uri=True,
+                           check_same_thread=False)
+    conn.create_function("vdmcp_number", 1, _to_number, deterministic=True)
+    conn.create_function("vdmcp_regexp", 2, _regexp_search, deterministic=True)
+    conn.create_aggregate("vdmcp_std", 1, _SampleStd)
+    return conn
+
+
+def table_names(file_path: str) -> List[str]:
+    """Names of the tables and views in a database, tables first."""
+    conn = connect(file_path)
+    try:
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY type = 'view', rowid").fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+
+def resolve_table(file_path: str, sheet: SheetRef = None) -> str:
+    """
+    Pick a table by name or 0-based index (default: the first table).
+
+    Raises:
+        ValueError: If the database has no tables or the table does not exist
+    """
+    names = table_names(file_path)
+    if not names:
+        raise ValueError(f"No tables found in {file_path}")
+    if sheet is None:
+        return names[0]
+    if isinstance(sheet, int) or (isinstance(sheet, str) and sheet.isdigit() and sheet not in names):
+        index = int(sheet)
+        if not 0 <= index < len(names):
+            raise ValueError(f"Table index {index} out of range; {file_path} has {len(names)} tables")
+        return names[index]
+    if sheet not in names:
+        raise ValueError(f"Table '{sheet}' not found. Available tables: {names}")
+    return sheet
+
+
+def can_push_aggregations(aggregations: Sequence[Dict[str, Any]]) -> bool:
+    """Whether every (normalized) aggregation spec has a SQL equivalent."""
+    return all(agg["function"] in SQL_AGGREGATES for agg in aggregations)
+
+
+class SqliteQuery:
+    """
+    A SELECT over one table of a SQLite database, built up step by step.
+
+    Args:
+        file_path: Path to the database
+        sheet: Table name or 0-based index (default: the first table)
+    """
+
+    def __init__(self, file_path: str, sheet: SheetRef = None):
+        self.file_path = file_path
+        self.table = resolve_table(file_path, sheet)
+        conn = connect(file_path)
+        try:
+            info = conn.execute(f"PRAGMA table_info({quote_identifier(self.table)})").fetchall()
+        finally:
+            conn.close()
+        self.columns: List[str] = [row[1] for row in info]
+        self._types: Dict[str, str] = {row[1]: (row[2] or "").upper() for row in info}
+        self._select: Optional[List[str]] = None
+        self._where: List[str] = []
+        self._params: List[Any] = []
+        self._order: List[str] = []
+        self._group: Optional[Tuple[List[str], List[Dict[str, Any]]]] = None
+        self._limit: Optional[int] = None
+        self._offset = 0
+
+    # -- building --------------------------------------------------------------
+
+    def _require(self, columns: Sequence[str]) -> None:
+        missing = [col for col in columns if col not in self.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {missing}")
+
+    def _is_numeric(self, column: str) -> bool:
+        return any(marker in self._types[column] for marker in _NUMERIC_AFFINITY)
+
+    def _is_text(self, column: str) -> bool:
+        return any(marker in self._types[column] for marker in _TEXT_AFFINITY)
+
+    def _numeric_expr(self, column: str) -> str:
+        name = quote_identifier(column)
+        if self._is_numeric(column):
+            return f"(CASE WHEN typeof({name}) IN ('integer', 'real') THEN {name} END)"
+        return f"vdmcp_number({name})"
+
+    def where(self, column: str, condition: str, value: str) -> "SqliteQuery":
+        """Keep rows matching a filter_data condition (equals, contains, greater_than, less_than)."""
+        self._require([column])
+        name = quote_identifier(column)
+        value = str(value)
+        if condition == "equals":
+            # Text columns compare directly so an index on the column can be used
+            self._where.append(f"{name} = ?" if self._is_text(column) else f"CAST({name} AS TEXT) = ?")
+            self._params.append(value)
+        elif condition == "contains":
+            if value.isascii() and not _REGEX_SPECIAL & set(value):
+                # A plain ASCII substring: LIKE is case-insensitive for ASCII
+                escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                self._where.append(f"CAST({name} AS TEXT) LIKE ? ESCAPE '\\'")
+                self._params.append(f"%{escaped}%")
+            else:
+                self._where.append(f"vdmcp_regexp(?, {name})")
+                self._params.append(value)
+        elif condition in ("greater_than", "less_than"):
+            op = ">" if condition == "greater_than" else "<"
+            if self._is_numeric(column):
+                # Comparing the bare column keeps range scans on an index possible
+                self._where.append(f"({name} {op} ? AND typeof({name}) IN ('integer', 'real'))")
+            else:
+                self._where.append(f"vdmcp_number({name}) {op} ?")
+            self._params.append(float(value))
+        else:
+            raise ValueError(f"Unknown condition '{condition}'. Use: equals, contains, greater_than, less_than")
+        return self
+
+    def select(self, columns: Sequence[str]) -> "SqliteQuery":
+        """Only read these columns."""
+        self._require(columns)
+        self._select = list(columns)
+        return self
+
+    def order_by(self, columns: Sequence[str], descending: bool = False) -> "SqliteQuery":
+        """Sort by columns, NULLs last."""
+        self._require(columns)
+        direction = "DESC" if descending else "ASC"
+        self._order = [f"{quote_identifier(col)} {direction} NULLS LAST" for col in columns]
+        return self
+
+    def limit(self, rows: Optional[int], offset: int = 0) -> "SqliteQuery":
+        """Return at most rows rows, skipping the first offset."""
+        self._limit = rows
+        self._offset = offset
+        return self
+
+    def group_by(self, keys: Sequence[str], aggregations: Sequence[Dict[str, Any]]) -> "SqliteQuery":
+        """
+        Aggregate per group, like the group_by tool; groups come back sorted by the keys.
+
+        Args:
+            keys: Group key columns
+            aggregations: Specs normalized by aggregate.normalize_aggregations
+
+        Raises:
+            ValueError: If a column is missing or an aggregate has no SQL equivalent
+        """
+        self._require(list(keys) + [agg["column"] for agg in aggregations if agg["column"]])
+        unsupported = [agg["function"] for agg in aggregations if agg["function"] not in SQL_AGGREGATES]
+        if unsupported:
+            raise ValueError(f"Aggregates without a SQL equivalent: {unsupported}")
+        self._group = (list(keys), list(aggregations))
+        self._order = [f"{quote_identifier(key)} ASC NULLS LAST" for key in keys]
+        return self
+
+    def _aggregate_expr(self, agg: Dict[str, Any]) -> str:
+        column, function = agg["column"], agg["function"]
+        if function == "count":
+            return f"COUNT({quote_identifier(column)})" if column else "COUNT(*)"
+        if function == "approx_distinct":
+            return f"COUNT(DISTINCT {quote_identifier(column)})"
+        if function in ("min", "max"):
+            return f"{function.upper()}({quote_identifier(column)})"
+        number = self._numeric_expr(column)
+        if function == "sum":
+            return f"COALESCE(SUM({number}), 0)"
+        if function == "mean":
+            return f"AVG({number})"
+        return f"vdmcp_std({number})"
+
+    def sql(self) -> Tuple[str, List[Any]]:
+        """The SELECT statement and its parameters."""
+        if self._group is not None:
+            keys, aggregations = self._group
+            parts = [quote_identifier(key) for key in keys]
+            parts += [f"{self._aggregate_expr(agg)} AS {quote_identifier(agg['as'])}" for agg in aggregations]
+        elif self._select is not None:
+            parts = [quote_identifier(col) for col in self._select]
+        else:
+            parts = ["*"]
+        statement = f"SELECT {', '.join(parts)} FROM {quote_identifier(self.table)}"
+        if self._where:
+            statement += " WHERE " + " AND ".join(self._where)
+        if self._group is not None:
+            statement += " GROUP BY " + ", ".join(quote_identifier(key) for key in self._group[0])
+        if self._order:
+            statement += " ORDER BY " + ", ".join(self._order)
+        if self._limit is not None or self._offset:
+            statement += f" LIMIT {-1 if self._limit is None else int(self._limit)} OFFSET {int(self._offset)}"
+        return statement, list(self._params)
+
+    @property
+    def output_columns(self) -> List[str]:
+        """Column names of the result."""
+        if self._group is not None:
+            return self._group[0] + [agg["as"] for agg in self._group[1]]
+        return list(self._select) if self._select is not None else list(self.columns)
+
+    # -- running ---------------------------------------------------------------
+
+    def count(self) -> int:
+        """Number of rows the query returns."""
+        statement, params = self.sql()
+        conn = connect(self.file_path)
+        try:
+            return int(conn.execute(f"SELECT COUNT(*) FROM ({statement})", params).fetchone()[0])
+        finally:
+            conn.close()
+
+    @measured("parse", count_rows=True)
+    def iter_chunks(self, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+        """
+        Run the query and yield its rows in DataFrame chunks.
+
+        Yields:
+            DataFrame chunks in result order; at least one, possibly empty
+        """
+        statement, params = self.sql()
+        conn = connect(self.file_path)
+        try:
+            cursor = conn.execute(statement, params)
+            columns = [description[0] for description in cursor.description]
+            yielded = False
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+                yielded = True
+            if not yielded:
+                yield pd.DataFrame(columns=columns)
+        finally:
+            conn.close()
+
+    @measured("parse", count_rows=True)
+    def frame(self) -> pd.DataFrame:
+        """Run the query and return all of its rows."""
+        chunks = list(self.iter_chunks())
+        return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
@@ -0,0 +1,246 @@
+"""
+Loader backend built on VisiData sheets.
+
+Formats pandas has no reader for here (HTML, XML, YAML, HDF5, Parquet,
+archives, ...) are opened with VisiData's own loaders. VisiData
+loads rows in a background thread and appends them to the sheet as they are
+parsed, so chunks are handed out while the load is still running: a sample
+of the first rows comes back as soon as those rows exist, and the load is
+cancelled once a row limit is reached.
+
+Files holding several tables (the tables of an HTML page, the members of a
+zip or tar archive) are opened at their first table unless
+``sheet`` names another one by name or 0-based index.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+from visidata import IndexSheet, TypedWrapper, vd
+
+# File types routed to VisiData rather than to the pandas readers
+VISIDATA_FORMATS = (
+    'html', 'htm', 'xml', 'yaml', 'yml', 'toml', 'h5', 'hdf5', 'parquet', 'arrow', 'arrows',
+    'feather', 'orc', 'pkl', 'pickle', 'npy', 'npz', 'msgpack', 'zip', 'tar', 'tgz', 'tbz2', 'txz',
+    'ods', 'dta', 'sav', 'sas7bdat', 'xpt', 'dbf', 'shp', 'geojson', 'psv', 'usv', 'lsv',
+)
+ARCHIVE_SHEETS = ('ZipSheet', 'TarSheet')
+
+DEFAULT_CHUNKSIZE = 100_000
+POLL_SECONDS = 0.01
+ERROR_PRIORITY = 2
+
+SheetRef = Optional[Union[str, int]]
+
+# VisiData's status history and sheet registry are process-wide
+_open_lock = threading.Lock()
+
+
+def is_visidata_format(file_type: str) -> bool:
+    """Whether a file type (a suffix without the dot) is loaded through VisiData."""
+    return file_type in VISIDATA_FORMATS
+
+
+def _live_threads(sheet: Any) -> List[threading.Thread]:
+    return [thread for thread in getattr(sheet, 'currentThreads', []) if thread.is_alive()]
+
+
+def _wait(sheet: Any) -> None:
+    threads = _live_threads(sheet)
+    if threads:
+        vd.sync(*threads)
+
+
+def _load_errors(since: int) -> List[str]:
+    errors = []
+    for entry in vd.statusHistory[since:]:
+        priority, args = entry[0], entry[1]
+        if priority >= ERROR_PRIORITY:
+            errors.append(" ".join(str(arg) for arg in args))
+    return errors
+
+
+def _has_tables(sheet: Any) -> bool:
+    """Whether a sheet lists other tables (known before it is loaded)."""
+    return isinstance(sheet, IndexSheet) or type(sheet).__name__ in ARCHIVE_SHEETS
+
+
+def _open_source(file_path: str, file_type: Optional[str]) -> Any:
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"No such file: '{file_path}'")
+    top = vd.openSource(file_path, filetype=file_type) if file_type else vd.openSource(file_path)
+    if top is None:
+        raise ValueError(f"VisiData has no loader for {file_path}")
+    return top
+
+
+def _child_sheets(sheet: Any) -> List[Any]:
+    """Load a multi-table sheet and return the tables inside it."""
+    sheet.reload()
+    _wait(sheet)
+    if isinstance(sheet, IndexSheet):
+        return list(sheet.rows)
+    return [sheet.openRow(row) for row in sheet.rows]
+
+
+def _cancel_loads(sheets: Iterable[Any]) -> None:
+    for sheet in sheets:
+        threads = _live_threads(sheet)
+        if threads:
+            vd.cancelThread(*threads)
+
+
+def _pick(children: Sequence[Any], sheet: SheetRef, file_path: str) -> Any:
+    names = [child.name for child in children]
+    if not children:
+        raise ValueError(f"No tables found in {file_path}")
+    if sheet is None:
+        return children[0]
+    if isinstance(sheet, int) or (isinstance(sheet, str) and sheet.isdigit() and sheet not in names):
+        index = int(sheet)
+        if not 0 <= index < len(children):
+            raise ValueError(f"Table index {index} out of range; {file_path} has {len(children)} tables")
+        return children[index]
+    if sheet not in names:
+        raise ValueError(f"Table '{sheet}' not found. Available tables: {names}")
+    return children[names.index(sheet)]
+
+
+def open_table(file_path: str, sheet: SheetRef = None, file_type: Optional[str] = None) -> Any:
+    """
+    Open the VisiData sheet holding a file's rows, without loading them yet.
+
+    Args:
+        file_path: Path to the data file
+        sheet: Table name or 0-based index for files with several tables
+        file_type: Optional VisiData file type (default: from the suffix)
+
+    Returns:
+        An unloaded VisiData sheet
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If VisiData cannot open the file or the table does not exist
+    """
+    with _open_lock:
+        top = _open_source(file_path, file_type)
+        if not _has_tables(top):
+            # A plain table: hand it back unloaded so rows can be streamed
+            return top
+        history = len(vd.statusHistory)
+        children = _child_sheets(top)
+        errors = _load_errors(history)
+    if not children and errors:
+        raise ValueError(errors[-1])
+    table = _pick(children, sheet, file_path)
+    # Index sheets start loading every table they list; only the picked one is wanted
+    _cancel_loads(child for child in children if child is not table)
+    return table
+
+
+def _cell(column: Any, row: Any) -> Any:
+    try:
+        value = column.getTypedValue(row)
+    except Exception:
+        return None
+    # VisiData wraps missing values and errors; both become missing
+    return None if isinstance(value, TypedWrapper) else value
+
+
+def _to_frame(sheet: Any, rows: Sequence[Any], columns: Optional[List[str]]) -> pd.DataFrame:
+    sheet_columns = [col for col in sheet.visibleCols if columns is None or col.name in columns]
+    names = [col.name for col in sheet_columns]
+    df = pd.DataFrame({i: [_cell(col, row) for row in rows] for i, col in enumerate(sheet_columns)},
+                      columns=range(len(sheet_columns)))
+    df.columns = names
+    for i in range(df.shape[1]):
+        series = df.iloc[:, i]
+        if series.dtype == object:
+            # Text loaders leave every cell a string; let numbers be numbers
+            try:
+                converted = pd.to_numeric(series, errors='coerce')
+            except TypeError:
+                converted = None
+            if converted is not None and converted.notna().sum() == series.notna().sum():
+                df.isetitem(i, converted)
+            else:
+                df.isetitem(i, series.infer_objects())
+    if columns is not None:
+        missing = [col for col in columns if col not in names]
+        if missing:
+            raise ValueError(f"Columns not found: {missing}")
+        df = df[columns]
+    return df
+
+
+def iter_visidata_chunks(file_path: str, sheet: SheetRef = None, columns: Optional[List[str]] = None,
+                         chunksize: int = DEFAULT_CHUNKSIZE, nrows: Optional[int] = None,
+                         file_type: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Read a file through VisiData in DataFrame chunks, while it is still loading.
+
+    Args:
+        file_path: Path to the data file
+        sheet: Table name or 0-based index for files with several tables
+        columns: Optional subset of columns to keep
+        chunksize: Maximum number of rows per chunk
+        nrows: Stop (and cancel the load) after this many rows
+        file_type: Optional VisiData file type
+
+    Yields:
+        DataFrame chunks in file order; at least one, possibly empty
+    """
+    table = open_table(file_path, sheet, file_type)
+    history = len(vd.statusHistory)
+    threads = _live_threads(table)
+    if not threads:
+        # Not loading yet (or already loaded by its index sheet): start from scratch
+        table.reload()
+        threads = list(getattr(table, 'currentThreads', []))
+    start = 0
+    yielded = False
+    try:
+        while True:
+            finished = not any(thread.is_alive() for thread in threads)
+            available = len(table.rows) if nrows is None else min(len(table.rows), nrows)
+            complete = finished or (nrows is not None and available >= nrows)
+            if available - start >= chunksize or (complete and available > start):
+                end = min(start + chunksize, available)
+                yield _to_frame(table, table.rows[start:end], columns)
+                yielded = True
+                start = end
+                continue
+            if complete:
+                break
+            time.sleep(POLL_SECONDS)
+    finally:
+        if any(thread.is_alive() for thread in threads):
+            vd.cancelThread(*threads)
+
+    if not yielded:
+        errors = _load_errors(history)
+        if errors and not table.rows:
+            raise ValueError(errors[-1])
+        yield _to_frame(table, [], columns)
+
+
+def read_visidata_frame(file_path: str, sheet: SheetRef = None, columns: Optional[List[str]] = None,
+                        nrows: Optional[int] = None, file_type: Optional[str] = None) -> pd.DataFrame:
+    """Read a whole table (or its first nrows rows) through VisiData."""
+    chunks = list(iter_visidata_chunks(file_path, sheet=sheet, columns=columns, nrows=nrows,
+                                       file_type=file_type))
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def list_tables(file_path: str, file_type: Optional[str] = None) -> List[str]:
+    """Names of the tables in a multi-table file (empty for a single table)."""
+    with _open_lock:
+        top = _open_source(file_path, file_type)
+        if not _has_tables(top):
+            return []
+        children = _child_sheets(top)
+        _cancel_loads(children)
+        return [child.name for child in children]
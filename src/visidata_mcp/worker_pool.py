@@ -0,0 +1,100 @@
+"""
+Shared pools of worker processes.
+
+Partition reads and parallel CSV parsing (partitions.py) and batch chart
+rendering (render_pool.py) each keep one long-lived ProcessPoolExecutor.
+Workers are spawned, never forked, so they do not inherit the server's
+threads. Callers lease the pool for the time they submit and collect their
+futures:
+
+- when a caller needs more workers than the pool has, a bigger pool replaces
+  it for later leases, and the old one is shut down once its last lease ends
+- when a worker dies (killed for memory, or crashed), the executor is broken
+  for good; the lease that sees BrokenProcessPool drops the pool, and the
+  next lease starts a fresh one
+"""
+
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+class WorkerPool:
+    """
+    A lazily started, lease-counted process pool.
+
+    Args:
+        initializer: Called in every worker process when it starts
+    """
+
+    def __init__(self, initializer: Optional[Callable[[], None]] = None):
+        self._initializer = initializer
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._workers = 0
+        self._lock = threading.Lock()
+        # Leases held on each executor; replaced executors stay up until theirs end
+        self._leases: Dict[ProcessPoolExecutor, int] = {}
+        self._retired: List[ProcessPoolExecutor] = []
+        atexit.register(self.shutdown)
+
+    def _retire(self, pool: ProcessPoolExecutor) -> None:
+        # Caller holds the lock
+        if pool is self._pool:
+            self._pool = None
+            self._workers = 0
+        if self._leases.get(pool):
+            if pool not in self._retired:
+                self._retired.append(pool)
+        else:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @contextmanager
+    def lease(self, workers: int) -> Iterator[ProcessPoolExecutor]:
+        """
+        Use the pool, starting or growing it if needed.
+
+        Submit and collect every future inside the block: the executor is not
+        shut down while it runs, even if another caller grows the pool.
+
+        Args:
+            workers: Worker processes needed
+        """
+        with self._lock:
+            if self._pool is None or workers > self._workers:
+                if self._pool is not None:
+                    self._retire(self._pool)
+                self._pool = ProcessPoolExecutor(max_workers=workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=self._initializer)
+                self._workers = workers
+            pool = self._pool
+            self._leases[pool] = self._leases.get(pool, 0) + 1
+        try:
+            yield pool
+        except BrokenProcessPool:
+            # A worker died; the executor cannot run anything else
+            with self._lock:
+                self._retire(pool)
+            raise
+        finally:
+            with self._lock:
+                self._leases[pool] -= 1
+                if not self._leases[pool]:
+                    del self._leases[pool]
+                    if pool in self._retired:
+                        self._retired.remove(pool)
+                        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """Stop every worker process."""
+        with self._lock:
+            for pool in self._retired + ([self._pool] if self._pool is not None else []):
+                pool.shutdown(wait=True, cancel_futures=True)
+            self._retired.clear()
+            self._leases.clear()
+            self._pool = None
+            self._workers = 0
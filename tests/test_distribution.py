@@ -0,0 +1,50 @@
+"""
+Distribution summaries must hold up on skewed data.
+
+Equal-width bins over [min, max] put almost every salary into the first bin
+once one extreme value stretches the range.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from visidata_mcp.distribution import summarize_frame
+
+RELATIVE_ERROR = 0.01
+
+
+@pytest.fixture(scope="module")
+def salaries() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return np.append(rng.normal(50_000, 10_000, 200_000), 1e9)
+
+
+@pytest.fixture(scope="module")
+def summary(salaries):
+    return summarize_frame(pd.DataFrame({"salary": salaries}), ["salary"])[0]
+
+
+def test_quartiles_match_percentiles(summary, salaries):
+    result = summary.to_dict()
+    for key, percentile in (("q1", 25), ("median", 50), ("q3", 75)):
+        assert result[key] == pytest.approx(np.percentile(salaries, percentile), rel=RELATIVE_ERROR)
+    assert result["min"] == pytest.approx(salaries.min())
+    assert result["max"] == pytest.approx(salaries.max())
+
+
+def test_box_whiskers_stay_near_the_data(summary, salaries):
+    box = summary.box_stats()
+    # The most extreme values within 1.5 IQR of the summary's own box
+    iqr = box["q3"] - box["q1"]
+    exact_low = salaries[salaries >= box["q1"] - 1.5 * iqr].min()
+    exact_high = salaries[salaries <= box["q3"] + 1.5 * iqr].max()
+    # A whisker can land one sketch bucket (2 * RELATIVE_ERROR wide) inside the fence
+    assert box["whislo"] == pytest.approx(exact_low, rel=2 * RELATIVE_ERROR)
+    assert box["whishi"] == pytest.approx(exact_high, rel=2 * RELATIVE_ERROR)
+    assert salaries.max() in box["fliers"]
+
+
+def test_kde_integrates_to_one(summary):
+    grid, density = summary.kde()
+    assert np.sum(density) * (grid[1] - grid[0]) == pytest.approx(1, rel=1e-3)
@@ -0,0 +1,42 @@
+"""
+Parallel CSV parsing must return what a single pd.read_csv pass returns.
+"""
+
+import pandas as pd
+import pytest
+
+from visidata_mcp import parallel_csv
+from visidata_mcp.partitions import shutdown_pool
+from visidata_mcp.row_index import RowIndex
+
+ROWS = 30_000
+
+
+@pytest.fixture(scope="module")
+def quoted_csv(tmp_path_factory):
+    # A literal quote early on, then many records with quoted newlines
+    path = tmp_path_factory.mktemp("parallel") / "quoted.csv"
+    with open(path, "w") as f:
+        f.write('a,b\n1,5" tv\n')
+        f.writelines(f'{i},"a\nb"\n' for i in range(ROWS))
+    yield str(path)
+    shutdown_pool()
+
+
+def test_stray_quote_parses_in_parallel(quoted_csv):
+    expected = pd.read_csv(quoted_csv)
+    assert parallel_csv.read_csv_parallel(quoted_csv, workers=2).equals(expected)
+
+
+def test_wrong_index_falls_back_to_one_pass(quoted_csv, monkeypatch):
+    good = RowIndex.build(quoted_csv, stride=1000)
+    offsets = good.offsets.copy()
+    # Cut ranges in the middle of records
+    offsets[5:] += 3
+    wrong = RowIndex(quoted_csv, "csv", good.columns, offsets, good.total_rows, good.stride)
+    monkeypatch.setattr(parallel_csv, "get_row_index", lambda *args, **kwargs: wrong)
+    expected = pd.read_csv(quoted_csv)
+
+    assert parallel_csv.read_csv_parallel(quoted_csv, workers=2).equals(expected)
+    chunks = list(parallel_csv.iter_csv_parallel(quoted_csv, chunksize=2000, workers=2))
+    assert pd.concat(chunks, ignore_index=True).equals(expected)
@@ -0,0 +1,41 @@
+"""
+Derive expressions may only use columns, numbers and operators.
+
+DataFrame.eval resolves @name to local variables, so an unchecked expression
+from a client could reach os.system through pandas' own imports.
+"""
+
+import pandas as pd
+import pytest
+
+from visidata_mcp.pipeline import Pipeline, PipelineError
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"a": [1, 3], "b c": [2, 4]}).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("expression", [
+    "@pd.io.common.os.system('echo unsafe')",
+    "__import__('os').system('echo unsafe')",
+    "a.__class__",
+    "a[0]",
+    "'text'",
+    "lambda: 1",
+])
+def test_unsafe_expressions_are_rejected(csv_path, expression):
+    with pytest.raises(PipelineError):
+        Pipeline(csv_path, [{"op": "derive", "column": "m", "expression": expression}])
+
+
+def test_unknown_columns_are_rejected(csv_path):
+    with pytest.raises(PipelineError, match="columns not found"):
+        Pipeline(csv_path, [{"op": "derive", "column": "m", "expression": "missing + 1"}])
+
+
+def test_arithmetic_on_columns(csv_path):
+    result = Pipeline(csv_path, [{"op": "derive", "column": "m", "expression": "a * 2 + `b c`"}]).execute()
+    assert [row["m"] for row in result["preview"]] == [4, 10]
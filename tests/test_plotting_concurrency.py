@@ -0,0 +1,76 @@
+"""
+Charts rendered from several threads at once must match a serial render.
+
+plotting.py draws on standalone Agg figures so the server can render charts
+concurrently; shared pyplot state would show up here as mixed-up or blank
+images.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from PIL import Image
+
+from visidata_mcp import plotting
+
+THREADS = 8
+ROUNDS = 3
+
+
+@pytest.fixture(scope="module")
+def frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    rows = 2000
+    return pd.DataFrame({
+        "x": rng.normal(size=rows),
+        "y": rng.normal(size=rows) * 3 + 1,
+        "z": rng.exponential(size=rows),
+        "category": rng.choice(["a", "b", "c"], size=rows),
+    })
+
+
+@pytest.fixture(scope="module")
+def skills() -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    return pd.DataFrame(rng.uniform(0, 100, size=(4, 5)).round(1),
+                        index=[f"location {i}" for i in range(4)],
+                        columns=[f"skill {i}" for i in range(5)])
+
+
+def _charts(frame: pd.DataFrame, skills: pd.DataFrame):
+    return {
+        "graph": lambda path: plotting.render_graph(frame, "x", "y", path, graph_type="scatter",
+                                                    category_column="category", dpi=60),
+        "line": lambda path: plotting.render_graph(frame, "x", "y", path, graph_type="line",
+                                                   category_column="category", dpi=60),
+        "correlation_heatmap": lambda path: plotting.render_correlation_heatmap(frame, path),
+        "distribution": lambda path: plotting.render_distribution_plots(frame, path, plot_type="violin"),
+        "skills_heatmap": lambda path: plotting.render_skills_heatmap(skills, path, "Skills"),
+    }
+
+
+def _pixels(path: str) -> np.ndarray:
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGBA"))
+
+
+def test_concurrent_renders_match_serial(frame, skills, tmp_path):
+    charts = _charts(frame, skills)
+    expected = {}
+    for name, render in charts.items():
+        path = os.path.join(tmp_path, f"serial-{name}.png")
+        render(path)
+        expected[name] = _pixels(path)
+
+    jobs = [(name, os.path.join(tmp_path, f"{name}-{i}.png"))
+            for i in range(ROUNDS) for name in charts]
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        list(executor.map(lambda job: charts[job[0]](job[1]), jobs))
+
+    for name, path in jobs:
+        pixels = _pixels(path)
+        assert pixels.shape == expected[name].shape, path
+        assert np.array_equal(pixels, expected[name]), f"{path} differs from the serial render"
@@ -0,0 +1,34 @@
+"""
+The row index must count and locate records the way pandas parses them.
+"""
+
+import pandas as pd
+import pytest
+
+from visidata_mcp import row_index
+from visidata_mcp.row_index import RowIndex
+
+FILES = {
+    # A quote inside an unquoted field is a literal character
+    "stray_quote": 'a,b\n1,5" tv\n2,x\n3,y\n4,z\n',
+    "quoted_newlines": 'a,b\n1,"x\ny"\n2,"say ""hi""\nthere"\n3,z\n',
+    "text_after_closing_quote": 'a,b\n1,"x"y"z\n2,w\n3,"v"\n',
+    "stray_then_quoted": 'a,b\n1,5" tv\n2,"p\nq"\n3,"r,s"\n4,t',
+    "crlf": 'a,b\r\n1,5" tv\r\n\r\n2,"x\r\ny"\r\n3,z\r\n',
+}
+
+
+@pytest.mark.parametrize("block_size", [5, 64, row_index.BLOCK_SIZE])
+@pytest.mark.parametrize("name", sorted(FILES))
+def test_index_matches_pandas(tmp_path, monkeypatch, name, block_size):
+    path = tmp_path / f"{name}.csv"
+    path.write_bytes(FILES[name].encode())
+    monkeypatch.setattr(row_index, "BLOCK_SIZE", block_size)
+
+    expected = pd.read_csv(path, dtype=str)
+    index = RowIndex.build(str(path), stride=1)
+
+    assert index.total_rows == len(expected)
+    for row in range(len(expected)):
+        page = index.read_rows(row, 1)
+        assert page.astype(str).iloc[0].tolist() == expected.iloc[row].tolist()
@@ -0,0 +1,37 @@
+"""
+The shared worker pool must survive growth and dead workers.
+"""
+
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from visidata_mcp.worker_pool import WorkerPool
+
+
+@pytest.fixture
+def pool():
+    workers = WorkerPool()
+    yield workers
+    workers.shutdown()
+
+
+def test_dead_worker_is_replaced(pool):
+    with pytest.raises(BrokenProcessPool):
+        with pool.lease(2) as executor:
+            executor.submit(os._exit, 1).result()
+
+    with pool.lease(2) as executor:
+        assert executor.submit(abs, -3).result() == 3
+
+
+def test_growing_keeps_leased_pool_running(pool):
+    with pool.lease(1) as small:
+        with pool.lease(2) as big:
+            assert big is not small
+            assert big.submit(abs, -1).result() == 1
+        # The replaced pool still serves the lease that holds it
+        assert small.submit(abs, -2).result() == 2
+    with pool.lease(2) as executor:
+        assert executor is big